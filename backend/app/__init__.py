@@ -1,20 +1,86 @@
+import click
 from flask import Flask
-from .extensions import db, migrate, cors, jwt, ma
+from .extensions import db, cors, jwt, ma
 from .config import config_by_name
 from .models import *
-from .routes import register_routes
+from .routes import register_routes, register_routes_lazily
+from .uploads import UploadRequest
+from .replicas import REPLICA_BIND, STICKY_HEADER, init_app as init_replicas
+from .db_pools import configure_pools
 # from apscheduler_tasks import register_scheduler
 
 
-def create_app():
+def create_app(lazy=None, config_name='dev'):
+    """Создаёт приложение.
+
+    В ленивом режиме (lazy=True или LAZY_LOADING=1) маршруты, сервисы и схемы загружаются
+    при первом запросе, а Flask-Migrate не подключается — для быстрого холодного старта
+    автомасштабируемых процессов и тестов. Миграции выполняются в обычном режиме.
+    config_name — ключ config_by_name ('dev', 'prod' или 'test').
+    """
     app = Flask(__name__, static_folder='static')
-    app.config.from_object(config_by_name['dev'])
-    register_routes(app)
+    app.request_class = UploadRequest
+    app.config.from_object(config_by_name[config_name])
+    if lazy is None:
+        lazy = app.config['LAZY_LOADING']
+    if app.config.get('SQLALCHEMY_REPLICA_URI'):
+        app.config['SQLALCHEMY_BINDS'] = {
+            **app.config.get('SQLALCHEMY_BINDS', {}),
+            REPLICA_BIND: app.config['SQLALCHEMY_REPLICA_URI'],
+        }
+    configure_pools(app)
+    if lazy:
+        register_routes_lazily(app)
+    else:
+        register_routes(app)
     db.init_app(app)
-    migrate.init_app(app, db)
+    init_replicas(app)
+    if not lazy:
+        from .extensions import migrate
+        migrate.init_app(app, db)
     cors.init_app(app, resources={
-                  r"/api/*": {"origins": app.config['CORS_ORIGINS']}})
+                  r"/api/*": {"origins": app.config['CORS_ORIGINS']}},
+                  expose_headers=[STICKY_HEADER])
     jwt.init_app(app)
     ma.init_app(app)
 
+    @app.cli.command('build-assets')
+    def build_assets_command():
+        """Строит манифест статических файлов и их сжатые варианты (запускать при деплое)."""
+        from .services.asset_service import build_static_assets
+        manifest = build_static_assets()
+        compressed = sum(1 for entry in manifest.values() if entry['encodings'])
+        print(f"[Assets] Файлов: {len(manifest)}, со сжатыми вариантами: {compressed}")
+
+    @app.cli.command('archive-tournaments')
+    @click.option('--prune', is_flag=True, default=None,
+                  help='Удалить этапы и матчи из рабочих таблиц после архивации')
+    def archive_tournaments_command(prune):
+        """Архивирует завершённые турниры, у которых ещё нет снимка."""
+        from .services.archive_service import archive_completed_tournaments
+        archived = archive_completed_tournaments(prune=prune)
+        print(f"[Archive] Заархивировано турниров: {archived}")
+
+    @app.cli.command('award-achievements')
+    def award_achievements_command():
+        """Проверяет правила всех достижений для всех пользователей и выдаёт заработанные."""
+        from .services.achievement_service import backfill_achievements
+        from .services.archive_service import count_pruned
+        pruned = count_pruned()
+        if pruned:
+            # Матчи таких турниров удалены из рабочих таблиц, правила их не видят
+            print(f"[Achievements] Турниров с удалёнными матчами: {pruned}, они не учитываются")
+        awarded = backfill_achievements()
+        print(f"[Achievements] Выдано достижений: {awarded}")
+
+    @app.cli.command('recount-open-matches')
+    @click.option('--tournament', 'tournament_id', type=click.UUID, default=None,
+                  help='Пересчитать только один турнир')
+    def recount_open_matches_command(tournament_id):
+        """Пересчитывает счётчики незавершённых матчей турниров, групповых этапов и групп."""
+        from .services.match_service import recount_open_matches
+        corrected = recount_open_matches(tournament_id)
+        db.session.commit()
+        print(f"[Matches] Исправлено счётчиков: {corrected}")
+
     return app
@@ -1,17 +1,31 @@
 from datetime import datetime, timedelta, timezone
+from functools import wraps
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.date import DateTrigger
 from flask import current_app
 import pytz
 from app.services.tournament_service import start_tournament
 from app.services.user_service import remove_expired_tokens
+from app.services.match_service import remove_expired_idempotency_keys
+from app.services.image_service import remove_unreferenced_images
 from app.models import ScheduledTournament
+from app.db_pools import use_role
 
 
 scheduler = BackgroundScheduler()
 scheduler_initialized = False
 
 
+def scheduler_job(app, func):
+    """Оборачивает задачу: контекст приложения и соединения из пула планировщика."""
+    @wraps(func)
+    def job(*args, **kwargs):
+        with app.app_context(), use_role('scheduler'):
+            return func(*args, **kwargs)
+
+    return job
+
+
 def register_scheduler(app):
     global scheduler_initialized
     if scheduler_initialized:
@@ -29,7 +43,11 @@ def register_scheduler(app):
                 print(
                     f"Restored job for tournament {scheduled.tournament_id} at {scheduled.start_time}")
 
-        scheduler.add_job(func=remove_expired_tokens,
+        scheduler.add_job(func=scheduler_job(app, remove_expired_tokens),
+                          trigger="interval", hours=1)
+        scheduler.add_job(func=scheduler_job(app, remove_expired_idempotency_keys),
+                          trigger="interval", hours=1)
+        scheduler.add_job(func=scheduler_job(app, remove_unreferenced_images),
                           trigger="interval", hours=1)
         scheduler.start()
         scheduler_initialized = True
@@ -42,7 +60,7 @@ def schedule_tournament_start(tournament_id, start_time: datetime, job_id: str):
         print(
             f"Scheduling tournament {tournament_id} to start at {start_time} with job_id {job_id}")
         scheduler.add_job(
-            func=start_tournament,
+            func=scheduler_job(current_app._get_current_object(), start_tournament),
             trigger=DateTrigger(run_date=start_time),
             args=[tournament_id],
             id=job_id,
@@ -1,7 +1,9 @@
 from .dev import DevConfig
 from .prod import ProdConfig
+from .test import TestConfig
 
 config_by_name = dict(
     dev=DevConfig,
-    prod=ProdConfig
+    prod=ProdConfig,
+    test=TestConfig
 )
@@ -5,3 +5,35 @@ class BaseConfig:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'super-secret-key')
     CORS_ORIGINS = ['http://localhost:5173', 'http://localhost:3000']
+    # Ленивая загрузка маршрутов и схем (см. create_app)
+    LAZY_LOADING = os.environ.get('LAZY_LOADING') == '1'
+    # Роль процесса (web, scheduler, worker) и пулы соединений ролей. Задачи планировщика
+    # в веб-процессе получают свой пул, чтобы не отнимать соединения у запросов
+    APP_ROLE = os.environ.get('APP_ROLE', 'web')
+    DB_POOL_ROLES = {
+        'web': dict(pool_size=10, max_overflow=10, pool_timeout=5),
+        'scheduler': dict(pool_size=2, max_overflow=3, pool_timeout=30),
+        'worker': dict(pool_size=4, max_overflow=4, pool_timeout=30),
+    }
+    DB_POOL_PRE_PING = True
+    DB_POOL_RECYCLE = 1800
+    # Реплика только для чтения (необязательно): маршруты с @read_replica читают с неё,
+    # клиент после записи READ_REPLICA_STICKY_SECONDS секунд читает из основной базы
+    SQLALCHEMY_REPLICA_URI = os.environ.get('DATABASE_REPLICA_URL')
+    READ_REPLICA_STICKY_SECONDS = 5
+    # Общий предел тела запроса; маршруты с загрузкой файлов задают свой (upload_limit)
+    MAX_CONTENT_LENGTH = 1024 * 1024
+    # Передача отдачи файлов веб-серверу: None (отдаёт приложение), 'x-accel-redirect' (nginx)
+    # или 'x-sendfile' (Apache/lighttpd). Для nginx STATIC_OFFLOAD_PREFIX — internal location,
+    # указывающий на каталог app/ (внутри него static/ и media/)
+    STATIC_OFFLOAD = os.environ.get('STATIC_OFFLOAD') or None
+    STATIC_OFFLOAD_PREFIX = os.environ.get('STATIC_OFFLOAD_PREFIX', '/_internal')
+    # Удалять этапы и матчи завершённого турнира из рабочих таблиц после архивации
+    # (страницы турнира отдаются из архива; призовая таблица остаётся для профилей).
+    # Пересчёт достижений (award-achievements) не видит матчи таких турниров
+    ARCHIVE_PRUNE_LIVE_TABLES = os.environ.get('ARCHIVE_PRUNE_LIVE_TABLES') == '1'
+    # Расписание матчей: длительность слота по формату (минуты) и отдых участника по умолчанию.
+    # Для форматов не из списка слот равен SCHEDULE_MAP_MINUTES на карту
+    SCHEDULE_SLOT_MINUTES = {'bo1': 45, 'bo2': 90, 'bo3': 135, 'bo5': 225}
+    SCHEDULE_MAP_MINUTES = 45
+    SCHEDULE_REST_MINUTES = 10
@@ -0,0 +1,14 @@
+import os
+from .base import BaseConfig
+from datetime import timedelta
+
+
+class TestConfig(BaseConfig):
+    TESTING = True
+    # SQLite в памяти по умолчанию; TEST_DATABASE_URL — для прогона на PostgreSQL
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL', 'sqlite://')
+    JWT_BLACKLIST_ENABLED = True
+    JWT_BLACKLIST_TOKEN_CHECKS = ["access", "refresh"]
+    JWT_SECRET_KEY = 'test-secret-key-of-at-least-32-bytes'
+    JWT_TOKEN_LOCATION = ['headers']
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=30)
@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+
+# Роли процессов/потоков с собственными настройками пула (см. DB_POOL_ROLES в конфиге):
+# web — обработчики запросов, scheduler — задачи APScheduler, worker — фоновые процессы
+ROLES = ('web', 'scheduler', 'worker')
+# Ожидание соединения дольше этого порога считается ожиданием и пишется в лог
+SLOW_CHECKOUT_SECONDS = 0.1
+# Сколько последних ожиданий хранится для перцентилей
+RECENT_WAITS = 1000
+# Не чаще одного предупреждения об ожидании в лог за этот интервал
+WARNING_INTERVAL_SECONDS = 10
+
+# Роль текущего потока выполнения: её пул используется вместо пула процесса
+_role = ContextVar('db_pool_role', default=None)
+
+
+@contextmanager
+def use_role(role):
+    """Выполняет блок на соединениях пула роли role (если для неё настроен отдельный пул)."""
+    token = _role.set(role)
+    try:
+        yield
+    finally:
+        _role.reset(token)
+
+
+def current_role():
+    return _role.get()
+
+
+class PoolStats:
+    """Счётчики выдачи соединений одного пула."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.slow_checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.recent_waits = deque(maxlen=RECENT_WAITS)
+
+    def record(self, wait, timed_out=False):
+        with self.lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            if wait >= SLOW_CHECKOUT_SECONDS:
+                self.slow_checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.recent_waits.append(wait)
+
+    def snapshot(self):
+        with self.lock:
+            waits = sorted(self.recent_waits)
+            total = self.checkouts + self.timeouts
+            return {
+                'checkouts': self.checkouts,
+                'slow_checkouts': self.slow_checkouts,
+                'timeouts': self.timeouts,
+                'avg_wait_ms': round(self.total_wait / total * 1000, 3) if total else 0.0,
+                'p95_wait_ms': round(waits[int(len(waits) * 0.95) - 1] * 1000, 3) if waits else 0.0,
+                'max_wait_ms': round(self.max_wait * 1000, 3),
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool, измеряющий время ожидания свободного соединения."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+        self._warned_at = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record(time.perf_counter() - started, timed_out=True)
+            print(f"[DB pool] Нет свободных соединений: size={self.size()}, overflow={self.overflow()}")
+            raise
+        wait = time.perf_counter() - started
+        self.stats.record(wait)
+        if wait >= SLOW_CHECKOUT_SECONDS and time.monotonic() - self._warned_at > WARNING_INTERVAL_SECONDS:
+            self._warned_at = time.monotonic()
+            print(f"[DB pool] Ожидание соединения {wait * 1000:.0f} мс: "
+                  f"занято {self.checkedout()}, overflow {self.overflow()}")
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def engine_options(config, role):
+    """Параметры create_engine для пула роли: размер, overflow, таймаут, pre-ping, recycle."""
+    options = {
+        'poolclass': InstrumentedQueuePool,
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+    }
+    options.update(config['DB_POOL_ROLES'][role])
+    return options
+
+
+def pool_metrics(pool):
+    """Текущее состояние пула: размер, занятые соединения, overflow и счётчики ожиданий."""
+    metrics = {'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        metrics.update(size=pool.size(), in_use=pool.checkedout(),
+                       idle=pool.checkedin(), overflow=max(pool.overflow(), 0))
+    stats = getattr(pool, 'stats', None)
+    if stats is not None:
+        metrics.update(stats.snapshot())
+    return metrics
+
+
+def configure_pools(app):
+    """Настраивает пулы соединений по роли процесса (APP_ROLE).
+
+    Основной движок получает пул роли процесса. В веб-процессе задачи планировщика
+    работают через отдельный пул 'scheduler' той же базы, чтобы запуск турнира не занимал
+    соединения обработчиков запросов. Для SQLite пул не настраивается.
+    """
+    role = app.config['APP_ROLE']
+    if role not in ROLES:
+        raise ValueError(f"Неизвестная роль процесса: {role}")
+
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if make_url(uri).get_backend_name() == 'sqlite':
+        return
+
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **engine_options(app.config, role),
+        **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}),
+    }
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    for key, bind in binds.items():
+        if isinstance(bind, str):
+            binds[key] = {'url': bind, **engine_options(app.config, role)}
+    if role == 'web':
+        binds['scheduler'] = {'url': uri, **engine_options(app.config, 'scheduler')}
+    app.config['SQLALCHEMY_BINDS'] = binds
@@ -1,11 +1,19 @@
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_marshmallow import Marshmallow
+from app.replicas import RoutingSession
 
-db = SQLAlchemy()
-migrate = Migrate()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 cors = CORS()
 jwt = JWTManager()
 ma = Marshmallow()
+
+
+def __getattr__(name):
+    # Flask-Migrate (вместе с Alembic) импортируется только при обращении к migrate
+    if name == 'migrate':
+        from flask_migrate import Migrate
+        globals()['migrate'] = Migrate()
+        return globals()['migrate']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,4 +3,6 @@ from .game_models import *
 from .team_models import *
 from .match_models import *
 from .tournament_models import *
-from .relations import *
\ No newline at end of file
+from .relations import *
+from .media_models import *
+from .notification_models import *
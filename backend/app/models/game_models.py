@@ -13,6 +13,8 @@ class Game(db.Model):
     logo_path = db.Column(db.String(256), nullable=False, unique=True)
     service_name = db.Column(db.String(32), nullable=False)
     type = db.Column(db.String(8))  # solo/team
+    # Пул карт для пиков/банов (список названий в порядке отображения)
+    map_pool = db.Column(db.JSON, nullable=True)
     tournaments = db.relationship(
         'Tournament', back_populates='game', lazy='selectin')
     achievements = db.relationship(
@@ -28,6 +30,10 @@ class Achievement(db.Model):
 
     title = db.Column(db.String(64), nullable=False, unique=True)
     description = db.Column(db.String(256))
+    # Правило автоматической выдачи (match_wins/tournament_wins/podium_streak), NULL — выдаётся вручную
+    rule = db.Column(db.String(32), nullable=True)
+    # Порог правила: число побед или длина серии (по умолчанию 1)
+    threshold = db.Column(db.Integer, nullable=True)
 
     game_id = db.Column(UUID(as_uuid=True), db.ForeignKey(
         'games.id'), nullable=False)
@@ -1,10 +1,15 @@
 from app.extensions import db
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
 import uuid
 
 
 class Match(db.Model):
     __tablename__ = 'matches'
+    __table_args__ = (
+        # Победы участников (правила достижений): сначала фильтр по победителю
+        db.Index('ix_matches_winner_status', 'winner_id', 'status'),
+    )
 
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     type = db.Column(db.String(16), nullable=False)  # solo/team
@@ -13,6 +18,10 @@ class Match(db.Model):
     status = db.Column(db.String(16), nullable=False)
     number = db.Column(db.String(4))
     scheduled_time = db.Column(db.DateTime)
+    # Момент завершения или отмены (UTC), по нему расписание считает фактический конец матча
+    completed_at = db.Column(db.DateTime, nullable=True)
+    # Площадка (станция/сервер) по расписанию, с 1
+    station = db.Column(db.Integer, nullable=True)
     is_playoff = db.Column(db.Boolean, default=False, nullable=False)
 
     participant1_id = db.Column(UUID(as_uuid=True), nullable=True)
@@ -26,7 +35,7 @@ class Match(db.Model):
     tournament = db.relationship('Tournament', back_populates='matches')
 
     group_id = db.Column(UUID(as_uuid=True),
-                         db.ForeignKey('groups.id'), nullable=True)
+                         db.ForeignKey('groups.id', ondelete='CASCADE'), nullable=True)
     group = db.relationship('Group', back_populates='matches')
 
     playoff_match_id = db.Column(UUID(as_uuid=True), db.ForeignKey(
@@ -34,8 +43,17 @@ class Match(db.Model):
     playoff_match = db.relationship(
         'PlayoffStageMatch', back_populates='match', uselist=False)
 
-    maps = db.relationship('Map', back_populates='match',
-                           lazy='selectin', cascade='all, delete-orphan')
+    # Пики/баны карт: {"pool": [названия], "log": "B3p0..."} — по 2 символа на шаг:
+    # буква действия (B/P — первый участник, b/p — второй) и индекс карты в пуле (base36)
+    veto = db.Column(db.JSON, nullable=True)
+
+    maps = db.relationship('Map', back_populates='match', order_by='Map.number',
+                           lazy='selectin', cascade='all, delete-orphan', passive_deletes=True)
+
+    # Оптимистическая блокировка: каждый UPDATE проверяет версию (compare-and-swap)
+    version = db.Column(db.Integer, nullable=False, default=1)
+
+    __mapper_args__ = {'version_id_col': version}
 
 
 class PlayoffStageMatch(db.Model):
@@ -68,7 +86,8 @@ class PlayoffStageMatch(db.Model):
     playoff_stage = db.relationship(
         'PlayoffStage', back_populates='playoff_matches')
     match = db.relationship(
-        'Match', back_populates='playoff_match', uselist=False, cascade='all, delete-orphan')
+        'Match', back_populates='playoff_match', uselist=False, cascade='all, delete-orphan',
+        passive_deletes=True)
 
 
 class Map(db.Model):
@@ -77,8 +96,35 @@ class Map(db.Model):
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
     external_url = db.Column(db.String(128), nullable=True)
+    # Порядковый номер карты в матче (с 1) и её название после пиков/банов
+    number = db.Column(db.Integer, nullable=True)
+    name = db.Column(db.String(64), nullable=True)
     winner_id = db.Column(UUID(as_uuid=True), nullable=True)
 
     match_id = db.Column(UUID(as_uuid=True), db.ForeignKey(
         'matches.id', ondelete='CASCADE'), nullable=False)
     match = db.relationship('Match', back_populates='maps')
+
+
+class IdempotencyKey(db.Model):
+    __tablename__ = 'idempotency_keys'
+
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    key = db.Column(db.String(128), nullable=False)
+    endpoint = db.Column(db.String(256), nullable=False)
+
+    # SHA-256 тела запроса: повтор ключа с другим телом отклоняется
+    request_hash = db.Column(db.String(64), nullable=True)
+
+    # Сохранённый ответ, который возвращается при повторе запроса
+    # (NULL, пока запрос, занявший ключ, ещё выполняется)
+    status_code = db.Column(db.Integer, nullable=True)
+    response = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=func.now())
+
+    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey(
+        'users.id', ondelete='CASCADE'), nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'key', name='uq_idempotency_user_key'),
+    )
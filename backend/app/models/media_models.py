@@ -0,0 +1,17 @@
+from app.extensions import db
+from sqlalchemy.sql import func
+
+
+class ImageBlob(db.Model):
+    __tablename__ = 'image_blobs'
+
+    # sha256 от профиля обработки и содержимого загруженного файла
+    hash = db.Column(db.String(64), primary_key=True)
+    ext = db.Column(db.String(8), nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    # Количество ссылок (аватары, логотипы, баннеры); при 0 файлы удаляет сборщик
+    refcount = db.Column(db.Integer, nullable=False, default=0)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=func.now())
+    updated_at = db.Column(db.DateTime, nullable=False,
+                           default=func.now(), onupdate=func.now())
@@ -0,0 +1,47 @@
+from app.extensions import db
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+import uuid
+
+
+class Notification(db.Model):
+    __tablename__ = 'notifications'
+    __table_args__ = (
+        # Лента пользователя (новые сверху) и выборка непрочитанных
+        db.Index('ix_notifications_user_created', 'user_id', 'created_at'),
+        db.Index('ix_notifications_user_unread', 'user_id', 'is_read'),
+    )
+
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Получатель
+    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey(
+        'users.id', ondelete='CASCADE'), nullable=False)
+    # friend_request, friend_accepted, team_invite, team_invite_accepted
+    type = db.Column(db.String(32), nullable=False)
+    # Кто вызвал уведомление (отправитель заявки, принявший приглашение)
+    actor_id = db.Column(UUID(as_uuid=True), db.ForeignKey(
+        'users.id', ondelete='CASCADE'), nullable=True)
+    # Заявка, к которой относится уведомление (заявки в друзья удаляются после ответа)
+    request_id = db.Column(UUID(as_uuid=True), db.ForeignKey(
+        'user_requests.id', ondelete='SET NULL'), nullable=True, index=True)
+    team_id = db.Column(UUID(as_uuid=True), db.ForeignKey(
+        'teams.id', ondelete='CASCADE'), nullable=True)
+
+    is_read = db.Column(db.Boolean, nullable=False, default=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=func.now())
+
+    actor = db.relationship('User', foreign_keys=[actor_id])
+    team = db.relationship('Team', foreign_keys=[team_id])
+
+
+class NotificationCounter(db.Model):
+    """Денормализованные счётчики для значка уведомлений (чтение по первичному ключу)."""
+    __tablename__ = 'notification_counters'
+
+    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey(
+        'users.id', ondelete='CASCADE'), primary_key=True)
+    unread = db.Column(db.Integer, nullable=False, default=0)
+    pending_friend_requests = db.Column(db.Integer, nullable=False, default=0)
+    pending_team_invites = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False,
+                           default=func.now(), onupdate=func.now())
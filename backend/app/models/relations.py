@@ -8,20 +8,22 @@ user_achievements = db.Table(
     db.Column('achievement_id', UUID(as_uuid=True),
               db.ForeignKey('achievements.id')),
     db.Column('unlocked_at', db.DateTime,
-              nullable=False, default=datetime.now(UTC))
+              nullable=False, default=lambda: datetime.now(UTC)),
+    # Повторная выдача отсекается ограничением, а не проверкой коллекции пользователя
+    db.UniqueConstraint('user_id', 'achievement_id', name='uq_user_achievement')
 )
 
 tournament_participants = db.Table(
     'tournament_participants',
     db.Column('tournament_id', UUID(as_uuid=True),
-              db.ForeignKey('tournaments.id')),
+              db.ForeignKey('tournaments.id', ondelete='CASCADE')),
     db.Column('user_id', UUID(as_uuid=True), db.ForeignKey('users.id'))
 )
 
 tournament_teams = db.Table(
     'tournament_teams',
     db.Column('tournament_id', UUID(as_uuid=True),
-              db.ForeignKey('tournaments.id')),
+              db.ForeignKey('tournaments.id', ondelete='CASCADE')),
     db.Column('team_id', UUID(as_uuid=True), db.ForeignKey('teams.id'))
 )
 
@@ -33,18 +35,21 @@ tournament_teams = db.Table(
 
 group_users = db.Table(
     'group_users',
-    db.Column('group_id', UUID(as_uuid=True), db.ForeignKey('groups.id')),
+    db.Column('group_id', UUID(as_uuid=True), db.ForeignKey('groups.id', ondelete='CASCADE')),
     db.Column('user_id', UUID(as_uuid=True), db.ForeignKey('users.id'))
 )
 
 group_teams = db.Table(
     'group_teams',
-    db.Column('group_id', UUID(as_uuid=True), db.ForeignKey('groups.id')),
+    db.Column('group_id', UUID(as_uuid=True), db.ForeignKey('groups.id', ondelete='CASCADE')),
     db.Column('team_id', UUID(as_uuid=True), db.ForeignKey('teams.id'))
 )
 
 team_members = db.Table(
     'team_members',
     db.Column('team_id', UUID(as_uuid=True), db.ForeignKey('teams.id')),
-    db.Column('user_id', UUID(as_uuid=True), db.ForeignKey('users.id'))
+    db.Column('user_id', UUID(as_uuid=True), db.ForeignKey('users.id')),
+    # Участники команды и команды пользователя
+    db.Index('ix_team_members_team', 'team_id'),
+    db.Index('ix_team_members_user', 'user_id')
 )
@@ -22,30 +22,45 @@ class Tournament(db.Model):
     description = db.Column(db.Text)
     contact = db.Column(db.String(32))
     highlight_url = db.Column(db.String(256))
+    # Количество незавершённых матчей (scheduled/ongoing)
+    open_matches = db.Column(db.Integer, nullable=False, default=0)
+    # Номер последнего события турнира в журнале (см. TournamentEvent)
+    event_seq = db.Column(db.Integer, nullable=False, default=0)
+    # Расписание матчей (см. schedule_service): число площадок (станций/серверов) и отдых
+    # участника между матчами в минутах; None — расписание не ведётся
+    schedule_stations = db.Column(db.Integer, nullable=True)
+    schedule_rest_minutes = db.Column(db.Integer, nullable=True)
 
     game_id = db.Column(UUID(as_uuid=True), db.ForeignKey(
         'games.id'), nullable=False)
     game = db.relationship('Game', back_populates='tournaments')
 
     group_stage = db.relationship(
-        'GroupStage', back_populates='tournament', uselist=False, cascade='all, delete-orphan')
+        'GroupStage', back_populates='tournament', uselist=False, cascade='all, delete-orphan',
+        passive_deletes=True)
 
     playoff_stage = db.relationship(
-        'PlayoffStage', back_populates='tournament', uselist=False, cascade='all, delete-orphan')
+        'PlayoffStage', back_populates='tournament', uselist=False, cascade='all, delete-orphan',
+        passive_deletes=True)
 
     prize_table = db.relationship(
-        'PrizeTable', back_populates='tournament', uselist=False, cascade='all, delete-orphan')
+        'PrizeTable', back_populates='tournament', uselist=False, cascade='all, delete-orphan',
+        passive_deletes=True)
 
     creator_id = db.Column(
         UUID(as_uuid=True), db.ForeignKey('users.id'), nullable=False)
     creator = db.relationship('User', back_populates='created_tournaments')
 
+    # passive_deletes: удаление турнира выполняют каскады БД (ON DELETE CASCADE),
+    # ORM не загружает коллекции перед удалением
     participants = db.relationship(
-        'User', secondary='tournament_participants', back_populates='participated_tournaments')
+        'User', secondary='tournament_participants', back_populates='participated_tournaments',
+        passive_deletes=True)
     teams = db.relationship(
-        'Team', secondary='tournament_teams', back_populates='participated_tournaments')
+        'Team', secondary='tournament_teams', back_populates='participated_tournaments',
+        passive_deletes=True)
     matches = db.relationship(
-        'Match', back_populates='tournament', cascade='all, delete-orphan')
+        'Match', back_populates='tournament', cascade='all, delete-orphan', passive_deletes=True)
 
 
 class GroupStage(db.Model):
@@ -59,9 +74,10 @@ class GroupStage(db.Model):
         'Tournament', back_populates='group_stage', uselist=False)
 
     groups = db.relationship(
-        'Group', back_populates='group_stage', cascade='all, delete-orphan')
+        'Group', back_populates='group_stage', cascade='all, delete-orphan', passive_deletes=True)
 
     winners_bracket_qualified = db.Column(db.Integer, nullable=False)
+    open_matches = db.Column(db.Integer, nullable=False, default=0)
 
 
 class Group(db.Model):
@@ -71,19 +87,22 @@ class Group(db.Model):
 
     letter = db.Column(db.String(4), nullable=False)
     max_participants = db.Column(db.Integer, nullable=False)
+    open_matches = db.Column(db.Integer, nullable=False, default=0)
 
     groupstage_id = db.Column(UUID(as_uuid=True), db.ForeignKey(
         'group_stages.id', ondelete='CASCADE'), nullable=False)
     group_stage = db.relationship('GroupStage', back_populates='groups')
 
     participants = db.relationship(
-        'User', secondary='group_users', back_populates='groups', lazy='selectin')
+        'User', secondary='group_users', back_populates='groups', lazy='selectin',
+        passive_deletes=True)
     teams = db.relationship('Team', secondary='group_teams',
-                            back_populates='groups', lazy='selectin')
+                            back_populates='groups', lazy='selectin', passive_deletes=True)
     matches = db.relationship(
-        'Match', back_populates='group', lazy='selectin', cascade='all, delete-orphan')
+        'Match', back_populates='group', lazy='selectin', cascade='all, delete-orphan',
+        passive_deletes=True)
     rows = db.relationship('GroupRow', back_populates='group',
-                           lazy='selectin', cascade='all, delete-orphan')
+                           lazy='selectin', cascade='all, delete-orphan', passive_deletes=True)
 
 
 class GroupRow(db.Model):
@@ -120,7 +139,8 @@ class PlayoffStage(db.Model):
         'Tournament', back_populates='playoff_stage', uselist=False)
 
     playoff_matches = db.relationship(
-        'PlayoffStageMatch', back_populates='playoff_stage', lazy='selectin', cascade='all, delete-orphan')
+        'PlayoffStageMatch', back_populates='playoff_stage', lazy='selectin', cascade='all, delete-orphan',
+        passive_deletes=True)
 
 
 class PrizeTable(db.Model):
@@ -134,7 +154,11 @@ class PrizeTable(db.Model):
         'Tournament', back_populates='prize_table', uselist=False)
 
     rows = db.relationship('PrizeTableRow', back_populates='prize_table',
-                           lazy='selectin', cascade='all, delete-orphan')
+                           lazy='selectin', cascade='all, delete-orphan', passive_deletes=True)
+    # Доли призового фонда по местам в процентах, с 1-го (см. prize_service.prize_shares)
+    shares = db.Column(db.JSON, nullable=True)
+    # Участники, поделившие место (проигравшие в полуфинале), делят призы этих мест поровну
+    split_ties = db.Column(db.Boolean, nullable=False, default=True)
     # Что здесь добавить???
 
 
@@ -159,17 +183,50 @@ class PrizeTableRow(db.Model):
     team = db.relationship('Team', back_populates='prizetable_rows')
 
 
+class TournamentEvent(db.Model):
+    """Запись журнала событий турнира (только добавление; проекции строятся по журналу)."""
+    __tablename__ = 'tournament_events'
+
+    tournament_id = db.Column(UUID(as_uuid=True), db.ForeignKey(
+        'tournaments.id', ondelete='CASCADE'), primary_key=True)
+    # Порядковый номер в пределах турнира (выдаётся из Tournament.event_seq)
+    seq = db.Column(db.Integer, primary_key=True)
+    # registered, unregistered, started, seeded, map_completed, match_completed,
+    # advanced, completed, reset
+    type = db.Column(db.String(32), nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    created_at = db.Column(db.DateTime, nullable=False, default=func.now())
+
+
+class TournamentArchive(db.Model):
+    """Снимок завершённого турнира: все представления страницы турнира в одном сжатом JSON."""
+    __tablename__ = 'tournament_archives'
+
+    tournament_id = db.Column(UUID(as_uuid=True), db.ForeignKey(
+        'tournaments.id', ondelete='CASCADE'), primary_key=True)
+    # Версия формата снимка (см. archive_service.SNAPSHOT_VERSION)
+    version = db.Column(db.Integer, nullable=False)
+    # JSON, сжатый zlib
+    data = db.Column(db.LargeBinary, nullable=False)
+    # Этапы и матчи удалены из рабочих таблиц
+    pruned = db.Column(db.Boolean, nullable=False, default=False)
+    # Пустая структура турнира (tournament_structure.template_to_json) для сброса после удаления
+    template = db.Column(db.JSON, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=func.now())
+
+
 class ScheduledTournament(db.Model):
     __tablename__ = 'scheduled_tournaments'
 
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     tournament_id = db.Column(UUID(as_uuid=True), db.ForeignKey(
-        'tournaments.id'), nullable=False, unique=True)
+        'tournaments.id', ondelete='CASCADE'), nullable=False, unique=True)
     start_time = db.Column(db.DateTime, nullable=False)
     job_id = db.Column(db.String(256), unique=True)  # ID задания в scheduler
 
     tournament = db.relationship(
-        'Tournament', backref=db.backref('scheduled', uselist=False))
+        'Tournament', backref=db.backref('scheduled', uselist=False, cascade='all, delete-orphan',
+                                         passive_deletes=True))
 
     def __repr__(self):
         return f'<ScheduledTournament tournament_id={self.tournament_id} start_time={self.start_time}>'
@@ -5,10 +5,13 @@ import uuid
 from sqlalchemy.sql import func
 
 
+# Дружба хранится в обе стороны; составной первичный ключ исключает дубли и служит индексом
+# для проверки ребра (user_id, friend_id), индекс по friend_id — для обратных связей
 mutual_friend_association = db.Table(
     'mutual_friend_association',
-    db.Column('user_id', UUID(as_uuid=True), db.ForeignKey('users.id')),
-    db.Column('friend_id', UUID(as_uuid=True), db.ForeignKey('users.id'))
+    db.Column('user_id', UUID(as_uuid=True), db.ForeignKey('users.id'), primary_key=True),
+    db.Column('friend_id', UUID(as_uuid=True), db.ForeignKey('users.id'), primary_key=True,
+              index=True)
 )
 
 
@@ -123,6 +126,11 @@ class SupportToken(db.Model):
 
 class UserRequest(db.Model):
     __tablename__ = 'user_requests'
+    __table_args__ = (
+        # Поиск заявок между парой пользователей (статус дружбы, входящие заявки)
+        db.Index('ix_user_requests_pair', 'from_user_id', 'to_user_id', 'type'),
+        db.Index('ix_user_requests_to_user', 'to_user_id', 'type', 'status'),
+    )
 
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     from_user_id = db.Column(
@@ -0,0 +1,136 @@
+import math
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from itsdangerous import BadSignature, Signer
+from sqlalchemy import event
+from sqlalchemy.sql import Select
+
+from app.db_pools import current_role
+
+
+# Ключ реплики в SQLALCHEMY_BINDS (задаётся через SQLALCHEMY_REPLICA_URI)
+REPLICA_BIND = 'replica'
+# Момент (time.time()), до которого чтения клиента идут в основную базу, хранится у клиента:
+# в подписанной cookie и в одноимённом заголовке ответа (его можно вернуть заголовком запроса),
+# поэтому окно действует для всех процессов приложения
+STICKY_COOKIE = 'db_primary_until'
+STICKY_HEADER = 'X-DB-Primary-Until'
+
+
+class RoutingSession(Session):
+    """Сессия, отправляющая чтения на реплику, если маршрут это разрешил (см. read_replica).
+
+    На реплику уходят только обычные SELECT к основной базе: запросы с FOR UPDATE, запись
+    и всё, что выполняется после первой записи в этой сессии, идут в основную базу.
+    Обращения к основной базе из потока с ролью (см. db_pools.use_role) идут через пул
+    этой роли, если он настроен.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        engines = self._db.engines
+        if bind is not None or engine is not engines[None]:
+            return engine
+        if (self.info.get('use_replica') and not self._flushing
+                and isinstance(clause, Select) and clause._for_update_arg is None
+                and REPLICA_BIND in engines):
+            return engines[REPLICA_BIND]
+        return engines.get(current_role(), engine)
+
+
+def _mark_write(session):
+    session.info['use_replica'] = False
+    session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _after_flush(session, flush_context):
+    _mark_write(session)
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _on_execute(orm_execute_state):
+    # UPDATE/DELETE/INSERT через session.execute() идут мимо flush
+    if not orm_execute_state.is_select:
+        _mark_write(orm_execute_state.session)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _after_commit(session):
+    if session.info.pop('wrote', False) and has_request_context():
+        stick_to_primary()
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('wrote', None)
+
+
+def _signer():
+    return Signer(current_app.config['JWT_SECRET_KEY'], salt='read-replica-sticky')
+
+
+def stick_to_primary():
+    """Направляет чтения текущего клиента в основную базу на READ_REPLICA_STICKY_SECONDS.
+
+    Вызывается автоматически после коммита с записью, чтобы клиент сразу видел свои изменения,
+    пока они доезжают до реплики. Окно передаётся клиенту в ответе (см. _send_sticky).
+    """
+    if REPLICA_BIND not in current_app.config.get('SQLALCHEMY_BINDS', {}):
+        return
+    g.db_primary_until = time.time() + current_app.config['READ_REPLICA_STICKY_SECONDS']
+
+
+def _send_sticky(response):
+    until = g.pop('db_primary_until', None)
+    if until is None:
+        return response
+    token = _signer().sign(f'{until:.3f}').decode()
+    response.set_cookie(STICKY_COOKIE, token, max_age=math.ceil(current_app.config['READ_REPLICA_STICKY_SECONDS']),
+                        httponly=True, samesite='Lax', secure=request.is_secure)
+    response.headers[STICKY_HEADER] = token
+    return response
+
+
+def _is_sticky():
+    token = request.cookies.get(STICKY_COOKIE) or request.headers.get(STICKY_HEADER)
+    if not token:
+        return False
+    try:
+        until = float(_signer().unsign(token))
+    except (BadSignature, ValueError):
+        return False
+    now = time.time()
+    # Окно не длиннее настроенного, даже если секрет подписи сменился не сразу на всех процессах
+    return now < until <= now + current_app.config['READ_REPLICA_STICKY_SECONDS']
+
+
+def init_app(app):
+    """Подключает передачу окна чтения из основной базы в ответах приложения."""
+    app.after_request(_send_sticky)
+
+
+def read_replica(view):
+    """Разрешает маршруту читать с реплики (если она настроена).
+
+    Клиент, недавно что-то записавший, продолжает читать из основной базы (см.
+    stick_to_primary); если маршрут сам что-то записывает, дальнейшие чтения этого запроса
+    тоже идут в основную базу.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        sqlalchemy = current_app.extensions['sqlalchemy']
+        if REPLICA_BIND not in sqlalchemy.engines or _is_sticky():
+            return view(*args, **kwargs)
+
+        session = sqlalchemy.session
+        session.info['use_replica'] = True
+        try:
+            return view(*args, **kwargs)
+        finally:
+            session.info.pop('use_replica', None)
+
+    return wrapper
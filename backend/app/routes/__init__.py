@@ -1,16 +1,64 @@
-from .auth_routes import auth_bp
-from .user_routes import user_bp
-# from .match_routes import match_bp
-from .tournament_routes import tournament_bp
-from .game_routes import game_bp
-# from .admin_routes import admin_bp
-# from .common_routes import common_bp
-from .team_routes import team_bp
+import importlib
+import threading
+
+from flask import jsonify
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+
+# Модули маршрутов и их blueprint'ы, в порядке регистрации
+BLUEPRINTS = (
+    ('auth_routes', 'auth_bp'),
+    ('user_routes', 'user_bp'),
+    # ('match_routes', 'match_bp'),
+    ('tournament_routes', 'tournament_bp'),
+    ('game_routes', 'game_bp'),
+    # ('admin_routes', 'admin_bp'),
+    # ('common_routes', 'common_bp'),
+    ('team_routes', 'team_bp'),
+    ('media_routes', 'media_bp'),
+    ('media_routes', 'assets_bp'),
+    ('metrics_routes', 'metrics_bp'),
+)
 
 
 def register_routes(app):
-    app.register_blueprint(auth_bp)
-    app.register_blueprint(user_bp)
-    app.register_blueprint(tournament_bp)
-    app.register_blueprint(game_bp)
-    app.register_blueprint(team_bp)
+    for module_name, blueprint_name in BLUEPRINTS:
+        module = importlib.import_module(f'{__name__}.{module_name}')
+        app.register_blueprint(getattr(module, blueprint_name))
+    app.register_error_handler(RequestEntityTooLarge, upload_error)
+    app.register_error_handler(UnsupportedMediaType, upload_error)
+
+
+def register_routes_lazily(app):
+    """Откладывает импорт маршрутов (а с ними сервисов и схем) до первого запроса.
+
+    Модули маршрутов импортируются и регистрируются перед обработкой первого запроса,
+    поэтому процесс, который запросов не обслуживает (тесты сервисов, фоновые задачи),
+    их вообще не загружает.
+    """
+    app.wsgi_app = _LazyRoutes(app, app.wsgi_app)
+
+
+class _LazyRoutes:
+    """WSGI-обёртка, регистрирующая маршруты при первом запросе."""
+
+    def __init__(self, app, wsgi_app):
+        self.app = app
+        self.wsgi_app = wsgi_app
+        self.loaded = False
+        self.lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        if not self.loaded:
+            with self.lock:
+                if not self.loaded:
+                    register_routes(self.app)
+                    self.loaded = True
+        return self.wsgi_app(environ, start_response)
+
+
+def upload_error(e):
+    """Ошибки приёма загрузок (размер, формат) в формате остальных ответов API."""
+    msg = e.description
+    if isinstance(e, RequestEntityTooLarge) and msg == RequestEntityTooLarge.description:
+        msg = 'Слишком большой запрос'
+    return jsonify({'msg': msg}), e.code
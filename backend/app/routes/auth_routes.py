@@ -10,6 +10,7 @@ from flask_jwt_extended import (
 from datetime import timedelta, datetime, UTC
 
 from app.extensions import db, jwt
+from app.uploads import upload_limit
 from app.models import User, TokenBlocklist
 from app.services.user_service import create_user, update_user, save_image
 from app.schemas import UserSchema  # Import the UserSchema
@@ -18,6 +19,7 @@ auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
 
 @auth_bp.route('/register', methods=['POST'])
+@upload_limit()
 def register():
     name = request.form.get('name')
     email = request.form.get('email')
@@ -27,18 +29,18 @@ def register():
     if not name or not email or not password:
         return jsonify({'msg': 'Заполните все поля'}), 400
 
-    avatar_url = save_image(
-        avatar_file, 'avatar') if avatar_file else "/static/avatars/default.png"
+    try:
+        avatar_url = save_image(
+            avatar_file, 'avatar') if avatar_file else "/static/avatars/default.png"
+    except ValueError as e:
+        return jsonify({'msg': str(e)}), 400
 
     try:
         user = create_user(name=name, email=email,
                            password=password, avatar=avatar_url)
         user.is_online = True
-        if avatar_file:
-            new_avatar_url = save_image(avatar_file, 'avatar', user_id=user.id)
-            user.avatar = new_avatar_url
-            db.session.commit()
     except IntegrityError:
+        # Откат отменяет и ссылку на аватар, файл удалит сборщик неиспользуемых изображений
         db.session.rollback()
         return jsonify({'msg': 'Пользователь с таким именем или email уже существует'}), 409
 
@@ -1,38 +1,31 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
 from sqlalchemy.exc import IntegrityError
 from uuid import UUID
 
 from app.extensions import db
-from app.models import User
 from app.services.game_service import (
-    get_all_games, get_game, create_game, delete_game,
-    create_achievement, assign_achievement_to_user, get_user_achievements
+    get_game_catalog, get_game, create_game, delete_game,
+    create_achievement, assign_achievement_to_user, get_user_achievements, set_map_pool
 )
 from app.schemas import GameSchema, AchievementSchema, UserSchema
+from app.replicas import read_replica
+from app.routes.permissions import is_admin_user
 
 game_bp = Blueprint('game', __name__, url_prefix='/api/games')
 
 
-def is_admin_user():
-    """Check if the current user is an admin."""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user or not user.is_admin:
-        return jsonify({'msg': 'Требуются права администратора'}), 403
-    return None
-
-
 @game_bp.route('/', methods=['GET', 'OPTIONS'])
+@read_replica
 def get_games():
-    """Retrieve all games."""
+    """Retrieve all games (pre-serialized catalog, 304 if the ETag matches)."""
     if request.method == 'OPTIONS':
         return '', 204
-    games = get_all_games()
-    game_schema = GameSchema(many=True, only=(
-        'id', 'title', 'image_path', 'logo_path', 'service_name'))
-    print(game_schema.dump(games))
-    return game_schema.dump(games), 200
+    catalog = get_game_catalog()
+    response = current_app.response_class(catalog.body, mimetype='application/json')
+    response.set_etag(catalog.etag)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 
 @game_bp.route('/', methods=['POST'])
@@ -69,6 +62,7 @@ def add_game():
 
 
 @game_bp.route('/<uuid:game_id>', methods=['GET', 'OPTIONS'])
+@read_replica
 def get_game_route(game_id: UUID):
     """Retrieve a specific game by ID."""
     if request.method == 'OPTIONS':
@@ -93,6 +87,22 @@ def delete_game_route(game_id: UUID):
         return jsonify({'msg': str(e)}), 400
 
 
+@game_bp.route('/<uuid:game_id>/maps', methods=['PUT'])
+@jwt_required()
+def set_map_pool_route(game_id: UUID):
+    """Replace the map pool of a game (admin-only)."""
+    admin_check = is_admin_user()
+    if admin_check:
+        return admin_check
+
+    data = request.get_json(silent=True) or {}
+    try:
+        game = set_map_pool(game_id, data.get('maps'))
+        return {'msg': 'Пул карт обновлён', 'maps': game.map_pool or []}, 200
+    except ValueError as e:
+        return jsonify({'msg': str(e)}), 400
+
+
 @game_bp.route('/<uuid:game_id>/achievements', methods=['POST'])
 @jwt_required()
 def add_achievement(game_id: UUID):
@@ -105,21 +115,25 @@ def add_achievement(game_id: UUID):
     title = data.get('title')
     description = data.get('description')
     image_path = data.get('image_path')
+    rule = data.get('rule')
+    threshold = data.get('threshold')
 
     try:
         achievement = create_achievement(
             game_id=game_id,
             title=title,
             description=description,
-            image_path=image_path
+            image_path=image_path,
+            rule=rule,
+            threshold=int(threshold) if threshold is not None else None
         )
         achievement_schema = AchievementSchema(
-            only=('id', 'title', 'description', 'image_path', 'game_id'))
+            only=('id', 'title', 'description', 'image_path', 'game_id', 'rule', 'threshold'))
         return {
             'msg': 'Достижение успешно создано',
             'achievement': achievement_schema.dump(achievement)
         }, 201
-    except ValueError as e:
+    except (TypeError, ValueError) as e:
         return jsonify({'msg': str(e)}), 400
     except IntegrityError:
         return jsonify({'msg': 'Достижение с таким названием уже существует для этой игры'}), 409
@@ -152,6 +166,7 @@ def assign_achievement(achievement_id: UUID):
 
 
 @game_bp.route('/users/<uuid:user_id>/achievements', methods=['GET'])
+@read_replica
 def get_user_achievements_route(user_id: UUID):
     """Retrieve all achievements for a user."""
     try:
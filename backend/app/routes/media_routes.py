@@ -0,0 +1,34 @@
+from flask import Blueprint, jsonify
+
+from app.services.asset_service import send_asset, send_offloaded_file
+from app.services.image_service import resolve_media_file
+
+
+media_bp = Blueprint('media', __name__, url_prefix='/media')
+assets_bp = Blueprint('assets', __name__, url_prefix='/assets')
+
+
+@media_bp.route('/<path:filename>', methods=['GET'])
+def get_media(filename):
+    """Отдаёт изображение из хранилища по содержимому.
+
+    Готовые файлы отдаются с Cache-Control: immutable и сильным ETag (имя файла содержит
+    хэш содержимого); файлы, ещё ожидающие обработки, — без долгого кэширования.
+    """
+    resolved = resolve_media_file(filename)
+    if not resolved:
+        return jsonify({'msg': 'Файл не найден'}), 404
+
+    path, immutable = resolved
+    if not immutable:
+        return send_offloaded_file(path)
+    return send_offloaded_file(path, etag=filename, immutable=True)
+
+
+@assets_bp.route('/<path:hashed>', methods=['GET'])
+def get_asset(hashed):
+    """Отдаёт статический файл по неизменяемому пути из манифеста (см. asset_url)."""
+    response = send_asset(hashed)
+    if response is None:
+        return jsonify({'msg': 'Файл не найден'}), 404
+    return response
@@ -0,0 +1,22 @@
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required
+
+from app.extensions import db
+from app.db_pools import pool_metrics
+from app.routes.permissions import is_admin_user
+
+metrics_bp = Blueprint('metrics', __name__, url_prefix='/api/metrics')
+
+
+@metrics_bp.route('/db-pool', methods=['GET'])
+@jwt_required()
+def get_db_pool_metrics():
+    """Состояние пулов соединений: занятые соединения, overflow, ожидание выдачи соединения."""
+    auth_check = is_admin_user()
+    if auth_check:
+        return auth_check
+
+    return jsonify({
+        (key or 'default'): pool_metrics(engine.pool)
+        for key, engine in db.engines.items()
+    }), 200
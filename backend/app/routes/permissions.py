@@ -0,0 +1,15 @@
+from uuid import UUID
+
+from flask import jsonify
+from flask_jwt_extended import get_jwt_identity
+
+from app.extensions import db
+from app.models import User
+
+
+def is_admin_user():
+    """Check if the current user is an admin."""
+    user = db.session.get(User, UUID(get_jwt_identity()))
+    if not user or not user.is_admin:
+        return jsonify({'msg': 'Требуются права администратора'}), 403
+    return None
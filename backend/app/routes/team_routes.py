@@ -7,11 +7,13 @@ from app.models import Team, User
 from app.models.user_models import UserRequest
 from app.services.team_service import (
     create_team, update_team, delete_team, get_team, get_teams, get_team_members,
-    invite_user_to_team, accept_team_invite, decline_team_invite, leave_team,
+    invite_user_to_team, accept_team_invite, decline_team_invite, withdraw_team_invite, leave_team,
     kick_member, get_user_team_invites
 )
 from app.schemas import TeamSchema, UserRequestSchema, UserSchema
 from app.services.user_service import save_image
+from app.uploads import upload_limit
+from app.replicas import read_replica
 
 team_bp = Blueprint('team_bp', __name__, url_prefix='/api/teams')
 
@@ -34,6 +36,7 @@ def is_team_leader_or_admin(team_id: UUID):
 
 
 @team_bp.route('/', methods=['POST', 'OPTIONS'])
+@upload_limit()
 def create_team_route():
     """Create a new team."""
     if request.method == 'OPTIONS':
@@ -62,8 +65,7 @@ def create_team_route():
         logo_path = None
         if logo_file:
             try:
-                logo_path = save_image(
-                    logo_file, 'team_logo', user_id=user_id_uuid)
+                logo_path = save_image(logo_file, 'team_logo')
             except ValueError as e:
                 return jsonify({'msg': str(e)}), 400
 
@@ -90,6 +92,7 @@ def create_team_route():
 
 
 @team_bp.route('/', methods=['GET', 'OPTIONS'])
+@read_replica
 def get_teams_route():
     """Get a paginated list of all teams."""
     if request.method == 'OPTIONS':
@@ -110,6 +113,7 @@ def get_teams_route():
 
 
 @team_bp.route('/<uuid:team_id>', methods=['GET'])
+@read_replica
 def get_team_route(team_id: UUID):
     """Get details of a specific team."""
     try:
@@ -227,6 +231,20 @@ def decline_invite_route(request_id: UUID):
         return jsonify({'msg': str(e)}), 400
 
 
+@team_bp.route('/invites/<uuid:request_id>', methods=['DELETE'])
+@jwt_required()
+def withdraw_invite_route(request_id: UUID):
+    """Withdraw a team invitation."""
+    try:
+        withdraw_team_invite(request_id)
+        db.session.commit()
+        return jsonify({'msg': 'Приглашение отозвано'}), 200
+    except ValueError as e:
+        return jsonify({'msg': str(e)}), 400
+    except PermissionError as e:
+        return jsonify({'msg': str(e)}), 403
+
+
 @team_bp.route('/<uuid:team_id>/leave', methods=['POST'])
 @jwt_required()
 def leave_team_route(team_id: UUID):
@@ -265,6 +283,7 @@ def kick_member_route(team_id: UUID):
 
 
 @team_bp.route('/<uuid:team_id>/members', methods=['GET'])
+@read_replica
 def get_team_members_route(team_id: UUID):
     """Get the list of team members."""
     try:
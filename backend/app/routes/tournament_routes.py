@@ -1,24 +1,30 @@
+import hashlib
 import json
+from functools import wraps
 from urllib.parse import urlparse
 
-from pytz import UTC
 from app.models import Tournament, Team, User, db
 from flask import request, jsonify
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, make_response
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from uuid import UUID
 from datetime import datetime
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 from app.extensions import db
-from app.models import Tournament, User, Game, ScheduledTournament
+from app.models import Tournament, User, Game
 from app.models.team_models import Team
 from app.services.tournament_service import (
     complete_map, complete_match, complete_tournament, get_tournaments_by_game, get_tournaments_by_participant,
     get_tournaments_by_creator, get_tournament, get_tournament_group_stage,
     get_tournament_playoff_stage, get_tournament_prize_table,
     get_group_stage_matches, get_playoff_stage_matches, get_all_tournament_matches,
-    get_match, create_match, register_for_tournament, reset_tournament, start_match, start_tournament, unregister_for_tournament, update_match_results, create_tournament
+    get_match, create_match, register_for_tournament, reset_tournament, delete_tournament, start_match, start_round, start_tournament, unregister_for_tournament, update_match_results, create_tournament
 )
+from app.services.match_service import (
+    get_idempotent_response, claim_idempotency_key, store_idempotent_response, apply_bulk_results
+)
+from app.services.unit_of_work import run_deferred, unit_of_work
 from app.schemas import (
     TournamentSchema, GroupStageSchema, PlayoffStageSchema, PrizeTableSchema,
     MatchSchema, MapSchema
@@ -27,6 +33,18 @@ from app.schemas import (
 import traceback
 
 from app.services.user_service import get_user_profile, save_image
+from app.uploads import upload_limit
+from app.replicas import read_replica
+from app.services.tournament_feed import DEFAULT_PAGE_SIZE, get_feed, get_nearest_tournaments
+from app.services.event_store import get_events
+from app.services.tournament_projections import get_projection
+from app.services.schedule_service import get_station_timeline, schedule_tournament
+from app.services.map_veto import apply_veto, get_veto, veto_side
+from app.services.friend_graph import get_friendship_statuses
+from app.services.archive_service import (
+    load_snapshot, update_archived_tournament, TOURNAMENT_FIELDS, GROUP_STAGE_FIELDS, PLAYOFF_STAGE_FIELDS,
+    PRIZE_TABLE_FIELDS, MATCH_LIST_FIELDS, GROUP_MATCH_FIELDS, PLAYOFF_MATCH_FIELDS, MATCH_DETAIL_FIELDS
+)
 
 tournament_bp = Blueprint('tournament', __name__,
                           url_prefix='/api/tournaments')
@@ -50,10 +68,34 @@ def is_valid_url(url: str) -> bool:
         return False
 
 
+def archived_response(data, not_found_msg: str):
+    """Ответ из архивного снимка турнира (404, если в снимке нет этого представления)."""
+    if data is None:
+        return jsonify({'msg': not_found_msg}), 404
+    return jsonify(data), 200
+
+
+def with_friendship_statuses(participant_lists: list):
+    """Добавляет к участникам статус дружбы с текущим пользователем (один запрос на все списки).
+
+    Списки (участники турнира, участники групп) берутся из живых данных или архивного снимка
+    и не изменяются: возвращаются копии. Без авторизации списки возвращаются как есть.
+    """
+    current_user_id = get_jwt_identity()
+    if not current_user_id:
+        return participant_lists
+    ids = [UUID(participant['id']) for participants in participant_lists for participant in participants]
+    statuses = get_friendship_statuses(UUID(current_user_id), ids)
+    return [
+        [{**participant, 'friendship_status': statuses[UUID(participant['id'])]} for participant in participants]
+        for participants in participant_lists
+    ]
+
+
 def is_tournament_creator_or_admin(tournament_id: UUID):
     """Check if the current user is the tournament creator or an admin."""
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = User.query.get(UUID(user_id))
     tournament = Tournament.query.get(tournament_id)
     if not user or not tournament:
         return jsonify({'msg': 'Пользователь или турнир не найден'}), 404
@@ -62,8 +104,89 @@ def is_tournament_creator_or_admin(tournament_id: UUID):
     return None
 
 
+def get_expected_version(data: dict | None):
+    """Возвращает версию матча, которую видел клиент (заголовок If-Match или поле version)."""
+    version = request.headers.get('If-Match')
+    if version is None and data:
+        version = data.get('version')
+    if version is None:
+        return None
+    try:
+        return int(str(version).strip('"'))
+    except ValueError:
+        raise ValueError('Некорректный формат версии матча')
+
+
+class _DiscardResponse(Exception):
+    """Ответ с ошибкой: изменения запроса и занятый ключ откатываются."""
+
+    def __init__(self, response):
+        self.response = response
+
+
+def idempotent(view):
+    """
+    Повтор запроса с тем же заголовком Idempotency-Key возвращает сохранённый ответ
+    без повторной записи в базу.
+
+    Ключ занимается в начале запроса в той же транзакции, что и сама запись: уникальное
+    ограничение упорядочивает параллельные запросы с одним ключом, а ключ и изменения
+    фиксируются одним коммитом. Тот же ключ с другим телом запроса отклоняется (422).
+    Ответ возвращается только после коммита: ошибки отложенных шагов и самого коммита
+    откатывают запрос вместе с ключом и превращаются в ответ с ошибкой (409/422/500).
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > 128:
+            return jsonify({'msg': 'Idempotency-Key слишком длинный'}), 400
+
+        user_id = UUID(get_jwt_identity())
+        request_hash = hashlib.sha256(request.get_data()).hexdigest()
+        stored = get_idempotent_response(user_id, key)
+        if not stored:
+            try:
+                with unit_of_work():
+                    stored, claimed = claim_idempotency_key(user_id, key, request.path, request_hash)
+                    if claimed:
+                        response = make_response(view(*args, **kwargs))
+                        # Сохраняем только успешные ответы: ошибку клиент может повторить
+                        if not 200 <= response.status_code < 300:
+                            raise _DiscardResponse(response)
+                        # Отложенные шаги запроса выполняются до сохранения ответа:
+                        # их ошибка откатывает запрос вместе с ключом
+                        run_deferred()
+                        store_idempotent_response(
+                            stored, response.status_code, response.get_data(as_text=True))
+                # Единица работы зафиксирована вместе с сохранённым ответом
+                if claimed:
+                    return response
+            except _DiscardResponse as discarded:
+                return discarded.response
+            except StaleDataError:
+                return jsonify({"msg": "Match was modified concurrently, reload and retry"}), 409
+            except ValueError as e:
+                return jsonify({"msg": str(e)}), 422
+            except IntegrityError:
+                return jsonify({"msg": "Database error"}), 500
+
+        if stored.endpoint != request.path or (stored.request_hash and stored.request_hash != request_hash):
+            return jsonify({'msg': 'Idempotency-Key уже использован для другого запроса'}), 422
+        if stored.status_code is None:
+            return jsonify({'msg': 'Запрос с этим Idempotency-Key ещё выполняется'}), 409
+        replay = make_response(stored.response, stored.status_code)
+        replay.mimetype = 'application/json'
+        replay.headers['Idempotent-Replayed'] = 'true'
+        return replay
+
+    return wrapper
+
+
 @tournament_bp.route('/', methods=['POST', 'OPTIONS'])
 @jwt_required()
+@upload_limit()
 def create_new_tournament():
     """Create a new tournament by calling create_tournament function."""
     if request.method == 'OPTIONS':
@@ -141,6 +264,13 @@ def create_new_tournament():
     if status not in ['open', 'active', 'completed', 'cancelled']:
         return jsonify({'msg': 'Недопустимый статус турнира'}), 400
 
+    try:
+        prize_options = json.loads(data.get('prize_options') or '{}')
+        if not isinstance(prize_options, dict):
+            raise ValueError
+    except ValueError:
+        return jsonify({'msg': 'Некорректные параметры распределения призов'}), 400
+
     try:
         tournament = create_tournament(
             title=data['title'],
@@ -158,7 +288,10 @@ def create_new_tournament():
             max_participants_per_group=max_participants_per_group,
             playoff_participants_count_per_group=playoff_participants_count_per_group,
             format_=data['format_'],
-            final_format_=data['final_format_']
+            final_format_=data['final_format_'],
+            prize_distribution=data.get('prize_distribution') or 'top3',
+            prize_options=prize_options,
+            split_prize_ties=data.get('split_prize_ties', 'true').lower() == 'true'
         )
     except ValueError as e:
         return jsonify({'msg': str(e)}), 400
@@ -202,19 +335,20 @@ def add_highlight(tournament_id: UUID):
         if not is_valid_url(url):
             return jsonify({'msg': 'Недействительная или запрещённая ссылка.'}), 400
 
-        tournament.highlight_url = url
-        db.session.add(tournament)
-        db.session.commit()
+        with unit_of_work():
+            tournament.highlight_url = url
+            # Завершённый турнир читается из снимка, поэтому ссылка попадает и в него
+            update_archived_tournament(tournament.id, highlight_url=url)
         return jsonify({'msg': 'Ссылка успешно добавлена.'}), 200
 
     except IntegrityError:
-        db.session.rollback()
         return jsonify({'msg': 'Ошибка базы данных. Попробуйте позже.'}), 500
     except ValueError as e:
         return jsonify({'msg': str(e)}), 400
 
 
 @tournament_bp.route('/game/<uuid:game_id>', methods=['GET'])
+@read_replica
 def get_tournaments_by_game_route(game_id: UUID):
     """Retrieve all tournaments for a specific game."""
     try:
@@ -230,35 +364,39 @@ def get_tournaments_by_game_route(game_id: UUID):
 
 
 @tournament_bp.route('/nearest', methods=['GET'])
-def get_nearest_tournaments():
+@read_replica
+def get_nearest_tournaments_route():
     """Retrieve 4 nearest upcoming tournaments."""
     try:
-        tournaments = Tournament.query.filter(
-            Tournament.start_time > datetime.now(UTC)
-        ).order_by(Tournament.start_time.asc()).limit(4).all()
-        print(tournaments)
-
-        tournament_schema = TournamentSchema(
-            many=True,
-            only=('id', 'title', 'start_time', 'banner_url', 'prize_fund')
-        )
-        response = tournament_schema.dump(tournaments)
-
-        # Обрабатываем banner_url
-        for tournament in response:
-            tournament['banner_url'] = (
-                'static/tournaments/default.png'
-                if not tournament['banner_url']
-                else tournament['banner_url']
-            )
-
-        return jsonify({'data': response}), 200
+        return jsonify({'data': get_nearest_tournaments()}), 200
     except Exception:
         return jsonify({'msg': 'Ошибка при получении турниров'}), 500
 
 
+@tournament_bp.route('/feed', methods=['GET'])
+@read_replica
+def get_tournament_feed():
+    """Retrieve a page of open/ongoing tournaments ordered by start time.
+
+    Query params: game_id, status, upcoming (1 - only not yet started), limit, offset.
+    """
+    try:
+        game_id = request.args.get('game_id')
+        tournaments = get_feed(
+            game_id=UUID(game_id) if game_id else None,
+            status=request.args.get('status'),
+            upcoming=request.args.get('upcoming') == '1',
+            limit=request.args.get('limit', DEFAULT_PAGE_SIZE, type=int),
+            offset=request.args.get('offset', 0, type=int),
+        )
+        return jsonify({'data': tournaments}), 200
+    except ValueError as e:
+        return jsonify({'msg': str(e)}), 400
+
+
 @tournament_bp.route('/participant/me', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_participant_tournaments():
     """Retrieve all tournaments where the authenticated user is a participant."""
     user_id = get_jwt_identity()
@@ -276,6 +414,7 @@ def get_participant_tournaments():
 
 @tournament_bp.route('/creator/me', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_creator_tournaments():
     """Retrieve all tournaments created by the authenticated user."""
     user_id = get_jwt_identity()
@@ -292,6 +431,7 @@ def get_creator_tournaments():
 
 
 @tournament_bp.route('/creator/<uuid:user_id>', methods=['GET'])
+@read_replica
 def get_user_created_tournaments(user_id):
     """Retrieve all tournaments created by a specific user."""
     try:
@@ -307,113 +447,191 @@ def get_user_created_tournaments(user_id):
 
 
 @tournament_bp.route('/<uuid:tournament_id>', methods=['GET'])
+@jwt_required(optional=True)
+@read_replica
 def get_tournament_route(tournament_id: UUID):
     """Retrieve detailed information about a single tournament."""
-    try:
-        tournament = get_tournament(tournament_id)
-        tournament_schema = TournamentSchema(
-            only=(
-                'id', 'title', 'game.title', 'creator', 'start_time',
-                'max_players', 'type', 'prize_fund', 'banner_url', 'status', 'description', 'contact', 'highlight_url', 'participants', 'teams', 'group_stage.id', 'playoff_stage.id'
-            )
-        )
-        return tournament_schema.dump(tournament), 200
-    except ValueError:
-        return jsonify({'msg': 'Турнир не найден'}), 404
+    snapshot = load_snapshot(tournament_id)
+    if snapshot:
+        data = snapshot['tournament']
+    else:
+        try:
+            data = TournamentSchema(only=TOURNAMENT_FIELDS).dump(get_tournament(tournament_id))
+        except ValueError:
+            return jsonify({'msg': 'Турнир не найден'}), 404
+    # Статусы дружбы зависят от зрителя, поэтому в снимок не входят
+    participants, = with_friendship_statuses([data.get('participants') or []])
+    return {**data, 'participants': participants}, 200
 
 
 @tournament_bp.route('/<uuid:tournament_id>/group-stage', methods=['GET'])
+@jwt_required(optional=True)
+@read_replica
 def get_tournament_group_stage_route(tournament_id: UUID):
     """Retrieve the group stage of a tournament."""
-    group_stage = get_tournament_group_stage(tournament_id)
-    if not group_stage:
+    snapshot = load_snapshot(tournament_id)
+    if snapshot:
+        data = snapshot['group_stage']
+    else:
+        group_stage = get_tournament_group_stage(tournament_id)
+        data = group_stage and GroupStageSchema(only=GROUP_STAGE_FIELDS).dump(group_stage)
+    if not data:
         return jsonify({'msg': 'Групповой этап не найден'}), 404
-    group_stage_schema = GroupStageSchema(
-        only=('id', 'groups', 'tournament_id'))
-    return group_stage_schema.dump(group_stage), 200
+    groups = data.get('groups') or []
+    participants = with_friendship_statuses([group.get('participants') or [] for group in groups])
+    return {**data, 'groups': [{**group, 'participants': group_participants}
+                               for group, group_participants in zip(groups, participants)]}, 200
 
 
 @tournament_bp.route('/<uuid:tournament_id>/playoff-stage', methods=['GET'])
+@read_replica
 def get_tournament_playoff_stage_route(tournament_id: UUID):
     """Retrieve the playoff stage of a tournament."""
+    snapshot = load_snapshot(tournament_id)
+    if snapshot:
+        return archived_response(snapshot['playoff_stage'], 'Этап плей-офф не найден')
     playoff_stage = get_tournament_playoff_stage(tournament_id)
     if not playoff_stage:
         return jsonify({'msg': 'Этап плей-офф не найден'}), 404
-    playoff_stage_schema = PlayoffStageSchema(
-        only=('id', 'playoff_matches', 'tournament_id'))
+    playoff_stage_schema = PlayoffStageSchema(only=PLAYOFF_STAGE_FIELDS)
     return playoff_stage_schema.dump(playoff_stage), 200
 
 
 @tournament_bp.route('/<uuid:tournament_id>/prize-table', methods=['GET'])
+@read_replica
 def get_tournament_prize_table_route(tournament_id: UUID):
     """Retrieve the prize table of a tournament."""
+    snapshot = load_snapshot(tournament_id)
+    if snapshot:
+        return archived_response(snapshot['prize_table'], 'Призовая таблица не найдена')
     prize_table = get_tournament_prize_table(tournament_id)
     if not prize_table:
         return jsonify({'msg': 'Призовая таблица не найдена'}), 404
-    prize_table_schema = PrizeTableSchema(only=('id', 'rows', 'tournament_id'))
+    prize_table_schema = PrizeTableSchema(only=PRIZE_TABLE_FIELDS)
     return prize_table_schema.dump(prize_table), 200
 
 
+@tournament_bp.route('/<uuid:tournament_id>/events', methods=['GET'])
+@jwt_required()
+@read_replica
+def get_tournament_events_route(tournament_id: UUID):
+    """Retrieve the tournament event log (creator/admin only).
+
+    Query params: after (sequence number of the last seen event), limit (default 100, max 1000).
+    """
+    auth_check = is_tournament_creator_or_admin(tournament_id)
+    if auth_check:
+        return auth_check
+    after = request.args.get('after', 0, type=int)
+    limit = max(1, min(request.args.get('limit', 100, type=int), 1000))
+    events = get_events(tournament_id, after_seq=after, limit=limit)
+    return jsonify([
+        {'seq': seq, 'type': type_, 'payload': payload} for seq, type_, payload in events
+    ]), 200
+
+
+@tournament_bp.route('/<uuid:tournament_id>/projection', methods=['GET'])
+@read_replica
+def get_tournament_projection_route(tournament_id: UUID):
+    """Retrieve standings, bracket and stats built from the tournament event log."""
+    try:
+        get_tournament(tournament_id)
+    except ValueError:
+        return jsonify({'msg': 'Турнир не найден'}), 404
+    return jsonify(get_projection(tournament_id)), 200
+
+
+@tournament_bp.route('/<uuid:tournament_id>/schedule', methods=['POST'])
+@jwt_required()
+def schedule_tournament_route(tournament_id: UUID):
+    """Build the match timetable (creator/admin only).
+
+    Body: stations (number of stations/servers), rest_minutes (optional rest between matches).
+    """
+    auth_check = is_tournament_creator_or_admin(tournament_id)
+    if auth_check:
+        return auth_check
+    data = request.get_json(silent=True) or {}
+    try:
+        stations = data.get('stations')
+        rest_minutes = data.get('rest_minutes')
+        changed = schedule_tournament(
+            tournament_id,
+            stations=int(stations) if stations is not None else None,
+            rest_minutes=int(rest_minutes) if rest_minutes is not None else None
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({'msg': str(e)}), 400
+    return jsonify({'msg': 'Расписание построено', 'changed': changed,
+                    **get_station_timeline(tournament_id)}), 200
+
+
+@tournament_bp.route('/<uuid:tournament_id>/schedule', methods=['GET'])
+@read_replica
+def get_tournament_schedule_route(tournament_id: UUID):
+    """Retrieve the match timetable of a tournament grouped by station."""
+    try:
+        return jsonify(get_station_timeline(tournament_id)), 200
+    except ValueError as e:
+        return jsonify({'msg': str(e)}), 404
+
+
 @tournament_bp.route('/<uuid:tournament_id>/matches', methods=['GET'])
+@read_replica
 def get_all_tournament_matches_route(tournament_id: UUID):
     """Retrieve all matches in a tournament (group and playoff stages)."""
+    snapshot = load_snapshot(tournament_id)
+    if snapshot:
+        return archived_response(snapshot['matches'], 'Турнир не найден')
     matches = get_all_tournament_matches(tournament_id)
-    match_schema = MatchSchema(
-        many=True,
-        only=(
-            'id', 'tournament_id', 'winner_id',
-            'status', 'number', 'type', 'format', 'maps', 'group.letter', 'playoff_match.round_number'
-        )
-    )
+    match_schema = MatchSchema(many=True, only=MATCH_LIST_FIELDS)
     return match_schema.dump(matches), 200
 
 
 @tournament_bp.route('/<uuid:tournament_id>/group-stage/matches', methods=['GET'])
-def get_group_stage_matches(tournament_id: UUID):
+@read_replica
+def get_group_stage_matches_route(tournament_id: UUID):
     """Retrieve all matches in the group stage of a tournament."""
+    snapshot = load_snapshot(tournament_id)
+    if snapshot:
+        return archived_response(snapshot['group_stage_matches'], 'Group stage not found')
     try:
         matches = get_group_stage_matches(tournament_id)
-        match_schema = MatchSchema(
-            many=True,
-            only=(
-                'id', 'tournament_id', 'participant1_id', 'participant2_id', 'winner_id',
-                'status', 'type', 'format', 'maps', 'group.letter'
-            )
-        )
+        match_schema = MatchSchema(many=True, only=GROUP_MATCH_FIELDS)
         return match_schema.dump(matches), 200
     except ValueError as e:
         return jsonify({'msg': str(e)}), 404
 
 
 @tournament_bp.route('/<uuid:tournament_id>/playoff-stage/matches', methods=['GET'])
-def get_playoff_stage_matches(tournament_id: UUID):
+@read_replica
+def get_playoff_stage_matches_route(tournament_id: UUID):
     """Retrieve all matches in the playoff stage of a tournament."""
+    snapshot = load_snapshot(tournament_id)
+    if snapshot:
+        return archived_response(snapshot['playoff_stage_matches'], 'Playoff stage not found')
     try:
         matches = get_playoff_stage_matches(tournament_id)
-        match_schema = MatchSchema(
-            many=True,
-            only=(
-                'id', 'tournament_id', 'participant1_id', 'participant2_id', 'winner_id',
-                'status', 'type', 'format', 'maps', 'playoff_match.round_number'
-            )
-        )
+        match_schema = MatchSchema(many=True, only=PLAYOFF_MATCH_FIELDS)
         return match_schema.dump(matches), 200
     except ValueError as e:
         return jsonify({'msg': str(e)}), 404
 
 
 @tournament_bp.route('/<uuid:tournament_id>/matches/<uuid:match_id>', methods=['GET'])
+@read_replica
 def get_match_route(tournament_id: UUID, match_id: UUID):
     """Retrieve detailed results of a specific match."""
+    snapshot = load_snapshot(tournament_id)
+    if snapshot:
+        return archived_response(snapshot['match_details'].get(str(match_id)), 'Match not found')
     try:
         match = get_match(tournament_id, match_id)
-        match_schema = MatchSchema(
-            only=(
-                'id', 'tournament_id', 'participant1_id', 'participant2_id', 'winner_id',
-                'status', 'type', 'format', 'maps', 'group.letter', 'playoff_match.round_number'
-            )
-        )
-        return match_schema.dump(match), 200
+        match_schema = MatchSchema(only=MATCH_DETAIL_FIELDS)
+        response = jsonify(match_schema.dump(match))
+        # Версия матча для If-Match при отправке результата (см. get_expected_version)
+        response.headers['ETag'] = f'"{match.version}"'
+        return response, 200
     except ValueError as e:
         return jsonify({'msg': str(e)}), 404
 
@@ -656,7 +874,8 @@ def unregister_for_tournament_route(tournament_id: UUID):
 @jwt_required()
 def reset_tournament_route(tournament_id: UUID):
     """
-    Reset a tournament to 'open' status, deleting all stages, matches, and prize table.
+    Reset a tournament to 'open' status, deleting all stages and matches and clearing prize places.
+    The empty stages are recreated unless ?regenerate=0 is passed.
     Only accessible to the tournament creator or admin.
     """
     auth_check = is_tournament_creator_or_admin(tournament_id)
@@ -664,7 +883,8 @@ def reset_tournament_route(tournament_id: UUID):
         return auth_check
 
     try:
-        tournament = reset_tournament(tournament_id)
+        tournament = reset_tournament(
+            tournament_id, regenerate=request.args.get('regenerate', '1') != '0')
         tournament_schema = TournamentSchema(
             only=('id', 'title', 'status', 'participants', 'teams')
         )
@@ -678,36 +898,23 @@ def reset_tournament_route(tournament_id: UUID):
 
 @tournament_bp.route('/<uuid:tournament_id>/delete', methods=['DELETE'])
 @jwt_required()
-def delete_tournament(tournament_id: UUID):
+def delete_tournament_route(tournament_id: UUID):
     auth_check = is_tournament_creator_or_admin(tournament_id)
     if auth_check:
         return auth_check
 
-    tournament = Tournament.query.get(tournament_id)
-    if not tournament:
-        return jsonify({'msg': 'Tournament not found'}), 404
-
-    # Удаление турнира (каскадно удалит связанные данные)
-    scheduled = ScheduledTournament.query.filter_by(
-        tournament_id=tournament_id).first()
-    if scheduled:
-        db.session.delete(scheduled)
-    db.session.delete(tournament)
-
-    # Удаление запланированной задачи
+    # Удаление турнира (связанные данные удаляются каскадно на уровне БД)
     try:
-        from apscheduler_tasks import scheduler
-        scheduler.remove_job(f"tournament_start_{tournament_id}")
-    except:
-        pass
-
-    db.session.commit()
+        delete_tournament(tournament_id)
+    except ValueError as e:
+        return jsonify({'msg': str(e)}), 404
 
     return jsonify({'msg': 'Tournament deleted successfully'}), 200
 
 
 @tournament_bp.route('/<tournament_id>/matches/<match_id>/maps/<map_id>/complete', methods=['POST'])
 @jwt_required()
+@idempotent
 def complete_map_route(tournament_id, match_id, map_id):
     try:
         tournament_id = UUID(tournament_id)
@@ -723,7 +930,8 @@ def complete_map_route(tournament_id, match_id, map_id):
         if winner_id is not None:
             winner_id = UUID(winner_id)
 
-        updated_map = complete_map(tournament_id, match_id, map_id, winner_id)
+        updated_map = complete_map(tournament_id, match_id, map_id, winner_id,
+                                   expected_version=get_expected_version(data))
         updated_match = get_match(tournament_id, match_id)
         participant1 = get_user_profile(updated_match.participant1_id)
         participant2 = get_user_profile(updated_match.participant2_id)
@@ -758,6 +966,8 @@ def complete_map_route(tournament_id, match_id, map_id):
 
         return jsonify(response), 200
 
+    except StaleDataError:
+        return jsonify({"msg": "Match was modified concurrently, reload and retry"}), 409
     except ValueError as e:
         return jsonify({"msg": str(e)}), 422
     except IntegrityError as e:
@@ -768,6 +978,7 @@ def complete_map_route(tournament_id, match_id, map_id):
 
 @tournament_bp.route('/<tournament_id>/matches/<match_id>/complete', methods=['POST'])
 @jwt_required()
+@idempotent
 def complete_match_route(tournament_id, match_id):
     """
     Manually complete a match by setting its winner and status to 'completed' or 'tech_win'.
@@ -778,15 +989,20 @@ def complete_match_route(tournament_id, match_id):
 
     Request Body:
         {
-            "winner_id": "<UUID of the winner (User or Team)>"
+            "winner_id": "<UUID of the winner (User or Team)>",
+            "version": <match version the client read, optional (or If-Match header)>
         }
 
+    Headers:
+        Idempotency-Key: optional; replays with the same key return the stored response.
+
     Returns:
         JSON: Updated match data serialized with MatchSchema.
 
     Raises:
         400: Invalid UUID format or missing winner_id.
         403: User is not authorized to complete the match.
+        409: Match was modified concurrently (version mismatch).
         422: Match cannot be completed (e.g., already completed or invalid winner).
         500: Database or server error.
     """
@@ -809,13 +1025,16 @@ def complete_match_route(tournament_id, match_id):
         if not data or "winner_id" not in data:
             return jsonify({"msg": "winner_id is required"}), 400
         winner_id = UUID(data["winner_id"])
-        updated_match = complete_match(tournament_id, match_id, winner_id)
+        updated_match = complete_match(tournament_id, match_id, winner_id,
+                                       expected_version=get_expected_version(data))
         match_schema = MatchSchema()
         match_data = match_schema.dump(updated_match)
         return jsonify({
             "msg": "Match completed",
             "match": match_data
         }), 200
+    except StaleDataError:
+        return jsonify({"msg": "Match was modified concurrently, reload and retry"}), 409
     except ValueError as e:
         return jsonify({"msg": str(e)}), 422
     except IntegrityError as e:
@@ -824,6 +1043,47 @@ def complete_match_route(tournament_id, match_id):
         return jsonify({"msg": f"Internal server error: {str(e)}"}), 500
 
 
+@tournament_bp.route('/<uuid:tournament_id>/results/bulk', methods=['POST'])
+@jwt_required()
+@idempotent
+def bulk_results_route(tournament_id: UUID):
+    """
+    Apply many match and map results of a tournament in one request (creator/admin only).
+
+    Request Body:
+        {
+            "results": [
+                {"match_id": "<UUID>", "map_id": "<UUID, optional>", "winner_id": "<UUID or null>", "version": <optional>}
+            ]
+        }
+
+    Returns:
+        JSON: Per-result outcomes ('applied' or 'rejected' with a message), in request order.
+    """
+    auth_check = is_tournament_creator_or_admin(tournament_id)
+    if auth_check:
+        return auth_check
+
+    data = request.get_json()
+    if not data or not isinstance(data.get('results'), list):
+        return jsonify({'msg': 'Необходимо передать список results'}), 400
+
+    try:
+        outcomes = apply_bulk_results(tournament_id, data['results'])
+    except ValueError as e:
+        return jsonify({'msg': str(e)}), 400
+    except IntegrityError:
+        return jsonify({'msg': 'Ошибка базы данных'}), 500
+
+    applied = sum(1 for outcome in outcomes if outcome['status'] == 'applied')
+    return jsonify({
+        'msg': 'Результаты обработаны',
+        'applied': applied,
+        'rejected': len(outcomes) - applied,
+        'results': outcomes
+    }), 200
+
+
 @tournament_bp.route('/<tournament_id>/matches/<match_id>/start', methods=['POST'])
 @jwt_required()
 def start_match_route(tournament_id, match_id):
@@ -888,3 +1148,66 @@ def start_match_route(tournament_id, match_id):
         return jsonify({"msg": "Database error"}), 500
     except Exception as e:
         return jsonify({"msg": f"Internal server error: {str(e)}"}), 500
+
+
+@tournament_bp.route('/<uuid:tournament_id>/rounds/<int:round_number>/start', methods=['POST'])
+@jwt_required()
+def start_round_route(tournament_id: UUID, round_number: int):
+    """Start every ready match of a playoff round at once (creator/admin only)."""
+    auth_check = is_tournament_creator_or_admin(tournament_id)
+    if auth_check:
+        return auth_check
+
+    try:
+        match_ids = start_round(tournament_id, round_number)
+    except StaleDataError:
+        return jsonify({'msg': 'Матчи раунда изменились, повторите запрос'}), 409
+    except ValueError as e:
+        return jsonify({'msg': str(e)}), 422
+    return jsonify({
+        'msg': 'Раунд начат',
+        'started': len(match_ids),
+        'match_ids': [str(match_id) for match_id in match_ids]
+    }), 200
+
+
+@tournament_bp.route('/<uuid:tournament_id>/matches/<uuid:match_id>/veto', methods=['GET'])
+@read_replica
+def get_match_veto_route(tournament_id: UUID, match_id: UUID):
+    """Retrieve the map veto of a match (null if the game has no map pool)."""
+    try:
+        return jsonify({'veto': get_veto(tournament_id, match_id)}), 200
+    except ValueError as e:
+        return jsonify({'msg': str(e)}), 404
+
+
+@tournament_bp.route('/<uuid:tournament_id>/matches/<uuid:match_id>/veto', methods=['POST'])
+@jwt_required()
+def veto_map_route(tournament_id: UUID, match_id: UUID):
+    """Ban or pick a map in the veto of a match.
+
+    Body: map (map name), version (optional, or If-Match header); side (1/2) for the creator/admin
+    acting on behalf of a participant.
+    """
+    data = request.get_json(silent=True) or {}
+    if not data.get('map'):
+        return jsonify({'msg': 'Необходимо указать карту'}), 400
+
+    try:
+        match = get_match(tournament_id, match_id)
+        user_id = UUID(get_jwt_identity())
+        side = veto_side(match, user_id)
+        if side is None:
+            auth_check = is_tournament_creator_or_admin(tournament_id)
+            if auth_check:
+                return auth_check
+            side = int(data.get('side', 0))
+            if side not in (1, 2):
+                return jsonify({'msg': 'Необходимо указать сторону (1 или 2)'}), 400
+        state = apply_veto(tournament_id, match_id, side, data['map'],
+                           expected_version=get_expected_version(data))
+    except StaleDataError:
+        return jsonify({'msg': 'Match was modified concurrently, reload and retry'}), 409
+    except (TypeError, ValueError) as e:
+        return jsonify({'msg': str(e)}), 422
+    return jsonify({'msg': 'Карта выбрана', 'veto': state}), 200
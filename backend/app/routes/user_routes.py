@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from uuid import UUID
 import uuid
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select
 from werkzeug.security import check_password_hash, generate_password_hash
 from flask_jwt_extended import (
     create_access_token, create_refresh_token, jwt_required,
@@ -11,11 +12,19 @@ from app.extensions import db
 from app.models import User, Connection, UserRequest, GameAccount
 from app.services.user_service import (
     create_support_ticket, get_user_profile, get_user_tickets, update_user,
-    save_image, delete_image, create_game_account_if_absent, unlink_game_account
+    save_image, delete_image, create_game_account_if_absent, unlink_game_account, delete_user
+)
+from app.services.friend_graph import (
+    add_friendship, remove_friendship, suggest_friends, get_friendship_statuses
+)
+from app.services.notification_service import (
+    on_request_created, on_request_resolved, get_summary, get_notifications, mark_read
 )
 from app.schemas import (
-    UserSchema, UserRequestSchema, GameAccountSchema, SupportTokenSchema
+    UserSchema, UserRequestSchema, GameAccountSchema, SupportTokenSchema, NotificationSchema
 )  # Import necessary schemas
+from app.uploads import upload_limit
+from app.replicas import read_replica
 from datetime import datetime, UTC
 
 user_bp = Blueprint('user', __name__, url_prefix='/api/users')
@@ -26,22 +35,18 @@ user_bp = Blueprint('user', __name__, url_prefix='/api/users')
 @user_bp.route('/<uuid:user_id>', methods=['GET'])
 @jwt_required()
 def get_profile(user_id):
-    user = User.query.get(user_id)
+    fields = ('id', 'name', 'avatar', 'last_online', 'is_online', 'registration_date')
+    # Только поля профиля одной строкой, без загрузки связей пользователя (они selectin)
+    user = db.session.execute(
+        select(*(getattr(User, field) for field in fields)).where(User.id == user_id)
+    ).first()
     current_user_id_uuid = UUID(get_jwt_identity())
-    current_user = User.query.get(current_user_id_uuid)
     if not user:
         return jsonify({'msg': 'Пользователь не найден'}), 404
 
-    friendship_status = 'no'
-    if user in current_user.friends:
-        friendship_status = 'yes'
-    elif UserRequest.query.filter_by(from_user=user, to_user=current_user).first():
-        friendship_status = 'pending'
-    elif UserRequest.query.filter_by(from_user=current_user, to_user=user).first():
-        friendship_status = 'requested'
+    friendship_status = get_friendship_statuses(current_user_id_uuid, [user.id])[user.id]
 
-    user_schema = UserSchema(
-        only=('id', 'name', 'avatar', 'last_online', 'is_online', 'registration_date'))
+    user_schema = UserSchema(only=fields)
     user_data = user_schema.dump(user)
     return jsonify({'user': user_data, 'friendship_status': friendship_status}), 200
 
@@ -62,6 +67,7 @@ def get_my_profile():
 
 @user_bp.route('/me', methods=['PUT'])
 @jwt_required()
+@upload_limit()
 def update_my_profile():
     user_id = get_jwt_identity()
     user = User.query.get(user_id)
@@ -78,7 +84,7 @@ def update_my_profile():
     if avatar_file:
         try:
             delete_image(user.avatar)
-            avatar_url = save_image(avatar_file, 'avatar', user_id=user_id)
+            avatar_url = save_image(avatar_file, 'avatar', entity_id=user_id)
         except ValueError as e:
             return jsonify({'msg': str(e)}), 400
 
@@ -101,14 +107,9 @@ def update_my_profile():
 @jwt_required()
 def delete_my_profile():
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-
-    if not user:
+    if not delete_user(UUID(user_id)):
         return jsonify({'msg': 'Пользователь не найден'}), 404
 
-    db.session.delete(user)
-    db.session.commit()
-
     return {'msg': 'Пользователь успешно удален'}, 200
 
 
@@ -136,6 +137,7 @@ def change_password():
 
 @user_bp.route('/me/avatar', methods=['PATCH'])
 @jwt_required()
+@upload_limit()
 def change_avatar():
     user_id = get_jwt_identity()
     user = User.query.get(user_id)
@@ -179,6 +181,8 @@ def user_ping():
 
 
 @user_bp.route('/search', methods=['GET'])
+@jwt_required(optional=True)
+@read_replica
 def search_user():
     nickname = request.args.get('nickname')
 
@@ -187,8 +191,16 @@ def search_user():
 
     users = User.query.filter(User.name.ilike(f"%{nickname}%")).all()
 
-    user_schema = UserSchema(many=True, only=('id', 'name', 'avatar'))
-    return user_schema.dump(users), 200
+    user_schema = UserSchema(many=True, only=('id', 'name', 'avatar', 'avatar_urls'))
+    users_data = user_schema.dump(users)
+
+    # Для авторизованного пользователя — статусы дружбы одним запросом на всю выдачу
+    current_user_id = get_jwt_identity()
+    if current_user_id:
+        statuses = get_friendship_statuses(UUID(current_user_id), [user.id for user in users])
+        for user, user_data in zip(users, users_data):
+            user_data['friendship_status'] = statuses[user.id]
+    return users_data, 200
 
 
 @user_bp.route('/me/friends', methods=['POST'])
@@ -233,6 +245,7 @@ def send_friend_request():
 
     try:
         db.session.add(friend_request)
+        on_request_created(friend_request)
         db.session.commit()
         return jsonify({'msg': 'Заявка на дружбу отправлена'}), 200
     except Exception as e:
@@ -298,18 +311,27 @@ def respond_to_friend_request(user_id):
         return jsonify({'msg': 'Это не ваша заявка'}), 403
 
     if action == 'accept':
-        user = User.query.get(current_user_id)
-        user.friends.append(friend_request.from_user)
-        friend_request.from_user.friends.append(user)
+        on_request_resolved(friend_request, accepted=True)
+        add_friendship(friend_request.from_user_id, friend_request.to_user_id)
         db.session.delete(friend_request)
         db.session.commit()
         return jsonify({'msg': 'Заявка на дружбу принята'}), 200
 
     elif action == 'reject':
+        on_request_resolved(friend_request, accepted=False)
         db.session.delete(friend_request)
         db.session.commit()
         return jsonify({'msg': 'Заявка отклонена'}), 200
 
+    elif action == 'withdraw':
+        # Отозвать заявку может только её отправитель
+        if friend_request.from_user_id != current_user_id:
+            return jsonify({'msg': 'Отозвать можно только свою заявку'}), 403
+        on_request_resolved(friend_request, accepted=False)
+        db.session.delete(friend_request)
+        db.session.commit()
+        return jsonify({'msg': 'Заявка отозвана'}), 200
+
     return jsonify({'msg': 'Неверное действие'}), 400
 
 
@@ -326,6 +348,26 @@ def get_friends():
     return user_schema.dump(user)['friends'], 200
 
 
+@user_bp.route('/me/friends/suggestions', methods=['GET'])
+@jwt_required()
+def get_friend_suggestions():
+    user_id = UUID(get_jwt_identity())
+    try:
+        limit = int(request.args.get('limit', 20))
+        if limit < 1 or limit > 100:
+            raise ValueError
+    except ValueError:
+        return jsonify({'msg': 'limit должен быть числом от 1 до 100'}), 400
+
+    suggestions = suggest_friends(user_id, limit=limit)
+
+    user_schema = UserSchema(only=('id', 'name', 'avatar', 'avatar_urls', 'is_online'))
+    return jsonify([
+        {**user_schema.dump(user), 'mutual_friends': mutual}
+        for user, mutual in suggestions
+    ]), 200
+
+
 @user_bp.route('/<uuid:user_id>/friends', methods=['GET'])
 @jwt_required()
 def get_user_friends(user_id):
@@ -342,18 +384,16 @@ def get_user_friends(user_id):
 @user_bp.route('/me/friends/<uuid:friend_id>', methods=['DELETE'])
 @jwt_required()
 def remove_friend(friend_id):
-    user_id = get_jwt_identity()
+    user_id = UUID(get_jwt_identity())
     user = User.query.get(user_id)
     friend = User.query.get(friend_id)
 
     if not user or not friend:
         return jsonify({'msg': 'Пользователь не найден'}), 404
 
-    if friend not in user.friends:
+    if not remove_friendship(user.id, friend.id):
         return jsonify({'msg': 'Этот пользователь не в списке ваших друзей'}), 400
 
-    user.friends.remove(friend)
-    friend.friends.remove(user)
     db.session.commit()
 
     return {'msg': 'Друг удален'}, 200
@@ -503,3 +543,57 @@ def get_my_tickets():
     return support_token_schema.dump(tickets), 200
 
 # endregion
+
+# region Notifications
+
+
+@user_bp.route('/me/notifications/summary', methods=['GET'])
+@jwt_required()
+def get_notifications_summary():
+    user_id = UUID(get_jwt_identity())
+    return jsonify(get_summary(user_id)), 200
+
+
+@user_bp.route('/me/notifications', methods=['GET'])
+@jwt_required()
+def get_my_notifications():
+    user_id = UUID(get_jwt_identity())
+    try:
+        limit = int(request.args.get('limit', 20))
+        if limit < 1 or limit > 100:
+            raise ValueError
+    except ValueError:
+        return jsonify({'msg': 'limit должен быть числом от 1 до 100'}), 400
+
+    before = request.args.get('before')
+    if before:
+        try:
+            before = datetime.fromisoformat(before)
+        except ValueError:
+            return jsonify({'msg': 'Некорректный формат before'}), 400
+
+    notifications = get_notifications(user_id, limit=limit, before=before or None)
+
+    notification_schema = NotificationSchema(many=True, only=(
+        'id', 'type', 'actor', 'request_id', 'team', 'is_read', 'created_at'))
+    return jsonify(notification_schema.dump(notifications)), 200
+
+
+@user_bp.route('/me/notifications/read', methods=['POST'])
+@jwt_required()
+def read_notifications():
+    user_id = UUID(get_jwt_identity())
+    data = request.get_json(silent=True) or {}
+
+    notification_ids = data.get('ids')
+    if notification_ids is not None:
+        try:
+            notification_ids = [UUID(notification_id) for notification_id in notification_ids]
+        except (TypeError, ValueError, AttributeError):
+            return jsonify({'msg': 'Некорректный список ids'}), 400
+
+    marked = mark_read(user_id, notification_ids)
+    db.session.commit()
+    return jsonify({'msg': 'Уведомления прочитаны', 'marked': marked, **get_summary(user_id)}), 200
+
+# endregion
@@ -0,0 +1,316 @@
+from datetime import datetime, UTC
+from uuid import UUID
+
+from sqlalchemy import Integer, and_, case, cast, exists, func, insert, literal, select, true, union, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.extensions import db
+from app.services.unit_of_work import defer_batch
+from app.models import Achievement, Match, PlayoffStage, PlayoffStageMatch, Tournament, User
+from app.models import team_members, tournament_participants, tournament_teams, user_achievements
+
+
+# name -> function(scope) returning a select of (user_id, achievement_id) pairs that qualify
+_RULES = {}
+
+
+def rule(name: str):
+    """Register an achievement rule: a function of an EvaluationScope returning qualifying pairs."""
+    def register(func):
+        _RULES[name] = func
+        return func
+    return register
+
+
+def rule_names() -> tuple:
+    """Names of the registered rules (values of Achievement.rule)."""
+    return tuple(_RULES)
+
+
+class EvaluationScope:
+    """
+    Restricts an evaluation to some users and games (None means all).
+
+    With participant_ids the users are the players behind those participants (the users
+    themselves and the members of teams), and match rules look only at the matches won by
+    them or by their teams; both sets are subqueries of the evaluating statement.
+    """
+
+    def __init__(self, user_ids=None, game_id: UUID = None, participant_ids=None):
+        self.user_ids = list(user_ids) if user_ids is not None else None
+        self.game_id = game_id
+        self.winner_ids = None
+        if participant_ids is not None:
+            participant_ids = list(participant_ids)
+            players = union(
+                select(User.id).where(User.id.in_(participant_ids)),
+                select(team_members.c.user_id).where(team_members.c.team_id.in_(participant_ids)),
+            ).subquery()
+            self.user_ids = select(players.c.id)
+            self.winner_ids = union(
+                select(players.c.id),
+                select(team_members.c.team_id).where(team_members.c.user_id.in_(select(players.c.id))),
+            )
+
+    def achievements(self, name: str):
+        # Rule achievements the evaluation looks at
+        condition = Achievement.rule == name
+        if self.game_id is not None:
+            condition = and_(condition, Achievement.game_id == self.game_id)
+        return condition
+
+    def users(self, column):
+        return column.in_(self.user_ids) if self.user_ids is not None else true()
+
+    def games(self, column):
+        return column == self.game_id if self.game_id is not None else true()
+
+    def winners(self, column):
+        return column.in_(self.winner_ids) if self.winner_ids is not None else true()
+
+
+def _player_user(participant):
+    # A participant is a user in solo tournaments and a team (all of its members) in team ones
+    return case((Tournament.type == 'team', team_members.c.user_id), else_=participant)
+
+
+def _join_members(query, participant):
+    return query.outerjoin(team_members, and_(Tournament.type == 'team', team_members.c.team_id == participant))
+
+
+def _last_rounds():
+    # Last winners bracket round of every playoff
+    return (
+        select(PlayoffStageMatch.playoff_id, func.max(cast(PlayoffStageMatch.round_number, Integer)).label('last'))
+        .where(PlayoffStageMatch.bracket == 'winner')
+        .group_by(PlayoffStageMatch.playoff_id)
+        .subquery()
+    )
+
+
+def _bracket_matches(rounds_from_end: int):
+    # Matches of completed tournaments in the last rounds_from_end rounds of the winners bracket
+    last = _last_rounds()
+    return (
+        select(Match.tournament_id, Match.participant1_id, Match.participant2_id, Match.winner_id)
+        .join(PlayoffStageMatch, Match.playoff_match_id == PlayoffStageMatch.id)
+        .join(PlayoffStage, PlayoffStageMatch.playoff_id == PlayoffStage.id)
+        .join(last, last.c.playoff_id == PlayoffStage.id)
+        .join(Tournament, Tournament.id == PlayoffStage.tournament_id)
+        .where(
+            Tournament.status == 'completed',
+            PlayoffStageMatch.bracket == 'winner',
+            cast(PlayoffStageMatch.round_number, Integer) > last.c.last - rounds_from_end
+        )
+    )
+
+
+@rule('match_wins')
+def _match_wins(scope: EvaluationScope):
+    # threshold completed match wins in the game (walkovers do not count); the winner filter
+    # (ix_matches_winner_status) narrows the matches before the team members are joined
+    user = _player_user(Match.winner_id)
+    query = select(user.label('user_id'), Achievement.id.label('achievement_id')).select_from(Match)
+    query = _join_members(query.join(Tournament, Tournament.id == Match.tournament_id), Match.winner_id)
+    return (
+        query.join(Achievement, and_(scope.achievements('match_wins'), Achievement.game_id == Tournament.game_id))
+        .where(Match.status == 'completed', Match.winner_id.isnot(None), scope.winners(Match.winner_id),
+               user.isnot(None), scope.users(user))
+        .group_by(user, Achievement.id, Achievement.threshold)
+        .having(func.count(Match.id.distinct()) >= func.coalesce(Achievement.threshold, 1))
+    )
+
+
+@rule('tournament_wins')
+def _tournament_wins(scope: EvaluationScope):
+    # threshold won finals in the game (1 = first tournament win)
+    finals = _bracket_matches(1).subquery()
+    user = _player_user(finals.c.winner_id)
+    query = select(user.label('user_id'), Achievement.id.label('achievement_id')).select_from(finals)
+    query = _join_members(query.join(Tournament, Tournament.id == finals.c.tournament_id), finals.c.winner_id)
+    return (
+        query.join(Achievement, and_(scope.achievements('tournament_wins'), Achievement.game_id == Tournament.game_id))
+        .where(finals.c.winner_id.isnot(None), user.isnot(None), scope.users(user))
+        .group_by(user, Achievement.id, Achievement.threshold)
+        .having(func.count(finals.c.tournament_id.distinct()) >= func.coalesce(Achievement.threshold, 1))
+    )
+
+
+@rule('podium_streak')
+def _podium_streak(scope: EvaluationScope):
+    # threshold consecutive completed tournaments of the game finished in the top 3
+    # (the final and the semifinals; semifinal losers share 3rd place)
+    top = _bracket_matches(2).subquery()
+    podium = union(
+        select(top.c.tournament_id, top.c.participant1_id.label('participant_id')),
+        select(top.c.tournament_id, top.c.participant2_id.label('participant_id')),
+    ).subquery()
+
+    completed = and_(Tournament.status == 'completed', scope.games(Tournament.game_id))
+    played = union_all(
+        select(tournament_participants.c.user_id.label('user_id'),
+               tournament_participants.c.user_id.label('participant_id'),
+               Tournament.id.label('tournament_id'), Tournament.game_id, Tournament.start_time)
+        .join(Tournament, Tournament.id == tournament_participants.c.tournament_id)
+        .where(completed, scope.users(tournament_participants.c.user_id)),
+        select(team_members.c.user_id, tournament_teams.c.team_id,
+               Tournament.id, Tournament.game_id, Tournament.start_time)
+        .join(Tournament, Tournament.id == tournament_teams.c.tournament_id)
+        .join(team_members, team_members.c.team_id == tournament_teams.c.team_id)
+        .where(completed, scope.users(team_members.c.user_id)),
+    ).subquery()
+
+    # Gaps and islands: consecutive podiums of a player in a game share the same difference
+    # between the overall position and the position among podium finishes
+    on_podium = podium.c.tournament_id.isnot(None)
+    flagged = select(
+        played.c.user_id, played.c.game_id, on_podium.label('on_podium'),
+        (func.row_number().over(partition_by=(played.c.user_id, played.c.game_id),
+                                order_by=played.c.start_time)
+         - func.row_number().over(partition_by=(played.c.user_id, played.c.game_id, on_podium),
+                                  order_by=played.c.start_time)).label('island')
+    ).select_from(played).outerjoin(podium, and_(
+        podium.c.tournament_id == played.c.tournament_id, podium.c.participant_id == played.c.participant_id
+    )).subquery()
+    streaks = (
+        select(flagged.c.user_id, flagged.c.game_id, func.count().label('length'))
+        .where(flagged.c.on_podium)
+        .group_by(flagged.c.user_id, flagged.c.game_id, flagged.c.island)
+        .subquery()
+    )
+    return (
+        select(streaks.c.user_id, Achievement.id.label('achievement_id'))
+        .join(Achievement, and_(scope.achievements('podium_streak'), Achievement.game_id == streaks.c.game_id))
+        .group_by(streaks.c.user_id, Achievement.id, Achievement.threshold)
+        .having(func.max(streaks.c.length) >= func.coalesce(Achievement.threshold, 1))
+    )
+
+
+def award(pairs) -> int:
+    """
+    Insert achievement awards in bulk, skipping the ones users already have.
+
+    Args:
+        pairs: A select of (user_id, achievement_id), or a list of such tuples.
+
+    Returns:
+        int: The number of new awards.
+    """
+    if not isinstance(pairs, list):
+        source = pairs.subquery()
+    elif pairs:
+        source = union_all(*(
+            select(literal(user_id).label('user_id'), literal(achievement_id).label('achievement_id'))
+            for user_id, achievement_id in pairs
+        )).subquery()
+    else:
+        return 0
+
+    new = select(source.c.user_id, source.c.achievement_id, literal(datetime.now(UTC).replace(tzinfo=None))).where(
+        ~exists().where(user_achievements.c.user_id == source.c.user_id,
+                        user_achievements.c.achievement_id == source.c.achievement_id)
+    ).distinct()
+    columns = ['user_id', 'achievement_id', 'unlocked_at']
+    if db.session.get_bind().dialect.name == 'postgresql':
+        # A concurrent award of the same pair is skipped by the unique constraint
+        statement = pg_insert(user_achievements).from_select(columns, new).on_conflict_do_nothing(
+            constraint='uq_user_achievement')
+    else:
+        statement = insert(user_achievements).from_select(columns, new)
+    return db.session.execute(statement).rowcount
+
+
+def evaluate_achievements(rules=None, user_ids=None, game_id: UUID = None, participant_ids=None) -> int:
+    """
+    Evaluate achievement rules with one set-based query per rule and award what is earned.
+
+    Args:
+        rules: Rule names to evaluate (all by default).
+        user_ids: Limit the evaluation to these users (all by default).
+        game_id: Limit the evaluation to the achievements of one game.
+        participant_ids: Limit the evaluation to the players behind these match or tournament
+            participants (users or teams) instead of user_ids.
+
+    Returns:
+        int: The number of new awards.
+
+    Raises:
+        ValueError: If a rule is unknown.
+    """
+    names = rules or rule_names()
+    unknown = [name for name in names if name not in _RULES]
+    if unknown:
+        raise ValueError(f"Unknown achievement rules: {', '.join(unknown)}")
+    if (user_ids is not None and not user_ids) or (participant_ids is not None and not participant_ids):
+        return 0
+    scope = EvaluationScope(user_ids, game_id, participant_ids)
+    return sum(award(_RULES[name](scope)) for name in names)
+
+
+def participant_users(participant_ids) -> list:
+    """Users behind match or tournament participants: users themselves and the members of teams."""
+    participant_ids = [participant_id for participant_id in participant_ids if participant_id]
+    if not participant_ids:
+        return []
+    members = db.session.execute(
+        select(team_members.c.user_id).where(team_members.c.team_id.in_(participant_ids))
+    ).scalars().all()
+    return list({*participant_ids, *members})
+
+
+def on_match_completed(match: Match):
+    """Queue the winner of a completed match: the match win rules run once per unit of work."""
+    if match.status != 'completed' or not match.winner_id:
+        return
+    defer_batch(('achievements', 'match_wins'), (match.tournament_id, match.winner_id), award_match_wins)
+
+
+def award_match_wins(winners: list) -> int:
+    """
+    Evaluate the match win rules for the winners of completed matches, one statement per game.
+
+    Games without match win achievements are skipped by the query that looks up the games.
+
+    Args:
+        winners: (tournament id, winner participant id) pairs.
+
+    Returns:
+        int: The number of new awards.
+    """
+    games = dict(db.session.execute(
+        select(Tournament.id, Tournament.game_id).where(
+            Tournament.id.in_({tournament_id for tournament_id, _ in winners}),
+            exists().where(Achievement.rule == 'match_wins', Achievement.game_id == Tournament.game_id)
+        )
+    ).all())
+    by_game = {}
+    for tournament_id, winner_id in winners:
+        if tournament_id in games:
+            by_game.setdefault(games[tournament_id], set()).add(winner_id)
+    return sum(
+        evaluate_achievements(('match_wins',), game_id=game_id, participant_ids=participant_ids)
+        for game_id, participant_ids in by_game.items()
+    )
+
+
+def on_tournament_completed(tournament: Tournament):
+    """Evaluate the tournament rules for every participant of a completed tournament."""
+    if tournament.type == 'team':
+        column, table = tournament_teams.c.team_id, tournament_teams
+    else:
+        column, table = tournament_participants.c.user_id, tournament_participants
+    participant_ids = db.session.execute(
+        select(column).where(table.c.tournament_id == tournament.id)
+    ).scalars().all()
+    evaluate_achievements(('tournament_wins', 'podium_streak'), participant_users(participant_ids), tournament.game_id)
+
+
+def backfill_achievements() -> int:
+    """
+    Evaluate every rule for every user (e.g. after adding a rule achievement) and commit.
+
+    Tournaments archived with pruned live tables have no matches left and are not counted
+    (see archive_service.prune_live_tables).
+    """
+    awarded = evaluate_achievements()
+    db.session.commit()
+    return awarded
@@ -0,0 +1,320 @@
+import json
+import zlib
+from uuid import UUID
+
+from flask import current_app
+from app.extensions import db
+from app.models import Team, Tournament, TournamentArchive, User
+from app.services.tournament_service import (
+    get_all_tournament_matches, get_group_stage_matches, get_playoff_stage_matches,
+    get_tournament, get_tournament_group_stage, get_tournament_playoff_stage,
+    get_tournament_prize_table
+)
+from app.services.tournament_structure import get_template, purge_structure, template_from_json, template_to_json
+
+
+# Bump when the snapshot layout changes and register an upgrade step in _UPGRADES
+SNAPSHOT_VERSION = 3
+
+# Field sets of the tournament read endpoints; live responses and snapshots use the same ones
+TOURNAMENT_FIELDS = (
+    'id', 'title', 'game.title', 'creator', 'start_time',
+    'max_players', 'type', 'prize_fund', 'banner_url', 'status', 'description', 'contact',
+    'highlight_url', 'participants', 'teams', 'group_stage.id', 'playoff_stage.id'
+)
+GROUP_STAGE_FIELDS = ('id', 'groups', 'tournament_id')
+PLAYOFF_STAGE_FIELDS = ('id', 'playoff_matches', 'tournament_id')
+PRIZE_TABLE_FIELDS = ('id', 'rows', 'tournament_id')
+MATCH_LIST_FIELDS = (
+    'id', 'tournament_id', 'winner_id',
+    'status', 'number', 'type', 'format', 'maps', 'group.letter', 'playoff_match.round_number',
+    'version'
+)
+GROUP_MATCH_FIELDS = (
+    'id', 'tournament_id', 'participant1_id', 'participant2_id', 'winner_id',
+    'status', 'type', 'format', 'maps', 'group.letter', 'version'
+)
+PLAYOFF_MATCH_FIELDS = (
+    'id', 'tournament_id', 'participant1_id', 'participant2_id', 'winner_id',
+    'status', 'type', 'format', 'maps', 'playoff_match.round_number', 'version'
+)
+MATCH_DETAIL_FIELDS = (
+    'id', 'tournament_id', 'participant1_id', 'participant2_id', 'winner_id',
+    'status', 'type', 'format', 'maps', 'group.letter', 'playoff_match.round_number',
+    'version'
+)
+
+# Nested references to user and team profiles. Names and images change after a tournament
+# ends (and replaced images are released), so snapshots keep only the id and the set of
+# fields, and load_snapshot joins the current values in
+PROFILE_KEYS = {
+    'creator': User, 'participants': User, 'user': User, 'leader': User, 'players': User,
+    'team': Team, 'teams': Team,
+}
+PROFILE_FIELDS = {
+    User: ('id', 'name', 'avatar', 'avatar_urls'),
+    Team: ('id', 'title', 'logo_path', 'logo_urls'),
+}
+
+# version -> function upgrading a snapshot of that version to the next one
+_UPGRADES = {}
+
+
+def _add_match_versions(snapshot: dict) -> dict:
+    # Version 1 snapshots have no match versions; archived matches cannot be edited anyway
+    for view in ('matches', 'group_stage_matches', 'playoff_stage_matches'):
+        for match in snapshot[view] or ():
+            match.setdefault('version', None)
+    for match in snapshot['match_details'].values():
+        match.setdefault('version', None)
+    return snapshot
+
+
+_UPGRADES[1] = _add_match_versions
+
+
+def _profile_refs(node):
+    # Yields (model, nested dict) for every profile reference in a serialized view
+    if isinstance(node, list):
+        for item in node:
+            yield from _profile_refs(item)
+    elif isinstance(node, dict):
+        for key, value in node.items():
+            model = PROFILE_KEYS.get(key)
+            if model is None:
+                yield from _profile_refs(value)
+            elif isinstance(value, dict):
+                yield model, value
+            elif isinstance(value, list):
+                yield from ((model, item) for item in value if isinstance(item, dict))
+
+
+def _strip_profiles(snapshot: dict) -> dict:
+    for _, ref in _profile_refs(snapshot):
+        for field in ref:
+            if field != 'id':
+                ref[field] = None
+    return snapshot
+
+
+_UPGRADES[2] = _strip_profiles
+
+
+def _join_profiles(snapshot: dict) -> dict:
+    from app.schemas import TeamSchema, UserSchema
+
+    refs = list(_profile_refs(snapshot))
+    current = {}
+    for model, schema in ((User, UserSchema), (Team, TeamSchema)):
+        ids = {UUID(ref['id']) for ref_model, ref in refs if ref_model is model and ref.get('id')}
+        if ids:
+            rows = db.session.scalars(db.select(model).where(model.id.in_(ids)))
+            for item in schema(many=True, only=PROFILE_FIELDS[model]).dump(rows):
+                current[model, item['id']] = item
+    for model, ref in refs:
+        profile = current.get((model, ref.get('id')))
+        if profile:
+            ref.update((field, profile[field]) for field in ref if field in profile)
+    return snapshot
+
+
+def _decode(version: int, data: bytes) -> dict:
+    snapshot = json.loads(zlib.decompress(data))
+    while version < SNAPSHOT_VERSION:
+        snapshot = _UPGRADES[version](snapshot)
+        version += 1
+    return snapshot
+
+
+def _encode(snapshot: dict) -> bytes:
+    return zlib.compress(json.dumps(
+        snapshot, ensure_ascii=False, separators=(',', ':'), default=str).encode(), 9)
+
+
+def build_snapshot(tournament_id: UUID) -> dict:
+    """
+    Serialize every read view of a tournament page.
+
+    Args:
+        tournament_id: The UUID of the tournament.
+
+    Returns:
+        dict: View name -> the JSON the corresponding endpoint returns (None if the stage is absent),
+            with user and team profile fields blanked (see PROFILE_KEYS).
+    """
+    from app.schemas import (
+        TournamentSchema, GroupStageSchema, PlayoffStageSchema, PrizeTableSchema, MatchSchema
+    )
+
+    tournament = get_tournament(tournament_id)
+    group_stage = get_tournament_group_stage(tournament_id)
+    playoff_stage = tournament.playoff_stage and get_tournament_playoff_stage(tournament_id)
+    prize_table = get_tournament_prize_table(tournament_id)
+    matches = get_all_tournament_matches(tournament_id)
+
+    return _strip_profiles({
+        'tournament': TournamentSchema(only=TOURNAMENT_FIELDS).dump(tournament),
+        'group_stage': group_stage and GroupStageSchema(only=GROUP_STAGE_FIELDS).dump(group_stage),
+        'playoff_stage': playoff_stage and PlayoffStageSchema(only=PLAYOFF_STAGE_FIELDS).dump(playoff_stage),
+        'prize_table': prize_table and PrizeTableSchema(only=PRIZE_TABLE_FIELDS).dump(prize_table),
+        'matches': MatchSchema(many=True, only=MATCH_LIST_FIELDS).dump(matches),
+        'group_stage_matches': group_stage and MatchSchema(many=True, only=GROUP_MATCH_FIELDS).dump(
+            get_group_stage_matches(tournament_id)),
+        'playoff_stage_matches': playoff_stage and MatchSchema(many=True, only=PLAYOFF_MATCH_FIELDS).dump(
+            get_playoff_stage_matches(tournament_id)),
+        'match_details': {
+            str(match.id): MatchSchema(only=MATCH_DETAIL_FIELDS).dump(match) for match in matches
+        },
+    })
+
+
+def archive_tournament(tournament_id: UUID, prune: bool = None):
+    """
+    Store a completed tournament as one compressed, versioned snapshot.
+
+    Changes are flushed, not committed; complete_tournament schedules this step right before
+    its unit of work commits. Re-archiving replaces the previous snapshot unless the live
+    tables were already pruned.
+
+    Args:
+        tournament_id: The UUID of the tournament.
+        prune: Delete stages and matches from the live tables afterwards
+            (defaults to ARCHIVE_PRUNE_LIVE_TABLES). The prize table is kept for user profiles;
+            see prune_live_tables for what is lost.
+
+    Returns:
+        TournamentArchive: The stored archive.
+
+    Raises:
+        ValueError: If the tournament is not found or not completed.
+    """
+    tournament = get_tournament(tournament_id)
+    if tournament.status != 'completed':
+        raise ValueError("Only completed tournaments can be archived")
+
+    archive = db.session.get(TournamentArchive, tournament_id)
+    if archive and archive.pruned:
+        return archive
+
+    db.session.flush()
+    data = _encode(build_snapshot(tournament_id))
+    if archive is None:
+        archive = TournamentArchive(tournament_id=tournament_id)
+        db.session.add(archive)
+    archive.version = SNAPSHOT_VERSION
+    archive.data = data
+
+    if prune is None:
+        prune = current_app.config.get('ARCHIVE_PRUNE_LIVE_TABLES', False)
+    if prune:
+        prune_live_tables(tournament, archive)
+        archive.pruned = True
+    db.session.flush()
+    return archive
+
+
+def prune_live_tables(tournament: Tournament, archive: TournamentArchive):
+    """
+    Delete the stages and matches of an archived tournament (groups, rows, maps go via CASCADE).
+
+    The empty structure is stored with the archive first, so a reset can recreate it
+    (see archived_template). The matches are gone for good, though: achievement rules read
+    them, so awards earned in the tournament must be given before pruning (complete_tournament
+    evaluates them before it archives), and a later rule backfill (award-achievements) does
+    not count pruned tournaments. Keep ARCHIVE_PRUNE_LIVE_TABLES off where rules are
+    backfilled.
+
+    Args:
+        tournament: The tournament.
+        archive: Its archive row.
+    """
+    archive.template = template_to_json(get_template(tournament))
+    purge_structure(tournament)
+
+
+def archived_template(tournament_id: UUID):
+    """
+    Structure template stored when the live tables of a tournament were pruned.
+
+    Returns:
+        StructureTemplate: The template, or None if the tournament was not pruned.
+    """
+    data = db.session.scalar(
+        db.select(TournamentArchive.template)
+        .where(TournamentArchive.tournament_id == tournament_id, TournamentArchive.pruned.is_(True))
+    )
+    return template_from_json(data) if data else None
+
+
+def update_archived_tournament(tournament_id: UUID, **fields):
+    """
+    Apply changes of a completed tournament's own fields (e.g. highlight_url) to its snapshot.
+
+    The live stages may already be pruned, so the tournament view is patched in place rather
+    than re-archived. Changes are flushed, not committed; call it inside the unit of work that
+    changes the tournament.
+
+    Args:
+        tournament_id: The UUID of the tournament.
+        **fields: Tournament view fields and their new values.
+
+    Returns:
+        TournamentArchive: The updated archive, or None if the tournament is not archived.
+    """
+    archive = db.session.get(TournamentArchive, tournament_id)
+    if archive is None:
+        return None
+    snapshot = _decode(archive.version, archive.data)
+    snapshot['tournament'].update(fields)
+    archive.version = SNAPSHOT_VERSION
+    archive.data = _encode(snapshot)
+    db.session.flush()
+    return archive
+
+
+def count_pruned() -> int:
+    """Number of tournaments whose stages and matches were pruned from the live tables."""
+    return db.session.scalar(
+        db.select(db.func.count()).select_from(TournamentArchive).where(TournamentArchive.pruned.is_(True)))
+
+
+def load_snapshot(tournament_id: UUID):
+    """
+    Load the archived views of a tournament with a primary-key read.
+
+    Current user and team profiles are joined in with one query per model.
+
+    Args:
+        tournament_id: The UUID of the tournament.
+
+    Returns:
+        dict: The snapshot (see build_snapshot), or None if the tournament is not archived.
+    """
+    row = db.session.query(TournamentArchive.version, TournamentArchive.data).filter_by(
+        tournament_id=tournament_id).first()
+    if row is None:
+        return None
+    return _join_profiles(_decode(*row))
+
+
+def delete_archive(tournament_id: UUID):
+    """Drop the snapshot of a tournament (e.g. when it is reset)."""
+    TournamentArchive.query.filter_by(tournament_id=tournament_id).delete()
+
+
+def archive_completed_tournaments(prune: bool = None) -> int:
+    """
+    Archive completed tournaments that have no snapshot yet, committing one tournament at a time.
+
+    Returns:
+        int: The number of archived tournaments.
+    """
+    tournament_ids = db.session.scalars(
+        db.select(Tournament.id)
+        .outerjoin(TournamentArchive, TournamentArchive.tournament_id == Tournament.id)
+        .where(Tournament.status == 'completed', TournamentArchive.tournament_id.is_(None))
+    ).all()
+    for tournament_id in tournament_ids:
+        archive_tournament(tournament_id, prune=prune)
+        db.session.commit()
+    return len(tournament_ids)
@@ -0,0 +1,219 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+
+from flask import current_app, request, send_file
+
+try:
+    import brotli
+except ImportError:  # brotli не установлен — создаются только gzip-варианты
+    brotli = None
+
+
+# Форматы, которые имеет смысл сжимать (изображения PNG/JPEG/WebP уже сжаты)
+COMPRESSIBLE_EXTENSIONS = {'.svg', '.css', '.js', '.json', '.txt', '.html', '.xml', '.ico'}
+# Предсжатые варианты в порядке предпочтения: (Content-Encoding, расширение файла)
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+MIN_COMPRESS_SIZE = 512
+HASH_LENGTH = 12
+MANIFEST_NAME = 'asset-manifest.json'
+ASSETS_URL_PREFIX = 'assets'
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+_manifest_cache = {}
+
+
+def build_static_assets(static_root=None):
+    """Строит манифест статических файлов и предсжатые варианты.
+
+    Для каждого файла в static считается хэш содержимого, по которому строится неизменяемый
+    URL ('/assets/avatars/default.<хэш>.png'); для сжимаемых форматов рядом создаются
+    '.gz' и '.br' (если установлен brotli), если они меньше исходника.
+
+    Args:
+        static_root: Директория статических файлов (по умолчанию static приложения).
+
+    Returns:
+        dict: Манифест {логический путь: запись}.
+    """
+    static_root = static_root or current_app.static_folder
+    manifest = {}
+    for directory, _, filenames in os.walk(static_root):
+        for filename in filenames:
+            if filename.endswith(('.gz', '.br')) or filename == MANIFEST_NAME:
+                continue
+            path = os.path.join(directory, filename)
+            logical = os.path.relpath(path, static_root).replace(os.sep, '/')
+            with open(path, 'rb') as f:
+                data = f.read()
+            digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+            stem, ext = os.path.splitext(logical)
+
+            encodings = []
+            if ext.lower() in COMPRESSIBLE_EXTENSIONS and len(data) >= MIN_COMPRESS_SIZE:
+                variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+                if brotli is not None:
+                    variants['.br'] = brotli.compress(data, quality=11)
+                for encoding, suffix in ENCODINGS:
+                    compressed = variants.get(suffix)
+                    if compressed is not None and len(compressed) < len(data):
+                        _write_if_changed(path + suffix, compressed)
+                        encodings.append(encoding)
+
+            manifest[logical] = {
+                'hashed': f"{stem}.{digest}{ext}",
+                'etag': digest,
+                'size': len(data),
+                'encodings': encodings,
+            }
+
+    manifest_path = _manifest_path()
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+    _manifest_cache.clear()
+    return manifest
+
+
+def _write_if_changed(path, data):
+    if os.path.exists(path) and os.path.getsize(path) == len(data):
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def _manifest_path():
+    return os.path.join(current_app.root_path, MANIFEST_NAME)
+
+
+def load_manifest():
+    """Возвращает манифест статических файлов (перечитывается при изменении файла)."""
+    path = _manifest_path()
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}, {}
+    cached = _manifest_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1], cached[2]
+    with open(path) as f:
+        manifest = json.load(f)
+    by_hashed = {entry['hashed']: logical for logical, entry in manifest.items()}
+    _manifest_cache[path] = (mtime, manifest, by_hashed)
+    return manifest, by_hashed
+
+
+def asset_url(path):
+    """Возвращает неизменяемый URL статического файла по его пути.
+
+    Args:
+        path: Путь вида 'static/avatars/default.png' или '/static/avatars/default.png'.
+
+    Returns:
+        '/assets/avatars/default.<хэш>.png', если файл есть в манифесте, иначе исходный путь.
+    """
+    if not path:
+        return path
+    logical = path.lstrip('/')
+    if not logical.startswith('static/'):
+        return path
+    manifest, _ = load_manifest()
+    entry = manifest.get(logical[len('static/'):])
+    if not entry:
+        return path
+    return f"/{ASSETS_URL_PREFIX}/{entry['hashed']}"
+
+
+def resolve_asset(hashed):
+    """Находит статический файл по неизменяемому пути.
+
+    Returns:
+        tuple: (логический путь, запись манифеста) или None.
+    """
+    manifest, by_hashed = load_manifest()
+    logical = by_hashed.get(hashed)
+    if logical is None:
+        return None
+    return logical, manifest[logical]
+
+
+def send_offloaded_file(path, etag=None, immutable=False, mimetype=None, encoding=None):
+    """Отдаёт файл, по возможности передавая чтение и отправку байтов веб-серверу.
+
+    Условные запросы (If-None-Match) обрабатываются здесь без чтения файла. Дальше, в
+    зависимости от STATIC_OFFLOAD:
+    - 'x-accel-redirect': пустой ответ с заголовком X-Accel-Redirect (nginx) на путь файла
+      относительно каталога приложения внутри STATIC_OFFLOAD_PREFIX;
+    - 'x-sendfile': заголовок X-Sendfile с абсолютным путём (Apache/lighttpd);
+    - None: файл отдаётся приложением через send_file (с поддержкой Range).
+
+    Args:
+        path: Абсолютный путь к файлу (внутри каталога приложения).
+        etag: Сильный ETag (без кавычек) или None.
+        immutable: Разрешить долгое кэширование (URL меняется вместе с содержимым).
+        mimetype: Тип содержимого (по умолчанию по имени файла).
+        encoding: Content-Encoding предсжатого варианта или None.
+    """
+    if mimetype is None:
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    offload = current_app.config.get('STATIC_OFFLOAD')
+    if etag and request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    elif offload == 'x-accel-redirect':
+        prefix = current_app.config.get('STATIC_OFFLOAD_PREFIX', '/_internal').rstrip('/')
+        response = current_app.response_class(mimetype=mimetype)
+        internal_uri = os.path.relpath(path, current_app.root_path).replace(os.sep, '/')
+        response.headers['X-Accel-Redirect'] = f"{prefix}/{internal_uri}"
+    elif offload == 'x-sendfile':
+        response = current_app.response_class(mimetype=mimetype)
+        response.headers['X-Sendfile'] = path
+    else:
+        response = send_file(path, mimetype=mimetype, etag=etag or False, conditional=True,
+                             max_age=IMMUTABLE_MAX_AGE if immutable else None)
+
+    if etag:
+        response.set_etag(etag)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if immutable:
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+        response.cache_control.no_cache = None
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+
+def send_asset(hashed):
+    """Отдаёт статический файл по неизменяемому пути с учётом Accept-Encoding.
+
+    Returns:
+        Response или None, если путь не найден в манифесте.
+    """
+    resolved = resolve_asset(hashed)
+    if resolved is None:
+        return None
+    logical, entry = resolved
+    path = os.path.join(current_app.static_folder, *logical.split('/'))
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    for encoding, suffix in ENCODINGS:
+        if encoding in entry['encodings'] and encoding in request.accept_encodings:
+            response = send_offloaded_file(
+                path + suffix, etag=f"{entry['etag']}-{encoding}", immutable=True,
+                mimetype=mimetype, encoding=encoding)
+            break
+    else:
+        response = send_offloaded_file(
+            path, etag=entry['etag'], immutable=True, mimetype=mimetype)
+
+    if entry['encodings']:
+        response.vary.add('Accept-Encoding')
+    return response
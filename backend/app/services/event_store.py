@@ -0,0 +1,154 @@
+from uuid import UUID
+from sqlalchemy import select, update
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+from app.extensions import db
+from app.models import Group, GroupRow, Match, PlayoffStageMatch, Tournament, TournamentEvent
+
+
+EVENT_TYPES = (
+    'registered', 'unregistered', 'started', 'seeded', 'map_completed',
+    'match_completed', 'advanced', 'completed', 'reset'
+)
+# Page size for reading the log (projections replay it page by page)
+READ_BATCH_SIZE = 5000
+
+
+def _jsonable(value):
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    return value
+
+
+def _next_seq(tournament_id: UUID) -> int:
+    # Atomic UPDATE ... SET event_seq = event_seq + 1 RETURNING event_seq: the row lock is held
+    # until commit, so events of one tournament are numbered in commit order and readers that
+    # poll "seq > last seen" never skip an event committed later with a smaller number
+    with db.session.no_autoflush:
+        seq = db.session.execute(
+            update(Tournament)
+            .where(Tournament.id == tournament_id)
+            .values(event_seq=Tournament.event_seq + 1)
+            .returning(Tournament.event_seq),
+            execution_options={"synchronize_session": False}
+        ).scalar()
+        loaded = db.session.identity_map.get(identity_key(Tournament, tournament_id))
+        if loaded is not None:
+            set_committed_value(loaded, "event_seq", seq)
+    return seq
+
+
+def record_event(tournament_id: UUID, type: str, **payload):
+    """
+    Append an event to the tournament log within the current transaction.
+
+    Args:
+        tournament_id: The UUID of the tournament.
+        type: One of EVENT_TYPES.
+        **payload: Event data; UUIDs are stored as strings.
+
+    Returns:
+        TournamentEvent: The appended event (flushed with the caller's unit of work).
+
+    Raises:
+        ValueError: If the event type is unknown.
+    """
+    if type not in EVENT_TYPES:
+        raise ValueError(f"Unknown tournament event type: {type}")
+    event = TournamentEvent(
+        tournament_id=tournament_id,
+        seq=_next_seq(tournament_id),
+        type=type,
+        payload=_jsonable(payload)
+    )
+    db.session.add(event)
+    return event
+
+
+def get_events(tournament_id: UUID, after_seq: int = 0, limit: int = None):
+    """
+    Read the tournament log in order.
+
+    Args:
+        tournament_id: The UUID of the tournament.
+        after_seq: Return events with a greater sequence number only.
+        limit: Maximum number of events (all by default).
+
+    Returns:
+        list: (seq, type, payload) tuples ordered by seq.
+    """
+    query = (
+        select(TournamentEvent.seq, TournamentEvent.type, TournamentEvent.payload)
+        .where(TournamentEvent.tournament_id == tournament_id, TournamentEvent.seq > after_seq)
+        .order_by(TournamentEvent.seq)
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    return db.session.execute(query).all()
+
+
+def iter_events(tournament_id: UUID, after_seq: int = 0):
+    """Yield (seq, type, payload) for the whole log after after_seq, READ_BATCH_SIZE rows per query."""
+    while True:
+        batch = get_events(tournament_id, after_seq, READ_BATCH_SIZE)
+        yield from batch
+        if len(batch) < READ_BATCH_SIZE:
+            return
+        after_seq = batch[-1].seq
+
+
+def bracket_payload(tournament: Tournament) -> list:
+    """Current playoff bracket of a tournament as event payload (one query)."""
+    if not tournament.playoff_stage:
+        return []
+    rows = db.session.execute(
+        select(Match.id, PlayoffStageMatch.round_number, Match.participant1_id,
+               Match.participant2_id, Match.winner_id, Match.status)
+        .join(PlayoffStageMatch, Match.playoff_match_id == PlayoffStageMatch.id)
+        .where(PlayoffStageMatch.playoff_id == tournament.playoff_stage.id)
+    )
+    return [
+        {
+            'match_id': match_id,
+            'round': round_number,
+            'participant1_id': participant1_id,
+            'participant2_id': participant2_id,
+            'winner_id': winner_id,
+            'status': status,
+        }
+        for match_id, round_number, participant1_id, participant2_id, winner_id, status in rows
+    ]
+
+
+def groups_payload(tournament: Tournament) -> dict:
+    """Group membership of a tournament as event payload: letter -> participant ids (one query)."""
+    if not tournament.group_stage:
+        return {}
+    column = GroupRow.team_id if tournament.type == 'team' else GroupRow.user_id
+    groups = {}
+    rows = db.session.execute(
+        select(Group.letter, column)
+        .join(GroupRow, GroupRow.group_id == Group.id)
+        .where(Group.groupstage_id == tournament.group_stage.id, column.isnot(None))
+    )
+    for letter, participant_id in rows:
+        groups.setdefault(letter, []).append(participant_id)
+    return groups
+
+
+def match_payload(match) -> dict:
+    """Result of a match as event payload."""
+    return {
+        'match_id': match.id,
+        'status': match.status,
+        'winner_id': match.winner_id,
+        'participant1_id': match.participant1_id,
+        'participant2_id': match.participant2_id,
+        'score': [match.participant1_score, match.participant2_score],
+        'group': match.group.letter if match.group_id else None,
+        'round': match.playoff_match.round_number if match.playoff_match else None,
+    }
@@ -0,0 +1,261 @@
+import random
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from sqlalchemy import and_, delete, event, func, insert, literal, or_, select, union_all
+from app.extensions import db
+from app.models import User, UserRequest
+from app.models.user_models import mutual_friend_association as friends_table
+
+
+# Кэш списков смежности: user_id -> (момент загрузки, frozenset id друзей).
+# Кэш свой у каждого процесса: изменения из других процессов видны не позже чем через TTL
+ADJACENCY_CACHE_SIZE = 10000
+ADJACENCY_TTL_SECONDS = 300
+# Сколько друзей просматривается при подборе рекомендаций (для пользователей с огромным
+# числом друзей берётся случайная выборка — счётчики общих друзей остаются сопоставимыми)
+SUGGESTION_FANOUT = 1000
+# Предел параметров в одном IN (...) при пакетной загрузке
+BATCH_SIZE = 500
+
+# Статусы отношений в порядке приоритета: друзья, входящая заявка, исходящая заявка
+FRIENDSHIP_STATUSES = ('yes', 'pending', 'requested')
+NO_FRIENDSHIP = 'no'
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def _cache_get(user_id):
+    with _lock:
+        cached = _cache.get(user_id)
+        if cached is None:
+            return None
+        loaded_at, friend_ids = cached
+        if time.monotonic() - loaded_at > ADJACENCY_TTL_SECONDS:
+            del _cache[user_id]
+            return None
+        _cache.move_to_end(user_id)
+        return friend_ids
+
+
+def _cache_put(user_id, friend_ids):
+    with _lock:
+        _cache[user_id] = (time.monotonic(), friend_ids)
+        _cache.move_to_end(user_id)
+        while len(_cache) > ADJACENCY_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def invalidate(*user_ids):
+    """Сбрасывает кэшированные списки друзей пользователей."""
+    with _lock:
+        for user_id in user_ids:
+            _cache.pop(user_id, None)
+
+
+def _mark_dirty(*user_ids):
+    # Кэш сбрасывается после коммита: иначе параллельный запрос успел бы закэшировать
+    # ещё не зафиксированное состояние
+    db.session.info.setdefault('friend_graph_dirty', set()).update(user_ids)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_after_commit(session):
+    dirty = session.info.pop('friend_graph_dirty', None)
+    if dirty:
+        invalidate(*dirty)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_after_rollback(session):
+    # Откатилось — значит кэш и так соответствует базе, но пометки больше не нужны
+    session.info.pop('friend_graph_dirty', None)
+
+
+def get_friend_ids(user_id):
+    """Возвращает множество id друзей пользователя (из кэша или одним запросом).
+
+    Args:
+        user_id: UUID пользователя.
+
+    Returns:
+        frozenset: id друзей.
+    """
+    friend_ids = _cache_get(user_id)
+    if friend_ids is None:
+        friend_ids = frozenset(db.session.execute(
+            select(friends_table.c.friend_id).where(friends_table.c.user_id == user_id)
+        ).scalars())
+        _cache_put(user_id, friend_ids)
+    return friend_ids
+
+
+def get_friend_ids_many(user_ids):
+    """Возвращает списки друзей для нескольких пользователей.
+
+    Недостающие в кэше списки загружаются пакетами (один запрос на BATCH_SIZE пользователей).
+
+    Returns:
+        dict: user_id -> frozenset id друзей.
+    """
+    result = {}
+    missing = []
+    for user_id in user_ids:
+        friend_ids = _cache_get(user_id)
+        if friend_ids is None:
+            missing.append(user_id)
+        else:
+            result[user_id] = friend_ids
+
+    for start in range(0, len(missing), BATCH_SIZE):
+        batch = missing[start:start + BATCH_SIZE]
+        loaded = {user_id: set() for user_id in batch}
+        rows = db.session.execute(
+            select(friends_table.c.user_id, friends_table.c.friend_id)
+            .where(friends_table.c.user_id.in_(batch))
+        )
+        for user_id, friend_id in rows:
+            loaded[user_id].add(friend_id)
+        for user_id, friend_ids in loaded.items():
+            friend_ids = frozenset(friend_ids)
+            _cache_put(user_id, friend_ids)
+            result[user_id] = friend_ids
+    return result
+
+
+def are_friends(user_id, other_id):
+    """Проверяет, дружат ли пользователи.
+
+    Если список друзей уже в кэше, проверка идёт по нему, иначе — точечный запрос по
+    первичному ключу (user_id, friend_id) без загрузки всего списка.
+    """
+    friend_ids = _cache_get(user_id)
+    if friend_ids is not None:
+        return other_id in friend_ids
+    return db.session.execute(
+        select(friends_table.c.user_id).where(
+            friends_table.c.user_id == user_id,
+            friends_table.c.friend_id == other_id,
+        ).limit(1)
+    ).first() is not None
+
+
+def add_friendship(user_id, friend_id):
+    """Добавляет дружбу в обе стороны (повторный вызов ничего не меняет).
+
+    Изменения фиксируются вызывающим кодом (db.session.commit()).
+
+    Raises:
+        ValueError: Попытка добавить в друзья самого себя.
+    """
+    if user_id == friend_id:
+        raise ValueError("Нельзя добавить в друзья самого себя")
+    if are_friends(user_id, friend_id):
+        return
+    db.session.execute(insert(friends_table), [
+        {'user_id': user_id, 'friend_id': friend_id},
+        {'user_id': friend_id, 'friend_id': user_id},
+    ])
+    _mark_dirty(user_id, friend_id)
+
+
+def remove_friendship(user_id, friend_id):
+    """Удаляет дружбу в обе стороны.
+
+    Returns:
+        bool: False, если пользователи не были друзьями.
+    """
+    result = db.session.execute(
+        delete(friends_table).where(or_(
+            and_(friends_table.c.user_id == user_id, friends_table.c.friend_id == friend_id),
+            and_(friends_table.c.user_id == friend_id, friends_table.c.friend_id == user_id),
+        ))
+    )
+    if not result.rowcount:
+        return False
+    _mark_dirty(user_id, friend_id)
+    return True
+
+
+def suggest_friends(user_id, limit=20):
+    """Подбирает «возможно, вы знакомы»: друзей друзей, упорядоченных по числу общих друзей.
+
+    Для каждого друга берётся его список смежности (кэш или пакетная загрузка), из него
+    вычитаются сам пользователь и его друзья; оставшиеся кандидаты считаются в Counter —
+    счётчик кандидата равен размеру пересечения его друзей с друзьями пользователя.
+
+    Args:
+        user_id: UUID пользователя.
+        limit: Сколько рекомендаций вернуть.
+
+    Returns:
+        list: Пары (User, число общих друзей) по убыванию числа общих друзей.
+    """
+    friend_ids = get_friend_ids(user_id)
+    if not friend_ids:
+        return []
+
+    sources = list(friend_ids)
+    if len(sources) > SUGGESTION_FANOUT:
+        sources = random.sample(sources, SUGGESTION_FANOUT)
+
+    excluded = friend_ids | {user_id}
+    mutual_counts = Counter()
+    for friends_of_friend in get_friend_ids_many(sources).values():
+        mutual_counts.update(friends_of_friend - excluded)
+
+    top = mutual_counts.most_common(limit)
+    if not top:
+        return []
+    users = {user.id: user for user in User.query.filter(User.id.in_([uid for uid, _ in top]))}
+    return [(users[uid], count) for uid, count in top if uid in users]
+
+
+def _friendship_status_query(user_id, other_ids):
+    """Собирает UNION ALL: (id собеседника, ранг статуса) по дружбе и заявкам в обе стороны."""
+    friends = select(
+        friends_table.c.friend_id.label('other_id'), literal(0).label('rank')
+    ).where(friends_table.c.user_id == user_id, friends_table.c.friend_id.in_(other_ids))
+    incoming = select(
+        UserRequest.from_user_id.label('other_id'), literal(1).label('rank')
+    ).where(UserRequest.to_user_id == user_id, UserRequest.from_user_id.in_(other_ids),
+            UserRequest.type == 'friend', UserRequest.status == 'pending')
+    outgoing = select(
+        UserRequest.to_user_id.label('other_id'), literal(2).label('rank')
+    ).where(UserRequest.from_user_id == user_id, UserRequest.to_user_id.in_(other_ids),
+            UserRequest.type == 'friend', UserRequest.status == 'pending')
+    return union_all(friends, incoming, outgoing).subquery()
+
+
+def get_friendship_status(user_id, other_id):
+    """Определяет статус отношений с пользователем (см. get_friendship_statuses).
+
+    Returns:
+        str: 'yes' (друзья), 'pending' (other_id отправил заявку пользователю user_id),
+        'requested' (user_id отправил заявку пользователю other_id) или 'no'.
+    """
+    return get_friendship_statuses(user_id, [other_id])[other_id]
+
+
+def get_friendship_statuses(user_id, other_ids):
+    """Определяет статусы отношений сразу для списка пользователей (один запрос на пакет).
+
+    Args:
+        user_id: UUID текущего пользователя.
+        other_ids: UUID пользователей (результаты поиска, участники турнира и т.п.).
+
+    Returns:
+        dict: other_id -> статус (см. get_friendship_status).
+    """
+    other_ids = list(dict.fromkeys(other_ids))
+    result = dict.fromkeys(other_ids, NO_FRIENDSHIP)
+    for start in range(0, len(other_ids), BATCH_SIZE):
+        statuses = _friendship_status_query(user_id, other_ids[start:start + BATCH_SIZE])
+        rows = db.session.execute(
+            select(statuses.c.other_id, func.min(statuses.c.rank)).group_by(statuses.c.other_id)
+        )
+        for other_id, rank in rows:
+            result[other_id] = FRIENDSHIP_STATUSES[rank]
+    return result
@@ -1,13 +1,79 @@
+import hashlib
+import json
+import threading
+import time
+from typing import NamedTuple
 from flask import abort
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import lazyload
 from uuid import UUID
 from app.extensions import db
 from app.models import Game, Achievement, User
 
 
+# Other processes pick up catalog changes within this many seconds
+GAME_CATALOG_TTL_SECONDS = 60
+
+
+class GameEntry(NamedTuple):
+    """Immutable catalog entry with the columns the game list exposes."""
+    id: UUID
+    title: str
+    image_path: str
+    logo_path: str
+    service_name: str
+
+
+class GameCatalog(NamedTuple):
+    games: tuple
+    body: bytes
+    etag: str
+    loaded_at: float
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def _load_catalog() -> GameCatalog:
+    rows = db.session.execute(
+        select(*(getattr(Game, field) for field in GameEntry._fields)).order_by(Game.title)
+    ).all()
+    games = tuple(GameEntry(*row) for row in rows)
+    body = json.dumps(
+        [{**entry._asdict(), 'id': str(entry.id)} for entry in games],
+        ensure_ascii=False, separators=(',', ':')
+    ).encode()
+    return GameCatalog(games, body, hashlib.sha1(body).hexdigest()[:16], time.monotonic())
+
+
+def get_game_catalog(refresh: bool = False) -> GameCatalog:
+    """
+    Return the cached game catalog, loading it on first use or when it is older than the TTL.
+
+    Only the catalog columns are selected, so the cost does not depend on the number of
+    tournaments, achievements or game accounts.
+
+    Args:
+        refresh: Reload the catalog from the database.
+
+    Returns:
+        GameCatalog: Immutable entries, their pre-serialized JSON body and its ETag.
+    """
+    global _catalog
+    catalog = _catalog
+    if not refresh and catalog and time.monotonic() - catalog.loaded_at < GAME_CATALOG_TTL_SECONDS:
+        return catalog
+    with _catalog_lock:
+        if refresh or _catalog is catalog:
+            _catalog = _load_catalog()
+        return _catalog
+
+
 def get_all_games():
-    """Retrieve all games from the database."""
-    return Game.query.all()
+    """Retrieve all games from the catalog cache."""
+    return get_game_catalog().games
 
 
 def get_game(game_id: UUID):
@@ -45,10 +111,11 @@ def create_game(title: str, image_path: str = None, logo_path: str = None, servi
     try:
         db.session.add(game)
         db.session.commit()
-        return game
     except IntegrityError:
         db.session.rollback()
         raise ValueError("A game with this title already exists")
+    get_game_catalog(refresh=True)
+    return game
 
 
 def delete_game(game_id: UUID):
@@ -72,10 +139,34 @@ def delete_game(game_id: UUID):
 
     db.session.delete(game)
     db.session.commit()
+    get_game_catalog(refresh=True)
     return True
 
 
-def create_achievement(game_id: UUID, title: str, description: str = None, image_path: str = None):
+def set_map_pool(game_id: UUID, maps: list):
+    """
+    Replace the map pool a game's matches ban and pick from.
+
+    Args:
+        game_id: The UUID of the game.
+        maps: Map names in display order (an empty list removes the pool).
+
+    Returns:
+        Game: The updated game object.
+
+    Raises:
+        ValueError: If the names are invalid or duplicated.
+    """
+    from app.services.map_veto import validate_pool
+
+    game = Game.query.get_or_404(game_id)
+    game.map_pool = validate_pool(maps) or None
+    db.session.commit()
+    return game
+
+
+def create_achievement(game_id: UUID, title: str, description: str = None, image_path: str = None,
+                       rule: str = None, threshold: int = None):
     """
     Create a new achievement for a game.
 
@@ -84,16 +175,25 @@ def create_achievement(game_id: UUID, title: str, description: str = None, image
         title: The title of the achievement (required).
         description: Optional description of the achievement.
         image_path: Optional path to the achievement image.
+        rule: Optional rule awarding the achievement automatically ('match_wins',
+            'tournament_wins' or 'podium_streak'); without it the achievement is assigned manually.
+        threshold: Wins or streak length the rule requires (1 by default).
 
     Returns:
         Achievement: The created achievement object.
 
     Raises:
-        ValueError: If title is empty or game is not found.
+        ValueError: If title is empty, the rule is unknown or game is not found.
         IntegrityError: If an achievement with the same title exists for the game.
     """
+    from app.services.achievement_service import evaluate_achievements, rule_names
+
     if not title or not title.strip():
         raise ValueError("Achievement title is required")
+    if rule is not None and rule not in rule_names():
+        raise ValueError(f"Unknown achievement rule: {rule}")
+    if threshold is not None and (rule is None or threshold < 1):
+        raise ValueError("Threshold must be a positive number and requires a rule")
 
     game = Game.query.get_or_404(game_id)
 
@@ -101,11 +201,17 @@ def create_achievement(game_id: UUID, title: str, description: str = None, image
         title=title.strip(),
         description=description,
         image_path=image_path or "/static/achievements/default_image.png",
-        game_id=game.id
+        game_id=game.id,
+        rule=rule,
+        threshold=threshold
     )
 
     try:
         db.session.add(achievement)
+        db.session.flush()
+        # Players who already meet the rule get it right away
+        if rule:
+            evaluate_achievements((rule,), game_id=game.id)
         db.session.commit()
         return achievement
     except IntegrityError:
@@ -128,13 +234,16 @@ def assign_achievement_to_user(achievement_id: UUID, user_id: UUID):
     Raises:
         ValueError: If achievement or user is not found, or already assigned.
     """
-    achievement = Achievement.query.get_or_404(achievement_id)
-    user = User.query.get_or_404(user_id)
+    from app.services.achievement_service import award
 
-    if achievement in user.achievements:
-        raise ValueError("Achievement already assigned to this user")
+    achievement = Achievement.query.options(lazyload(Achievement.users)).get_or_404(achievement_id)
+    user_id = UUID(str(user_id))
+    if not db.session.execute(select(User.id).where(User.id == user_id)).first():
+        abort(404)
 
-    user.achievements.append(achievement)
+    # The unique (user, achievement) pair rejects a second award without loading the collection
+    if not award([(user_id, achievement.id)]):
+        raise ValueError("Achievement already assigned to this user")
     db.session.commit()
     return achievement
 
@@ -0,0 +1,415 @@
+import glob
+import hashlib
+import os
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.sql import func
+from werkzeug.exceptions import HTTPException, RequestEntityTooLarge, UnsupportedMediaType
+from werkzeug.security import safe_join
+from app.extensions import db
+from app.models import ImageBlob
+from app.services.asset_service import asset_url
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow не установлен — изображения сохраняются как есть
+    Image = None
+
+
+# Размеры миниатюр (px по большей стороне), отдаются в WebP
+THUMBNAIL_SIZES = (32, 64, 256)
+# Ограничение для полноразмерной копии (баннеры турниров и т.п.)
+MAX_IMAGE_SIDE = 1920
+WEBP_QUALITY = 80
+JPEG_QUALITY = 85
+# Типы изображений, миниатюры которых обрезаются до квадрата
+SQUARE_IMAGE_TYPES = {'avatar', 'team_logo', 'game_logo'}
+
+# Хранилище файлов по содержимому: media/<2 символа хэша>/<хэш>_<вариант>.<ext>
+MEDIA_DIR = 'media'
+# Суффикс полноразмерной копии: по нему отличаются обработанные изображения от старых загрузок
+FULL_SUFFIX = '_full'
+# Исходный файл, ожидающий обработки (отдаётся без долгого кэширования)
+SOURCE_SUFFIX = '_src'
+_FALLBACK_FORMATS = {'.jpg': 'JPEG', '.jpeg': 'JPEG', '.png': 'PNG', '.webp': 'WEBP'}
+
+CHUNK_SIZE = 64 * 1024
+MAX_IMAGE_SIZE_MB = 2
+MAX_IMAGE_SIZE = MAX_IMAGE_SIZE_MB * 1024 * 1024
+# Сколько первых байт нужно для определения формата
+SNIFF_BYTES = 12
+# Файлы без ссылок хранятся ещё какое-то время: повторная загрузка того же файла их переиспользует
+UNREFERENCED_TTL_SECONDS = 60 * 60
+
+_executor = ThreadPoolExecutor(
+    max_workers=min(4, os.cpu_count() or 1), thread_name_prefix='image-pipeline')
+
+
+def media_root():
+    """Возвращает абсолютный путь к хранилищу изображений."""
+    return os.path.join(current_app.root_path, MEDIA_DIR)
+
+
+def is_media_path(path):
+    """Проверяет, лежит ли изображение в хранилище по содержимому."""
+    return bool(path) and path.lstrip('/').startswith(f"{MEDIA_DIR}/")
+
+
+class ImageUploadStream:
+    """Файл для приёма загружаемого изображения прямо из тела запроса.
+
+    Данные пишутся во временный файл хранилища блоками по мере разбора multipart, поэтому
+    память на загрузку не зависит от её размера. Попутно считается хэш содержимого, по первым
+    байтам определяется формат, а превышение размера обрывает приём: неподходящий файл
+    отклоняется после первого блока, а не после получения целиком.
+
+    Args:
+        max_size: Максимальный размер файла в байтах.
+    """
+
+    def __init__(self, max_size=MAX_IMAGE_SIZE):
+        tmp_dir = os.path.join(media_root(), '.tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=tmp_dir, suffix='.part')
+        self._file = os.fdopen(fd, 'w+b')
+        self._digest = hashlib.sha256()
+        self._head = b''
+        self.max_size = max_size
+        self.size = 0
+        self.ext = None
+
+    def write(self, data):
+        if self.ext is None:
+            self._head += data[:SNIFF_BYTES - len(self._head)]
+            if len(self._head) >= SNIFF_BYTES:
+                self._check_head()
+        self.size += len(data)
+        if self.size > self.max_size:
+            self.close()
+            raise RequestEntityTooLarge(
+                f'Файл слишком большой. Максимальный размер — {self.max_size // (1024 * 1024)}MB')
+        self._digest.update(data)
+        return self._file.write(data)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        # Разбор формы закончен: файлы короче SNIFF_BYTES проверяются здесь
+        if self.ext is None:
+            self._check_head()
+        return self._file.seek(offset, whence)
+
+    def _check_head(self):
+        self.ext = sniff_image_type(self._head)
+        if self.ext is None:
+            self.close()
+            raise UnsupportedMediaType('Недопустимый формат файла')
+
+    def hexdigest(self):
+        """Возвращает sha256 содержимого."""
+        return self._digest.hexdigest()
+
+    def claim(self, path):
+        """Атомарно перемещает принятый файл в хранилище."""
+        self._file.flush()
+        os.replace(self.path, path)
+        self.path = None
+
+    def close(self):
+        self._file.close()
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+        self.path = None
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+def sniff_image_type(head):
+    """Определяет формат изображения по сигнатуре (первые SNIFF_BYTES байт).
+
+    Returns:
+        Расширение ('.png', '.jpg', '.webp') или None, если формат не поддерживается.
+    """
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return '.png'
+    if head.startswith(b'\xff\xd8\xff'):
+        return '.jpg'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return '.webp'
+    return None
+
+
+def store_image(file_storage, image_type):
+    """Сохраняет загруженный файл в хранилище по содержимому.
+
+    Если файл принят через ImageUploadStream, он уже лежит во временном файле хранилища
+    с посчитанным хэшем и просто перемещается; иначе копируется потоком блоками по CHUNK_SIZE.
+    Формат определяется по содержимому, а не по имени файла. Если такое изображение
+    (с тем же профилем обработки) уже есть, увеличивается счётчик ссылок и ничего не
+    записывается. Новое изображение обрабатывается в пуле потоков (перекодирование,
+    удаление метаданных, миниатюры), запрос этого не ждёт.
+
+    Args:
+        file_storage: Объект файла (например, request.files['file']).
+        image_type: Тип изображения (см. save_image).
+
+    Returns:
+        Относительный путь полноразмерной копии ('media/ab/<хэш>_full.jpg').
+
+    Raises:
+        ValueError: Если файл не является изображением поддерживаемого формата или слишком большой.
+    """
+    upload = file_storage.stream
+    if not isinstance(upload, ImageUploadStream):
+        upload = _copy_to_upload_stream(file_storage.stream)
+    try:
+        upload.seek(0)
+    except HTTPException as e:
+        raise ValueError(e.description)
+
+    ext = upload.ext
+    square = image_type in SQUARE_IMAGE_TYPES
+    # Профиль обработки входит в ключ: один файл как аватар и как баннер даёт разные миниатюры
+    key = hashlib.sha256(
+        f"{'square' if square else 'fit'}:{upload.hexdigest()}".encode()).hexdigest()
+
+    _acquire_blob(key, ext, upload.size)
+
+    blob_dir = os.path.join(media_root(), key[:2])
+    os.makedirs(blob_dir, exist_ok=True)
+    full_path = os.path.join(blob_dir, f"{key}{FULL_SUFFIX}{ext}")
+    source_path = os.path.join(blob_dir, f"{key}{SOURCE_SUFFIX}{ext}")
+    if os.path.exists(full_path):
+        # Обновляем mtime, чтобы сборщик не удалил переиспользованные файлы
+        os.utime(full_path)
+    elif not os.path.exists(source_path):
+        if Image is None:
+            upload.claim(full_path)
+        else:
+            upload.claim(source_path)
+            _executor.submit(process_image, source_path, full_path, square)
+    upload.close()
+
+    return f"{MEDIA_DIR}/{key[:2]}/{key}{FULL_SUFFIX}{ext}"
+
+
+def _copy_to_upload_stream(stream):
+    upload = ImageUploadStream()
+    try:
+        while chunk := stream.read(CHUNK_SIZE):
+            upload.write(chunk)
+    except HTTPException as e:
+        raise ValueError(e.description)
+    return upload
+
+
+def release_image(path):
+    """Уменьшает счётчик ссылок изображения из хранилища.
+
+    Файлы не удаляются сразу: если транзакция запроса откатится, счётчик вернётся,
+    а неиспользуемые файлы удаляет remove_unreferenced_images.
+
+    Args:
+        path: Относительный путь полноразмерной копии.
+    """
+    key = _media_key(path)
+    db.session.execute(
+        update(ImageBlob)
+        .where(ImageBlob.hash == key, ImageBlob.refcount > 0)
+        .values(refcount=ImageBlob.refcount - 1, updated_at=func.now()),
+        execution_options={"synchronize_session": False}
+    )
+
+
+def _acquire_blob(key, ext, size):
+    def increment():
+        return db.session.execute(
+            update(ImageBlob)
+            .where(ImageBlob.hash == key)
+            .values(refcount=ImageBlob.refcount + 1, updated_at=func.now()),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+
+    if increment():
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(ImageBlob(hash=key, ext=ext, size=size, refcount=1))
+    except IntegrityError:
+        # Тот же файл параллельно загрузил другой запрос
+        increment()
+
+
+def _media_key(path):
+    return os.path.basename(path).split('_', 1)[0]
+
+
+def remove_unreferenced_images():
+    """Удаляет файлы изображений, на которые дольше UNREFERENCED_TTL_SECONDS нет ссылок."""
+    root = media_root()
+    cutoff = time.time() - UNREFERENCED_TTL_SECONDS
+    files_by_key = {}
+    for path in glob.glob(os.path.join(root, '??', '*')):
+        files_by_key.setdefault(_media_key(path), []).append(path)
+
+    removed = 0
+    for key, paths in files_by_key.items():
+        if any(os.path.getmtime(path) > cutoff for path in paths):
+            continue
+        # Блокировка строки не даёт параллельной загрузке того же файла переиспользовать его
+        blob = ImageBlob.query.filter_by(hash=key).with_for_update().first()
+        if blob and blob.refcount > 0:
+            db.session.rollback()
+            continue
+        for path in paths:
+            os.remove(path)
+        if blob:
+            db.session.delete(blob)
+        db.session.commit()
+        removed += 1
+
+    # Записи без файлов (например, после ручной очистки диска)
+    for blob in ImageBlob.query.filter_by(refcount=0).all():
+        if blob.hash not in files_by_key:
+            db.session.delete(blob)
+    db.session.commit()
+    print(f"[Auto-clean] Удалено {removed} неиспользуемых изображений")
+
+
+def resolve_media_file(filename):
+    """Находит файл хранилища для запрошенного пути.
+
+    Пока изображение обрабатывается, вместо копии и миниатюр отдаётся исходный файл;
+    без Pillow вместо миниатюр отдаётся полноразмерная копия.
+
+    Args:
+        filename: Путь внутри хранилища ('ab/<хэш>_64.webp').
+
+    Returns:
+        tuple: (абсолютный путь, неизменяемый ли файл) или None, если файла нет.
+    """
+    requested = safe_join(media_root(), filename)
+    if requested is None:
+        return None
+    if os.path.isfile(requested):
+        return requested, True
+
+    directory, name = os.path.split(requested)
+    key = _media_key(name)
+    for suffix in (SOURCE_SUFFIX, FULL_SUFFIX):
+        candidates = [path for path in glob.glob(os.path.join(directory, f"{key}{suffix}.*"))
+                      if not path.endswith('.tmp')]
+        if candidates:
+            return candidates[0], False
+    return None
+
+
+def process_image(source_path, full_path, square=False):
+    """Декодирует изображение один раз, удаляет метаданные и создаёт миниатюры.
+
+    Полноразмерная копия перекодируется в исходном формате (запасной вариант для клиентов
+    без WebP) с ограничением MAX_IMAGE_SIDE, миниатюры THUMBNAIL_SIZES сохраняются в WebP
+    рядом с ней: '<name>_full.png' -> '<name>_256.webp', '<name>_64.webp', '<name>_32.webp'.
+    Миниатюры записываются раньше копии: её появление означает, что обработка завершена.
+
+    Args:
+        source_path: Абсолютный путь к загруженному файлу (удаляется после обработки).
+        full_path: Абсолютный путь полноразмерной копии.
+        square: Обрезать миниатюры до квадрата (аватары, логотипы).
+    """
+    try:
+        with Image.open(source_path) as source:
+            source.load()
+            image = ImageOps.exif_transpose(source)
+        has_alpha = image.mode in ('RGBA', 'LA', 'PA') or (
+            image.mode == 'P' and 'transparency' in image.info)
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+        # Пересобранный кадр не несёт EXIF, ICC и текстовых блоков исходника
+        image.info = {}
+
+        # Миниатюры от большей к меньшей: каждая уменьшается из предыдущей
+        thumbnail = image
+        for size in sorted(THUMBNAIL_SIZES, reverse=True):
+            if square:
+                thumbnail = ImageOps.fit(
+                    thumbnail, (size, size), Image.Resampling.LANCZOS)
+            else:
+                thumbnail = thumbnail.copy()
+                thumbnail.thumbnail((size, size), Image.Resampling.LANCZOS)
+            _atomic_save(thumbnail, variant_path(full_path, size), 'WEBP')
+
+        fallback_format = _FALLBACK_FORMATS[os.path.splitext(full_path)[1]]
+        if fallback_format == 'JPEG' and has_alpha:
+            image = image.convert('RGB')
+        image.thumbnail((MAX_IMAGE_SIDE, MAX_IMAGE_SIDE), Image.Resampling.LANCZOS)
+        _atomic_save(image, full_path, fallback_format)
+        os.remove(source_path)
+    except Exception as e:
+        print(f"[Image] Не удалось обработать {source_path}: {e}")
+        # Отдаём файл как есть, чтобы ссылка оставалась рабочей
+        if os.path.exists(source_path) and not os.path.exists(full_path):
+            os.replace(source_path, full_path)
+
+
+def _atomic_save(image, path, format_):
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    options = {
+        'WEBP': {'quality': WEBP_QUALITY, 'method': 4},
+        'JPEG': {'quality': JPEG_QUALITY, 'optimize': True, 'progressive': True},
+        'PNG': {'optimize': True},
+    }[format_]
+    try:
+        image.save(tmp_path, format_, **options)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def is_processed(path):
+    """Проверяет, создавались ли для изображения миниатюры (по имени файла)."""
+    return bool(path) and os.path.splitext(path)[0].endswith(FULL_SUFFIX)
+
+
+def variant_path(path, size):
+    """Возвращает путь к миниатюре size для обработанного изображения."""
+    stem = os.path.splitext(path)[0][:-len(FULL_SUFFIX)]
+    return f"{stem}_{size}.webp"
+
+
+def image_url(path, size=None):
+    """Возвращает путь к изображению нужного размера.
+
+    Для старых загрузок и изображений по умолчанию, у которых нет миниатюр,
+    возвращается исходный путь (для файлов из static — неизменяемый путь из манифеста).
+
+    Args:
+        path: Сохранённый путь (например, 'media/ab/<хэш>_full.jpg').
+        size: Один из THUMBNAIL_SIZES или None для полноразмерной копии.
+    """
+    if not is_media_path(path):
+        return asset_url(path)
+    if size is None or size not in THUMBNAIL_SIZES or not is_processed(path):
+        return path
+    return variant_path(path, size)
+
+
+def image_urls(path):
+    """Возвращает пути ко всем размерам изображения: {'full': ..., '32': ..., '64': ..., '256': ...}."""
+    if not path:
+        return None
+    urls = {'full': image_url(path)}
+    urls.update({str(size): image_url(path, size) for size in THUMBNAIL_SIZES})
+    return urls
+
+
+def image_files(path):
+    """Возвращает относительные пути всех файлов изображения (копия и миниатюры)."""
+    if not is_processed(path):
+        return [path]
+    return [path] + [variant_path(path, size) for size in THUMBNAIL_SIZES]
@@ -0,0 +1,255 @@
+import string
+from uuid import UUID, uuid4
+
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.orm.util import identity_key
+from app.extensions import db
+from app.models import Game, Map, Match, Team, Tournament
+from app.services.match_service import check_match_version
+from app.services.unit_of_work import transactional
+
+
+# Pool indexes are stored as one base36 digit per step
+VETO_MAX_POOL = 36
+MAP_NAME_MAX_LENGTH = 64
+_DIGITS = string.digits + string.ascii_lowercase
+
+
+def map_count(format_: str) -> int:
+    """
+    Number of maps of a match format.
+
+    Raises:
+        ValueError: If the format is not 'boX'.
+    """
+    if not format_ or not format_.startswith("bo"):
+        raise ValueError("Invalid match format. Expected 'boX' (e.g., 'bo3')")
+    try:
+        return int(format_[2:])
+    except ValueError:
+        raise ValueError("Invalid match format. Expected 'boX' where X is a number")
+
+
+def validate_pool(maps) -> list[str]:
+    """
+    Check a map pool and return it with the names stripped.
+
+    Raises:
+        ValueError: If the pool is not a list of unique non-empty names or is too large.
+    """
+    if not isinstance(maps, list):
+        raise ValueError("Map pool must be a list of map names")
+    pool = [name.strip() if isinstance(name, str) else '' for name in maps]
+    if any(not name or len(name) > MAP_NAME_MAX_LENGTH for name in pool):
+        raise ValueError(f"Map names must be non-empty strings of up to {MAP_NAME_MAX_LENGTH} characters")
+    if len(set(pool)) != len(pool):
+        raise ValueError("Map names in the pool must be unique")
+    if len(pool) > VETO_MAX_POOL:
+        raise ValueError(f"Map pool cannot have more than {VETO_MAX_POOL} maps")
+    return pool
+
+
+def veto_plan(pool_size: int, num_maps: int) -> str:
+    """
+    Order of the veto steps for a pool and a match format: 'b' for a ban, 'p' for a pick.
+
+    Two opening bans, then the picks, then the remaining bans; the map left over is the
+    decider (e.g. 7 maps, bo3: 'bbppbb'; bo1: 'bbbbbb'). Participants alternate, the first
+    participant starts.
+
+    Raises:
+        ValueError: If the pool has fewer maps than the match plays.
+    """
+    if pool_size < num_maps:
+        raise ValueError(f"Map pool has {pool_size} maps, the format needs {num_maps}")
+    bans, picks = pool_size - num_maps, num_maps - 1
+    opening = min(2, bans) if picks else bans
+    return 'b' * opening + 'p' * picks + 'b' * (bans - opening)
+
+
+def _steps(log: str):
+    # (side, action, pool index) for every 2-character step of the log
+    return [
+        (1 if log[i].isupper() else 2, 'pick' if log[i] in 'Pp' else 'ban', int(log[i + 1], 36))
+        for i in range(0, len(log), 2)
+    ]
+
+
+def veto_state(veto: dict | None, format_: str) -> dict | None:
+    """
+    Decode the veto of a match for display.
+
+    Args:
+        veto: The stored veto (Match.veto).
+        format_: The match format.
+
+    Returns:
+        dict: The pool, the steps taken, the remaining maps, whose turn is next
+        ({'side': 1 or 2, 'action': 'ban' or 'pick'}, None when finished) and, once
+        finished, the maps in playing order; None if the match has no veto.
+    """
+    if not veto:
+        return None
+    pool, log = veto['pool'], veto['log']
+    plan = veto_plan(len(pool), map_count(format_))
+    steps = _steps(log)
+    taken = {index for _, _, index in steps}
+    remaining = [name for index, name in enumerate(pool) if index not in taken]
+    done = len(steps) == len(plan)
+    return {
+        'pool': pool,
+        'steps': [{'side': side, 'action': action, 'map': pool[index]} for side, action, index in steps],
+        'remaining': remaining,
+        'next': None if done else {
+            'side': 1 if len(steps) % 2 == 0 else 2,
+            'action': 'pick' if plan[len(steps)] == 'p' else 'ban'
+        },
+        'maps': [pool[index] for _, action, index in steps if action == 'pick'] + remaining if done else None,
+        'done': done,
+    }
+
+
+def new_veto(pool: list | None, num_maps: int) -> dict | None:
+    """Initial veto of a match starting with a game's map pool (None if the game has no pool)."""
+    if not pool:
+        return None
+    veto_plan(len(pool), num_maps)
+    return {'pool': list(pool), 'log': ''}
+
+
+def game_map_pool(tournament_id: UUID) -> list | None:
+    """Map pool of a tournament's game (one query)."""
+    return db.session.execute(
+        select(Game.map_pool).join(Tournament, Tournament.game_id == Game.id)
+        .where(Tournament.id == tournament_id)
+    ).scalar()
+
+
+def create_maps(matches: list):
+    """
+    Create the map rows of started matches with one bulk INSERT.
+
+    Args:
+        matches: (match id, format, veto) tuples; a finished veto names the maps right away.
+    """
+    rows = []
+    for match_id, format_, veto in matches:
+        num_maps = map_count(format_)
+        state = veto_state(veto, format_)
+        names = state['maps'] if state and state['done'] else [None] * num_maps
+        rows.extend(
+            {'id': uuid4(), 'match_id': match_id, 'number': number, 'name': name}
+            for number, name in enumerate(names, start=1)
+        )
+    if rows:
+        db.session.execute(insert(Map), rows)
+    for match_id, _, _ in matches:
+        loaded = db.session.identity_map.get(identity_key(Match, match_id))
+        if loaded is not None:
+            db.session.expire(loaded, ['maps'])
+
+
+def _name_maps(match_id: UUID, names: list):
+    # One executemany UPDATE: map number -> name
+    table = Map.__table__
+    db.session.execute(
+        update(table)
+        .where(table.c.match_id == match_id, table.c.number == bindparam('map_number'))
+        .values(name=bindparam('map_name')),
+        [{'map_number': number, 'map_name': name} for number, name in enumerate(names, start=1)]
+    )
+    loaded = db.session.identity_map.get(identity_key(Match, match_id))
+    if loaded is not None:
+        db.session.expire(loaded, ['maps'])
+
+
+def get_veto(tournament_id: UUID, match_id: UUID) -> dict | None:
+    """
+    Veto state of a match for spectators, read from the match row alone.
+
+    Raises:
+        ValueError: If the match is not found in the tournament.
+    """
+    row = db.session.execute(
+        select(Match.veto, Match.format)
+        .where(Match.id == match_id, Match.tournament_id == tournament_id)
+    ).first()
+    if row is None:
+        raise ValueError("Match not found")
+    return veto_state(row.veto, row.format)
+
+
+def veto_side(match: Match, user_id: UUID) -> int | None:
+    """
+    Side (1 or 2) a user acts for in a match: the participant itself or the leader of a team.
+
+    Match.type is the stage ('group' or 'playoff'); whether the participants are teams is
+    decided by the tournament type.
+
+    Returns:
+        int: The side, or None if the user is not a participant of the match.
+    """
+    if match.tournament.type == 'team':
+        leaders = dict(db.session.execute(
+            select(Team.id, Team.leader_id)
+            .where(Team.id.in_([match.participant1_id, match.participant2_id]))
+        ).all())
+        participants = [leaders.get(match.participant1_id), leaders.get(match.participant2_id)]
+    else:
+        participants = [match.participant1_id, match.participant2_id]
+    if user_id == participants[0]:
+        return 1
+    if user_id == participants[1]:
+        return 2
+    return None
+
+
+@transactional
+def apply_veto(tournament_id: UUID, match_id: UUID, side: int, map_name: str, expected_version: int = None):
+    """
+    Ban or pick a map in the veto of an ongoing match.
+
+    The action is the one the veto plan expects next (see veto_plan). When the last step is
+    taken the maps of the match are named in playing order: the picks, then the decider.
+
+    Args:
+        tournament_id: The UUID of the tournament.
+        match_id: The UUID of the match.
+        side: The side taking the step (1 or 2).
+        map_name: The map to ban or pick.
+        expected_version: The match version the client read (optional, compare-and-swap).
+
+    Returns:
+        dict: The new veto state (see veto_state).
+
+    Raises:
+        ValueError: If the match has no veto in progress, it is not this side's turn or the
+            map is not available.
+        StaleDataError: If the match was modified concurrently.
+    """
+    from app.services.tournament_service import get_match
+
+    match = get_match(tournament_id, match_id)
+    check_match_version(match, expected_version)
+    if match.status != 'ongoing' or not match.veto:
+        raise ValueError("Match has no map veto in progress")
+
+    state = veto_state(match.veto, match.format)
+    if state['done']:
+        raise ValueError("Map veto is already finished")
+    if side != state['next']['side']:
+        raise ValueError(f"It is participant {state['next']['side']}'s turn to {state['next']['action']} a map")
+    if map_name not in state['remaining']:
+        raise ValueError("Map is not available in the veto")
+
+    pool = match.veto['pool']
+    letter = 'p' if state['next']['action'] == 'pick' else 'b'
+    step = (letter.upper() if side == 1 else letter) + _DIGITS[pool.index(map_name)]
+    # A new dict, so that the JSON column is marked as changed (and the version is bumped)
+    match.veto = {'pool': pool, 'log': match.veto['log'] + step}
+    db.session.flush()
+
+    state = veto_state(match.veto, match.format)
+    if state['done']:
+        _name_maps(match.id, state['maps'])
+    return state
@@ -0,0 +1,433 @@
+from uuid import UUID
+from datetime import datetime, timedelta, UTC
+from flask import current_app
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.orm.exc import StaleDataError
+from app.extensions import db
+from app.models import Tournament, GroupStage, Match, Group, User, Team, IdempotencyKey
+from app.services.unit_of_work import unit_of_work, run_deferred, savepoint
+
+
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+OPEN_MATCH_STATUSES = ("scheduled", "ongoing")
+
+
+def check_match_version(match: Match, expected_version: int | None):
+    """
+    Compare the client's view of a match with its current version.
+
+    Args:
+        match: The match being updated.
+        expected_version: The version the client read (e.g. from If-Match), or None to skip the check.
+
+    Raises:
+        StaleDataError: If the match has been modified since the client read it.
+    """
+    if expected_version is not None and match.version != expected_version:
+        raise StaleDataError(
+            f"Match {match.id} has version {match.version}, expected {expected_version}")
+
+
+def _utcnow():
+    # Naive UTC, like the other match timestamps
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def set_match_status(match: Match, status: str):
+    """
+    Change the status of a match, keeping the open match counters of its tournament,
+    group stage and group in step.
+
+    Every status change of a match must go through this function, so that stage and tournament
+    completion can be decided from the counters instead of scanning the matches.
+
+    Args:
+        match: The match (new or persistent).
+        status: The new status ('scheduled', 'ongoing', 'completed' or 'cancelled').
+            Closing a match stamps Match.completed_at, reopening it clears the stamp.
+    """
+    was_open = match.status in OPEN_MATCH_STATUSES
+    is_open = status in OPEN_MATCH_STATUSES
+    match.status = status
+    if was_open != is_open:
+        match.completed_at = None if is_open else _utcnow()
+        _shift_open_matches(match, 1 if is_open else -1)
+
+
+def _shift_open_matches(match: Match, delta: int):
+    # Атомарный инкремент в БД (UPDATE ... SET open_matches = open_matches + delta),
+    # чтобы параллельные завершения матчей одной группы не теряли обновления.
+    # Значения из RETURNING попадают в объекты сессии, поэтому проверки читают их без запросов.
+    with db.session.no_autoflush:
+        targets = [(Tournament, match.tournament_id)]
+        if match.group_id:
+            group = db.session.get(Group, match.group_id)
+            targets += [(Group, group.id), (GroupStage, group.groupstage_id)]
+        for (model, id_), remaining in zip(targets, _increment_open_matches(targets, delta)):
+            _sync_open_matches(model, id_, remaining)
+
+
+def _increment_open_matches(targets: list, delta: int) -> list:
+    # Счётчики турнира, этапа и группы сдвигаются одним запросом: на PostgreSQL UPDATE
+    # выполняются как изменяющие CTE, и строка турнира блокируется один раз за смену статуса.
+    # SQLite таких CTE не поддерживает — там по запросу на таблицу
+    statements = [
+        update(model).where(model.id == id_)
+        .values(open_matches=model.open_matches + delta)
+        .returning(model.open_matches)
+        for model, id_ in targets
+    ]
+    if len(statements) > 1 and db.session.get_bind().dialect.name == 'postgresql':
+        # Скалярные подзапросы: строка, которой нет, даёт NULL, а не пустой результат
+        ctes = [statement.cte(f'shift_{index}') for index, statement in enumerate(statements)]
+        return list(db.session.execute(
+            select(*(select(cte.c.open_matches).scalar_subquery() for cte in ctes))
+        ).one())
+    return [
+        db.session.execute(statement, execution_options={"synchronize_session": False}).scalar()
+        for statement in statements
+    ]
+
+
+def _sync_open_matches(model, id_, remaining: int | None):
+    # Нет строки (удалена параллельно) — синхронизировать нечего
+    if remaining is None:
+        return
+    # Отрицательный счётчик означает рассинхронизацию (например, строки до появления счётчиков):
+    # пересчитываем его по матчам, прежде чем по нему решать завершение этапа
+    if remaining < 0:
+        current_app.logger.warning(
+            "open_matches of %s %s is %s, recounting", model.__tablename__, id_, remaining)
+        # Пересчёт должен видеть новый статус матча
+        db.session.flush()
+        remaining = db.session.execute(
+            update(model)
+            .where(model.id == id_)
+            .values(open_matches=_open_matches_count(model))
+            .returning(model.open_matches),
+            execution_options={"synchronize_session": False}
+        ).scalar()
+    loaded = db.session.identity_map.get(identity_key(model, id_))
+    if loaded is not None:
+        set_committed_value(loaded, "open_matches", remaining)
+
+
+def _open_matches_count(model):
+    # Correlated count of the open matches of a tournament, group stage or group
+    open_ = Match.status.in_(OPEN_MATCH_STATUSES)
+    if model is Tournament:
+        condition = Match.tournament_id == Tournament.id
+    elif model is Group:
+        condition = Match.group_id == Group.id
+    else:
+        condition = Match.group_id.in_(
+            select(Group.id).where(Group.groupstage_id == GroupStage.id).scalar_subquery())
+    return select(func.count(Match.id)).where(open_, condition).scalar_subquery()
+
+
+def recount_open_matches(tournament_id: UUID = None) -> int:
+    """
+    Recompute the open match counters of tournaments, group stages and groups from the matches.
+
+    Needed once for rows created before the counters existed, and whenever they may have
+    drifted (e.g. after editing matches by hand). One UPDATE per table; the caller commits.
+
+    Args:
+        tournament_id: Recount one tournament only (all tournaments by default).
+
+    Returns:
+        int: The number of corrected counters.
+    """
+    corrected = 0
+    for model in (Tournament, GroupStage, Group):
+        count = _open_matches_count(model)
+        statement = update(model).where(model.open_matches != count).values(open_matches=count)
+        if tournament_id is not None:
+            if model is Tournament:
+                statement = statement.where(Tournament.id == tournament_id)
+            elif model is GroupStage:
+                statement = statement.where(GroupStage.tournament_id == tournament_id)
+            else:
+                statement = statement.where(Group.groupstage_id.in_(
+                    select(GroupStage.id).where(GroupStage.tournament_id == tournament_id)))
+        corrected += db.session.execute(statement, execution_options={"synchronize_session": False}).rowcount
+    for loaded in list(db.session.identity_map.values()):
+        if isinstance(loaded, (Tournament, GroupStage, Group)):
+            db.session.expire(loaded, ['open_matches'])
+    return corrected
+
+
+def get_idempotent_response(user_id: UUID, key: str):
+    """
+    Retrieve the stored outcome of a previously processed request.
+
+    Args:
+        user_id: The UUID of the user who sent the request.
+        key: The client-provided Idempotency-Key.
+
+    Returns:
+        IdempotencyKey: The stored record, or None if the key has not been used yet.
+    """
+    return IdempotencyKey.query.filter_by(user_id=user_id, key=key).first()
+
+
+def claim_idempotency_key(user_id: UUID, key: str, endpoint: str, request_hash: str):
+    """
+    Reserve an Idempotency-Key inside the current unit of work, before the request writes anything.
+
+    The key row is inserted with an empty response and committed together with the request's
+    own changes, so a crash cannot apply the write without the key. A concurrent request with
+    the same key waits on the unique constraint until the first one commits or rolls back.
+
+    Args:
+        user_id: The UUID of the user who sent the request.
+        key: The client-provided Idempotency-Key.
+        endpoint: The request path the key is used for.
+        request_hash: SHA-256 of the request body.
+
+    Returns:
+        tuple: (record, claimed) — the new pending record and True, or the record of the
+        request that used the key first and False.
+    """
+    record = IdempotencyKey(user_id=user_id, key=key, endpoint=endpoint, request_hash=request_hash)
+    try:
+        with db.session.begin_nested():
+            db.session.add(record)
+            db.session.flush()
+    except IntegrityError:
+        return get_idempotent_response(user_id, key), False
+    return record, True
+
+
+def store_idempotent_response(record: IdempotencyKey, status_code: int, response: str):
+    """
+    Fill the response of a claimed key; it is committed with the request's unit of work.
+
+    Args:
+        record: The record returned by claim_idempotency_key.
+        status_code: The HTTP status code of the response.
+        response: The serialized JSON response body.
+    """
+    record.status_code = status_code
+    record.response = response
+    db.session.flush()
+
+
+def remove_expired_idempotency_keys():
+    cutoff = datetime.now(UTC) - IDEMPOTENCY_KEY_TTL
+    deleted = IdempotencyKey.query.filter(
+        IdempotencyKey.created_at < cutoff).delete()
+    db.session.commit()
+    print(f"[Auto-clean] Удалено {deleted} просроченных ключей идемпотентности")
+
+
+BULK_RESULTS_LIMIT = 500
+
+
+def load_tournament_snapshot(tournament_id: UUID):
+    """
+    Load everything needed to validate and apply results of a tournament with a few queries.
+
+    The loaded objects stay in the session identity map, so the service functions applying
+    the results look them up by primary key without further round trips.
+
+    Args:
+        tournament_id: The UUID of the tournament.
+
+    Returns:
+        dict: The tournament, its matches and maps keyed by id.
+
+    Raises:
+        ValueError: If the tournament is not found.
+    """
+    tournament = Tournament.query.get(tournament_id)
+    if not tournament:
+        raise ValueError("Tournament not found")
+
+    matches = Match.query.options(
+        selectinload(Match.maps),
+        joinedload(Match.playoff_match)
+    ).filter_by(tournament_id=tournament_id).all()
+
+    groups = []
+    if tournament.group_stage:
+        groups = Group.query.options(selectinload(Group.rows)).filter_by(
+            groupstage_id=tournament.group_stage.id).all()
+
+    participant_ids = {
+        participant_id for match in matches
+        for participant_id in (match.participant1_id, match.participant2_id)
+        if participant_id
+    }
+    if participant_ids:
+        model = Team if tournament.type == "team" else User
+        model.query.filter(model.id.in_(participant_ids)).all()
+
+    return {
+        "tournament": tournament,
+        "groups": groups,
+        "matches": {match.id: match for match in matches},
+        "maps": {map_.id: map_ for match in matches for map_ in match.maps},
+    }
+
+
+def _parse_result(raw: dict):
+    if not isinstance(raw, dict) or not raw.get("match_id"):
+        raise ValueError("match_id is required")
+    winner_id = raw.get("winner_id")
+    version = raw.get("version")
+    return {
+        "match_id": UUID(str(raw["match_id"])),
+        "map_id": UUID(str(raw["map_id"])) if raw.get("map_id") else None,
+        "winner_id": UUID(str(winner_id)) if winner_id else None,
+        "version": int(version) if version is not None else None,
+    }
+
+
+def _validate_result(snapshot: dict, item: dict, seen: set):
+    match = snapshot["matches"].get(item["match_id"])
+    if not match:
+        raise ValueError("Match not found in this tournament")
+    if match.status in ("completed", "cancelled"):
+        raise ValueError("Match is already completed or cancelled")
+
+    target = item["map_id"] or item["match_id"]
+    if target in seen:
+        raise ValueError("Duplicate result in the batch")
+    seen.add(target)
+
+    if item["map_id"]:
+        map_ = snapshot["maps"].get(item["map_id"])
+        if not map_ or map_.match_id != match.id:
+            raise ValueError("Map not found or does not belong to the match")
+        if map_.winner_id is not None:
+            raise ValueError("Map already completed")
+    elif item["winner_id"] is None and match.format != "bo2":
+        raise ValueError("winner_id is required")
+
+    if match.participant1_id and match.participant2_id:
+        if item["winner_id"] and item["winner_id"] not in (match.participant1_id, match.participant2_id):
+            raise ValueError("Winner must be one of the match participants")
+    elif match.group_id:
+        raise ValueError("Group stage matches must have both participants")
+    # Участники матчей плей-офф могут определиться результатами этого же пакета,
+    # такие записи проверяются при применении
+
+    return match
+
+
+def apply_bulk_results(tournament_id: UUID, results: list):
+    """
+    Validate and apply a batch of match and map results in one transaction.
+
+    All results are validated against one preloaded snapshot of the tournament, then applied
+    in dependency order through complete_map and complete_match: group stage results, then
+    group standings and group stage completion, then playoff results round by round. The
+    loaded objects stay in the identity map, so the service functions do not query them again,
+    and the steps they defer (standings, achievements, rescheduling) run once per batch.
+
+    Each phase runs in one savepoint. If one of its results is rejected, the phase is rolled
+    back and replayed result by result, each in its own savepoint, so only the rejected
+    results are left out; the steps a rejected result deferred are dropped with it.
+
+    Args:
+        tournament_id: The UUID of the tournament.
+        results: List of dicts with match_id, optional map_id, winner_id (None for a draw)
+            and optional version. The version is compared with the match as loaded for the
+            batch, also for several results of one match.
+
+    Returns:
+        list: Per-result outcomes in the order of the request.
+
+    Raises:
+        ValueError: If the tournament is not found or the batch is empty or too large.
+    """
+    from app.services.tournament_service import complete_map, complete_match
+
+    if not results:
+        raise ValueError("No results provided")
+    if len(results) > BULK_RESULTS_LIMIT:
+        raise ValueError(
+            f"Too many results in one batch (max {BULK_RESULTS_LIMIT})")
+
+    outcomes = [None] * len(results)
+
+    def apply(item: dict, versions: dict):
+        # Versions are compared with the snapshot; the ORM still checks the row on flush
+        version = item["version"]
+        if version is not None and version != versions[item["match_id"]]:
+            raise StaleDataError(
+                f"Match {item['match_id']} has version {versions[item['match_id']]}, expected {version}")
+        if item["map_id"]:
+            complete_map(tournament_id, item["match_id"], item["map_id"], item["winner_id"])
+        else:
+            complete_match(tournament_id, item["match_id"], item["winner_id"])
+
+    def applied(index: int, item: dict):
+        match = db.session.get(Match, item["match_id"])
+        outcomes[index] = {"index": index, "status": "applied",
+                           "match_status": match.status, "version": match.version}
+
+    def rejected(index: int, error: Exception):
+        msg = "Match was modified concurrently" if isinstance(error, StaleDataError) else str(error)
+        outcomes[index] = {"index": index, "status": "rejected", "msg": msg}
+
+    def apply_phase(snapshot: dict, items: list):
+        if not items:
+            return
+        versions = {match_id: match.version for match_id, match in snapshot["matches"].items()}
+        try:
+            with savepoint():
+                for _, item in items:
+                    apply(item, versions)
+        except (StaleDataError, ValueError):
+            for index, item in items:
+                try:
+                    with savepoint():
+                        apply(item, versions)
+                except (StaleDataError, ValueError) as e:
+                    rejected(index, e)
+                else:
+                    applied(index, item)
+            return
+        for index, item in items:
+            applied(index, item)
+
+    with unit_of_work():
+        snapshot = load_tournament_snapshot(tournament_id)
+
+        group_items, playoff_items, seen = [], [], set()
+        for index, raw in enumerate(results):
+            try:
+                item = _parse_result(raw)
+                match = _validate_result(snapshot, item, seen)
+            except (ValueError, TypeError) as e:
+                outcomes[index] = {"index": index, "status": "rejected", "msg": str(e)}
+                continue
+            if match.group_id:
+                group_items.append((int(match.number or 0), index, item))
+            else:
+                round_number = int(
+                    match.playoff_match.round_number) if match.playoff_match else 0
+                playoff_items.append(
+                    (round_number, int(match.number or 0), index, item))
+
+        apply_phase(snapshot, [(index, item) for *_, index, item in sorted(group_items, key=lambda x: x[:2])])
+
+        # Таблицы групп и переход в плей-офф до результатов плей-офф
+        run_deferred()
+
+        if playoff_items:
+            # Seeding the playoff may have changed the bracket: start from a fresh snapshot
+            snapshot = load_tournament_snapshot(tournament_id)
+            apply_phase(snapshot, [(index, item) for *_, index, item in sorted(playoff_items, key=lambda x: x[:3])])
+
+    for outcome, raw in zip(outcomes, results):
+        if isinstance(raw, dict):
+            outcome["match_id"] = raw.get("match_id")
+            outcome["map_id"] = raw.get("map_id")
+    return outcomes
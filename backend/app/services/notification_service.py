@@ -0,0 +1,182 @@
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.models import Notification, NotificationCounter, UserRequest
+
+
+# Тип заявки -> (уведомление получателю, уведомление отправителю о принятии, счётчик)
+REQUEST_NOTIFICATIONS = {
+    'friend': ('friend_request', 'friend_accepted', 'pending_friend_requests'),
+    'team': ('team_invite', 'team_invite_accepted', 'pending_team_invites'),
+}
+COUNTER_FIELDS = ('unread', 'pending_friend_requests', 'pending_team_invites')
+
+
+def _ensure_counter(user_id):
+    """Создаёт строку счётчиков, если её нет, пересчитав значения по текущим данным.
+
+    Вызывается до добавления новых уведомлений и изменения заявок (без autoflush), чтобы
+    пересчёт не учёл изменения, которые затем ещё раз прибавит _bump.
+    """
+    with db.session.no_autoflush:
+        if db.session.get(NotificationCounter, user_id) is not None:
+            return
+        counter = NotificationCounter(user_id=user_id, **_count_from_scratch(user_id))
+        try:
+            with db.session.begin_nested():
+                db.session.add(counter)
+        except IntegrityError:
+            # Строку параллельно создал другой запрос
+            pass
+
+
+def _count_from_scratch(user_id):
+    pending = dict(db.session.execute(
+        select(UserRequest.type, func.count())
+        .where(UserRequest.to_user_id == user_id, UserRequest.status == 'pending')
+        .group_by(UserRequest.type)
+    ).all())
+    unread = db.session.execute(
+        select(func.count()).select_from(Notification)
+        .where(Notification.user_id == user_id, Notification.is_read.is_(False))
+    ).scalar()
+    return {
+        'unread': unread,
+        'pending_friend_requests': pending.get('friend', 0),
+        'pending_team_invites': pending.get('team', 0),
+    }
+
+
+def _bump(user_id, **deltas):
+    """Атомарно изменяет счётчики пользователя (UPDATE ... SET x = x + d)."""
+    values = {field: getattr(NotificationCounter, field) + delta
+              for field, delta in deltas.items() if delta}
+    if not values:
+        return
+    db.session.execute(
+        update(NotificationCounter)
+        .where(NotificationCounter.user_id == user_id)
+        .values(**values, updated_at=func.now()),
+        execution_options={"synchronize_session": False}
+    )
+    counter = db.session.identity_map.get(
+        db.session.identity_key(NotificationCounter, user_id))
+    if counter is not None:
+        db.session.expire(counter)
+
+
+def notify(user_id, type_, actor_id=None, request_id=None, team_id=None):
+    """Добавляет уведомление во входящие пользователя и увеличивает счётчик непрочитанных.
+
+    Args:
+        user_id: UUID получателя.
+        type_: Тип уведомления (см. REQUEST_NOTIFICATIONS).
+        actor_id: UUID пользователя, вызвавшего уведомление.
+        request_id: UUID связанной заявки.
+        team_id: UUID связанной команды.
+
+    Returns:
+        Notification: Созданное уведомление.
+    """
+    _ensure_counter(user_id)
+    notification = Notification(user_id=user_id, type=type_, actor_id=actor_id,
+                                request_id=request_id, team_id=team_id)
+    db.session.add(notification)
+    _bump(user_id, unread=1)
+    return notification
+
+
+def on_request_created(user_request):
+    """Уведомляет получателя о новой заявке в друзья или приглашении в команду.
+
+    Вызывается сразу после db.session.add(user_request), до коммита.
+    """
+    notification_type, _, pending_field = REQUEST_NOTIFICATIONS[user_request.type]
+    _ensure_counter(user_request.to_user_id)
+    db.session.flush([user_request])
+    notify(user_request.to_user_id, notification_type, actor_id=user_request.from_user_id,
+           request_id=user_request.id, team_id=user_request.team_id)
+    _bump(user_request.to_user_id, **{pending_field: 1})
+
+
+def on_request_resolved(user_request, accepted):
+    """Обновляет счётчики получателя после ответа на заявку (или её отзыва отправителем).
+
+    Вызывается до изменения статуса или удаления заявки. Уведомление о заявке отмечается
+    прочитанным; при принятии отправитель получает уведомление.
+
+    Args:
+        user_request: Заявка со статусом pending.
+        accepted: True, если заявка принята.
+    """
+    _, accepted_type, pending_field = REQUEST_NOTIFICATIONS[user_request.type]
+    recipient_id = user_request.to_user_id
+    _ensure_counter(recipient_id)
+
+    was_unread = db.session.execute(
+        update(Notification)
+        .where(Notification.request_id == user_request.id, Notification.is_read.is_(False))
+        .values(is_read=True),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+    _bump(recipient_id, unread=-was_unread, **{pending_field: -1})
+
+    if accepted:
+        notify(user_request.from_user_id, accepted_type, actor_id=recipient_id,
+               team_id=user_request.team_id)
+
+
+def on_requests_discarded(user_requests):
+    """Обновляет счётчики получателей перед удалением заявок вместе с командой или отправителем.
+
+    Ожидающие заявки учитываются как отозванные (см. on_request_resolved), на уже отвеченные
+    счётчики не влияют.
+    """
+    for user_request in user_requests:
+        if user_request.status == 'pending':
+            on_request_resolved(user_request, accepted=False)
+
+
+def get_summary(user_id):
+    """Возвращает счётчики для значка уведомлений одним чтением по первичному ключу.
+
+    Returns:
+        dict: {'unread': ..., 'pending_friend_requests': ..., 'pending_team_invites': ...}
+    """
+    counter = db.session.get(NotificationCounter, user_id)
+    if counter is None:
+        # Счётчики ещё не создавались (например, заявки появились до их введения)
+        return _count_from_scratch(user_id)
+    return {field: getattr(counter, field) for field in COUNTER_FIELDS}
+
+
+def get_notifications(user_id, limit=20, before=None):
+    """Возвращает уведомления пользователя, новые сверху.
+
+    Args:
+        user_id: UUID пользователя.
+        limit: Размер страницы.
+        before: created_at последнего уведомления предыдущей страницы.
+    """
+    query = Notification.query.filter(Notification.user_id == user_id)
+    if before is not None:
+        query = query.filter(Notification.created_at < before)
+    return query.order_by(Notification.created_at.desc()).limit(limit).all()
+
+
+def mark_read(user_id, notification_ids=None):
+    """Отмечает уведомления прочитанными (все, если notification_ids не указан).
+
+    Returns:
+        int: Сколько уведомлений было отмечено.
+    """
+    _ensure_counter(user_id)
+    query = update(Notification).where(
+        Notification.user_id == user_id, Notification.is_read.is_(False))
+    if notification_ids is not None:
+        query = query.where(Notification.id.in_(notification_ids))
+    marked = db.session.execute(
+        query.values(is_read=True), execution_options={"synchronize_session": False}
+    ).rowcount
+    _bump(user_id, unread=-marked)
+    return marked
@@ -0,0 +1,275 @@
+import math
+from collections import defaultdict
+from typing import NamedTuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm.util import identity_key
+from app.extensions import db
+from app.models import Match, PlayoffStage, PlayoffStageMatch, PrizeTable, PrizeTableRow, Tournament
+
+
+DEFAULT_DISTRIBUTION = 'top3'
+# Limits of the distribution options, which come from the request body
+MAX_PRIZE_PLACES = 256
+MAX_CURVE_EXPONENT = 10
+
+# name -> function(**options) returning the shares of places 1..N in percent
+_DISTRIBUTIONS = {}
+
+
+class PrizeRow(NamedTuple):
+    place: int
+    prize: float
+    participant_id: UUID | None = None
+
+
+def distribution(name: str):
+    """Register a prize distribution: a function of its options returning percentages for places 1..N."""
+    def register(func):
+        _DISTRIBUTIONS[name] = func
+        return func
+    return register
+
+
+@distribution('top3')
+def _top3():
+    return [50, 30, 20]
+
+
+@distribution('winner_takes_all')
+def _winner_takes_all():
+    return [100]
+
+
+@distribution('top_n')
+def _top_n(places: int = 3):
+    # Linear: place k of n gets a weight of n - k + 1
+    return [places - index for index in range(places)]
+
+
+@distribution('curve')
+def _curve(places: int = 8, exponent: float = 1.0):
+    # Power curve: place k gets a weight of 1 / k^exponent (exponent 0 splits evenly)
+    exponent = float(exponent)
+    if not -MAX_CURVE_EXPONENT <= exponent <= MAX_CURVE_EXPONENT:
+        raise ValueError(f"exponent must be between {-MAX_CURVE_EXPONENT} and {MAX_CURVE_EXPONENT}")
+    return [1 / (place ** exponent) for place in range(1, places + 1)]
+
+
+@distribution('custom')
+def _custom(shares: list = ()):
+    if not isinstance(shares, (list, tuple)):
+        raise ValueError("shares must be a list")
+    return list(shares)
+
+
+def _check_places(options: dict, max_places: int):
+    # The number of places a client asks for, explicitly or through the custom shares
+    limit = min(max_places, MAX_PRIZE_PLACES) if max_places else MAX_PRIZE_PLACES
+    places = options.get('places')
+    if places is not None and (isinstance(places, bool) or not isinstance(places, int) or not 1 <= places <= limit):
+        raise ValueError(f"places must be an integer from 1 to {limit}")
+    shares = options.get('shares')
+    if isinstance(shares, (list, tuple)) and len(shares) > limit:
+        raise ValueError(f"Prize shares cannot cover more than {limit} places")
+
+
+def prize_shares(name: str = DEFAULT_DISTRIBUTION, options: dict = None, max_places: int = None) -> list[float]:
+    """
+    Compute the shares of the prize fund for places 1..N.
+
+    Args:
+        name: A registered distribution ('top3', 'winner_takes_all', 'top_n', 'curve', 'custom').
+        options: Keyword options of the distribution (e.g. {'places': 8, 'exponent': 1.5}).
+        max_places: Upper bound of the places the options may ask for (e.g. the maximum number
+            of participants); never more than MAX_PRIZE_PLACES.
+
+    Returns:
+        list: Percentages for places 1..N, normalized to a total of 100.
+
+    Raises:
+        ValueError: If the distribution is unknown or its options are invalid.
+    """
+    func = _DISTRIBUTIONS.get(name)
+    if func is None:
+        raise ValueError(f"Unknown prize distribution: {name}")
+    options = options or {}
+    if not isinstance(options, dict):
+        raise ValueError(f"Invalid options for prize distribution {name}: expected an object")
+    try:
+        _check_places(options, max_places)
+        weights = [float(weight) for weight in func(**options)]
+    except (TypeError, ValueError, ArithmeticError) as e:
+        raise ValueError(f"Invalid options for prize distribution {name}: {e}")
+    if not weights or any(weight < 0 for weight in weights) or not 0 < sum(weights) < math.inf:
+        raise ValueError("Prize shares must be non-negative with a positive total")
+    total = sum(weights)
+    return [weight * 100 / total for weight in weights]
+
+
+def compute_rows(prize_fund: float, shares: list, placements: list = None, split_ties: bool = True) -> list[PrizeRow]:
+    """
+    Turn the shares and the final placements into prize table rows, in memory.
+
+    Participants tied at place p (e.g. both semifinal losers at 3rd) cover places p..p+k-1:
+    with split_ties they all get place p and an equal part of those places' prizes; otherwise
+    they take the places in bracket order. Places without a participant keep an empty row.
+
+    Args:
+        prize_fund: The prize fund.
+        shares: Percentages for places 1..N (see prize_shares).
+        placements: (place, [participant ids]) pairs ordered by place (see resolve_placements).
+        split_ties: Whether tied participants share the prizes of the places they cover.
+
+    Returns:
+        list: PrizeRow tuples ordered by place.
+    """
+    amounts = [round(prize_fund * share / 100, 2) for share in shares]
+    rows, covered = [], 0
+    for place, participant_ids in placements or ():
+        if place > len(amounts):
+            break
+        places = amounts[place - 1:place - 1 + len(participant_ids)]
+        for index, participant_id in enumerate(participant_ids):
+            if split_ties:
+                rows.append(PrizeRow(place, round(sum(places) / len(participant_ids), 2), participant_id))
+            elif index < len(places):
+                rows.append(PrizeRow(place + index, places[index], participant_id))
+        covered = place - 1 + len(participant_ids)
+    rows.extend(PrizeRow(place, amounts[place - 1]) for place in range(covered + 1, len(amounts) + 1))
+    return rows
+
+
+def resolve_placements(tournament_id: UUID) -> list:
+    """
+    Read the final placements from the playoff bracket with one query.
+
+    The final decides 1st and 2nd; the losers of a round with m matches share place m + 1
+    (semifinal losers 3rd, quarterfinal losers 5th, ...). Walkovers have no loser.
+
+    Args:
+        tournament_id: The UUID of the tournament.
+
+    Returns:
+        list: (place, [participant ids]) pairs ordered by place; empty if the final has no winner.
+    """
+    rows = db.session.execute(
+        select(PlayoffStageMatch.round_number, Match.participant1_id, Match.participant2_id, Match.winner_id)
+        .join(Match, Match.playoff_match_id == PlayoffStageMatch.id)
+        .join(PlayoffStage, PlayoffStageMatch.playoff_id == PlayoffStage.id)
+        .where(PlayoffStage.tournament_id == tournament_id, PlayoffStageMatch.bracket == 'winner')
+        .order_by(Match.number)
+    ).all()
+    rounds = defaultdict(list)
+    for row in rows:
+        rounds[int(row.round_number)].append(row)
+    if not rounds:
+        return []
+    final = rounds[max(rounds)]
+    if len(final) != 1 or not final[0].winner_id:
+        return []
+
+    placements = [(1, [final[0].winner_id])]
+    for round_number in sorted(rounds, reverse=True):
+        losers = [
+            row.participant1_id if row.participant2_id == row.winner_id else row.participant2_id
+            for row in rounds[round_number]
+            if row.winner_id and row.participant1_id and row.participant2_id
+        ]
+        if losers:
+            placements.append((len(rounds[round_number]) + 1, losers))
+    return placements
+
+
+def write_rows(prize_table_id: UUID, rows: list, is_team: bool):
+    """Replace the rows of a prize table: one DELETE and one bulk INSERT."""
+    db.session.execute(
+        delete(PrizeTableRow).where(PrizeTableRow.prize_table_id == prize_table_id),
+        execution_options={"synchronize_session": False}
+    )
+    if rows:
+        db.session.execute(insert(PrizeTableRow), [
+            {'id': uuid4(), 'prize_table_id': prize_table_id, 'place': row.place, 'prize': str(row.prize),
+             'user_id': None if is_team else row.participant_id,
+             'team_id': row.participant_id if is_team else None}
+            for row in rows
+        ])
+    table = db.session.identity_map.get(identity_key(PrizeTable, prize_table_id))
+    if table is not None:
+        db.session.expire(table, ['rows'])
+
+
+def create_prize_table(tournament: Tournament, distribution_name: str = DEFAULT_DISTRIBUTION,
+                       options: dict = None, split_ties: bool = True) -> PrizeTable:
+    """
+    Create the prize table of a new tournament with its empty place rows.
+
+    Args:
+        tournament: The tournament (flushed).
+        distribution_name: The prize distribution (see prize_shares).
+        options: Options of the distribution.
+        split_ties: Whether tied participants share the prizes of the places they cover.
+
+    Returns:
+        PrizeTable: The created prize table.
+
+    Raises:
+        ValueError: If the distribution is invalid.
+    """
+    shares = prize_shares(distribution_name, options, tournament.max_players)
+    prize_table = PrizeTable(id=uuid4(), tournament_id=tournament.id, shares=shares, split_ties=split_ties)
+    db.session.add(prize_table)
+    db.session.flush()
+    prize_fund = float(tournament.prize_fund or 0)
+    # As before, empty rows are listed only when there is a prize fund
+    if prize_fund > 0:
+        write_rows(prize_table.id, compute_rows(prize_fund, shares), tournament.type == 'team')
+    return prize_table
+
+
+def _table_settings(tournament: Tournament):
+    settings = db.session.execute(
+        select(PrizeTable.id, PrizeTable.shares, PrizeTable.split_ties)
+        .where(PrizeTable.tournament_id == tournament.id)
+    ).first()
+    if settings is None:
+        return None
+    # Tables created before distributions were stored keep the default split
+    return settings.id, settings.shares or prize_shares(), settings.split_ties is not False
+
+
+def award_prizes(tournament: Tournament) -> list[PrizeRow]:
+    """
+    Fill the prize table of a finished tournament from its bracket.
+
+    Args:
+        tournament: The tournament.
+
+    Returns:
+        list: The written PrizeRow tuples.
+
+    Raises:
+        ValueError: If there is no prize table or the final has no winner.
+    """
+    settings = _table_settings(tournament)
+    if settings is None:
+        raise ValueError("Prize table is not set")
+    prize_table_id, shares, split_ties = settings
+    placements = resolve_placements(tournament.id)
+    if not placements:
+        raise ValueError("Final match is not completed or has no winner")
+    rows = compute_rows(float(tournament.prize_fund or 0), shares, placements, split_ties)
+    write_rows(prize_table_id, rows, tournament.type == 'team')
+    return rows
+
+
+def clear_prizes(tournament: Tournament):
+    """Restore the empty place rows of a tournament's prize table (e.g. when it is reset)."""
+    settings = _table_settings(tournament)
+    if settings is None:
+        return
+    prize_table_id, shares, _ = settings
+    prize_fund = float(tournament.prize_fund or 0)
+    write_rows(prize_table_id, compute_rows(prize_fund, shares) if prize_fund > 0 else [],
+               tournament.type == 'team')
@@ -0,0 +1,400 @@
+import heapq
+from collections import defaultdict
+from datetime import datetime, timedelta, UTC
+from typing import NamedTuple
+from uuid import UUID
+
+from flask import current_app
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+from app.extensions import db
+from app.models import Match, PlayoffStage, PlayoffStageMatch, Tournament
+from app.services.unit_of_work import transactional
+
+
+class ScheduleItem(NamedTuple):
+    id: object
+    number: int
+    duration: timedelta
+    status: str
+    # Start and station already set (for ongoing and finished matches they are kept)
+    start: datetime | None
+    station: int | None
+    # When a finished match actually ended (Match.completed_at)
+    end: datetime | None
+    # Participant keys: a participant never plays two matches at once and rests between them
+    participants: tuple
+    # Ids of the matches whose results this match waits for
+    depends: tuple
+    # A match starts only after every match of the earlier stages has ended (groups = 0, playoff = 1)
+    stage: int
+
+
+def _utcnow():
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def _naive_utc(value):
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(UTC).replace(tzinfo=None)
+    return value
+
+
+def slot_length(format_: str) -> timedelta:
+    """Time reserved for a match of the given format (SCHEDULE_SLOT_MINUTES)."""
+    minutes = current_app.config['SCHEDULE_SLOT_MINUTES'].get(format_)
+    if minutes is None:
+        try:
+            maps = int(format_[2:])
+        except (TypeError, ValueError):
+            maps = 1
+        minutes = current_app.config['SCHEDULE_MAP_MINUTES'] * maps
+    return timedelta(minutes=minutes)
+
+
+def _bottom_levels(items, children):
+    # Length of the longest chain of matches from each match to the end of the tournament
+    # (later stages included): the list-scheduling priority, critical path first
+    indegree = {item.id: 0 for item in items}
+    for item in items:
+        for child in children[item.id]:
+            indegree[child] += 1
+    order = [item_id for item_id, degree in indegree.items() if degree == 0]
+    for item_id in order:
+        for child in children[item_id]:
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                order.append(child)
+    if len(order) < len(items):
+        raise ValueError("Match dependencies contain a cycle")
+
+    by_id = {item.id: item for item in items}
+    position = {item_id: index for index, item_id in enumerate(order)}
+    levels, tail = {}, 0.0
+    for stage in sorted({item.stage for item in items}, reverse=True):
+        stage_items = sorted((item for item in items if item.stage == stage),
+                             key=lambda item: position[item.id], reverse=True)
+        stage_tail = tail
+        for item in stage_items:
+            after = max((levels[child] for child in children[item.id]), default=0.0)
+            levels[item.id] = by_id[item.id].duration.total_seconds() + max(after, tail)
+            stage_tail = max(stage_tail, levels[item.id])
+        tail = stage_tail
+    return levels
+
+
+def plan_schedule(items, stations: int, start: datetime, rest: timedelta, now: datetime = None) -> dict:
+    """
+    Assign start times and stations to matches with priority list scheduling.
+
+    Matches that are ongoing or over keep their times; an ongoing match holds its station until
+    it is expected to end. Every other match is placed, in order of its critical path, on the
+    first station that frees up once its dependencies and participants are ready:
+    a dependency is ready `rest` after it ends, and so is a participant after their previous match.
+
+    Args:
+        items: ScheduleItem of every match of the tournament.
+        stations: Number of stations (servers) matches run on in parallel.
+        start: Tournament start; no match is placed earlier.
+        rest: Minimum pause between consecutive matches of a participant or a bracket path.
+        now: Current time (defaults to start); no match is placed earlier.
+
+    Returns:
+        dict: Match id -> (start datetime, station number from 1) for the matches not started yet.
+
+    Raises:
+        ValueError: If there are no stations or the dependencies contain a cycle.
+    """
+    if stations < 1:
+        raise ValueError("At least one station is required")
+    now = now or start
+    origin = max(start, now)
+
+    fixed = [item for item in items if item.status != 'scheduled']
+    pending = [item for item in items if item.status == 'scheduled']
+    pending_ids = {item.id for item in pending}
+    ends, participant_free, station_free = {}, {}, {station: origin for station in range(1, stations + 1)}
+
+    for item in fixed:
+        begin = item.start or now
+        if item.status == 'ongoing':
+            end = max(now, begin + item.duration)
+            station = item.station if item.station in station_free else min(station_free, key=station_free.get)
+            station_free[station] = max(station_free[station], end)
+        else:
+            # Matches finished before completed_at was recorded end no later than now
+            end = item.end or min(now, begin + item.duration)
+        ends[item.id] = end
+        for participant in item.participants:
+            participant_free[participant] = max(participant_free.get(participant, origin), end + rest)
+
+    children = defaultdict(list)
+    remaining, dependency_ready = {}, {}
+    for item in pending:
+        remaining[item.id] = 0
+        dependency_ready[item.id] = origin
+        for dependency in item.depends:
+            if dependency in pending_ids:
+                children[dependency].append(item.id)
+                remaining[item.id] += 1
+            elif dependency in ends:
+                dependency_ready[item.id] = max(dependency_ready[item.id], ends[dependency] + rest)
+
+    stage_left = defaultdict(int)
+    stage_end = defaultdict(lambda: origin)
+    for item in pending:
+        stage_left[item.stage] += 1
+    for item in fixed:
+        stage_end[item.stage] = max(stage_end[item.stage], ends[item.id])
+
+    def stage_open(stage):
+        return all(left == 0 for other, left in stage_left.items() if other < stage)
+
+    def earliest(item):
+        barrier = max((stage_end[other] + rest for other in stage_end if other < item.stage), default=origin)
+        return max(dependency_ready[item.id], barrier,
+                   *(participant_free.get(participant, origin) for participant in item.participants))
+
+    levels = _bottom_levels(pending, children)
+    by_id = {item.id: item for item in pending}
+    # waiting: (earliest start, priority, number, id); available: ready by the current time
+    waiting, available, blocked = [], [], defaultdict(list)
+
+    def release(item):
+        if stage_open(item.stage):
+            heapq.heappush(waiting, (earliest(item), -levels[item.id], item.number, item.id))
+        else:
+            blocked[item.stage].append(item)
+
+    for item in pending:
+        if remaining[item.id] == 0:
+            release(item)
+
+    free_heap = [(free, station) for station, free in station_free.items()]
+    heapq.heapify(free_heap)
+    planned, current = {}, origin
+    while len(planned) < len(pending):
+        free, station = heapq.heappop(free_heap)
+        current = max(current, free)
+        while waiting and waiting[0][0] <= current:
+            _, priority, number, item_id = heapq.heappop(waiting)
+            heapq.heappush(available, (priority, number, item_id))
+
+        chosen = None
+        while available:
+            priority, number, item_id = heapq.heappop(available)
+            ready = earliest(by_id[item_id])
+            if ready <= current:
+                chosen = by_id[item_id]
+                break
+            # A participant got busy since the match was queued
+            heapq.heappush(waiting, (ready, priority, number, item_id))
+        if chosen is None:
+            if not waiting:
+                raise ValueError("Match dependencies cannot be satisfied")
+            heapq.heappush(free_heap, (free, station))
+            current = waiting[0][0]
+            continue
+
+        end = current + chosen.duration
+        planned[chosen.id] = (current, station)
+        heapq.heappush(free_heap, (end, station))
+        for participant in chosen.participants:
+            participant_free[participant] = end + rest
+        stage_end[chosen.stage] = max(stage_end[chosen.stage], end)
+        stage_left[chosen.stage] -= 1
+        for child in children[chosen.id]:
+            dependency_ready[child] = max(dependency_ready[child], end + rest)
+            remaining[child] -= 1
+            if remaining[child] == 0:
+                release(by_id[child])
+        if stage_left[chosen.stage] == 0:
+            for stage in sorted(blocked):
+                if stage_open(stage):
+                    for item in blocked.pop(stage):
+                        release(item)
+    return planned
+
+
+def _round_robin_slots(count: int):
+    # Participant positions of the group fixtures in the order assign_participants_to_group_matches
+    # fills them, so a group scheduled before the draw already keeps every player's matches apart
+    size = 2
+    while size * (size - 1) // 2 < count:
+        size += 1
+    return [(first, second) for first in range(size) for second in range(first + 1, size)][:count]
+
+
+def _load_items(tournament_id: UUID) -> list:
+    rows = db.session.execute(
+        select(Match.id, Match.number, Match.format, Match.status, Match.scheduled_time, Match.station,
+               Match.completed_at, Match.group_id, Match.playoff_match_id, Match.participant1_id,
+               Match.participant2_id)
+        .where(Match.tournament_id == tournament_id)
+    ).all()
+    match_by_playoff_match = {row.playoff_match_id: row.id for row in rows if row.playoff_match_id}
+    depends = {
+        match_by_playoff_match.get(playoff_match_id): tuple(
+            match_by_playoff_match[dependency] for dependency in (first, second)
+            if dependency in match_by_playoff_match)
+        for playoff_match_id, first, second in db.session.execute(
+            select(PlayoffStageMatch.id, PlayoffStageMatch.depends_on_match_1_id,
+                   PlayoffStageMatch.depends_on_match_2_id)
+            .join(PlayoffStage, PlayoffStageMatch.playoff_id == PlayoffStage.id)
+            .where(PlayoffStage.tournament_id == tournament_id)
+        )
+    }
+
+    group_matches = defaultdict(list)
+    for row in rows:
+        if row.group_id:
+            group_matches[row.group_id].append(row)
+    positions = {}
+    for group_id, matches in group_matches.items():
+        matches.sort(key=lambda row: int(row.number))
+        for row, (first, second) in zip(matches, _round_robin_slots(len(matches))):
+            positions[row.id] = ((group_id, first), (group_id, second))
+
+    items = []
+    for row in rows:
+        participants = tuple(pid for pid in (row.participant1_id, row.participant2_id) if pid)
+        if not participants and row.id in positions:
+            participants = positions[row.id]
+        items.append(ScheduleItem(
+            id=row.id, number=int(row.number or 0), duration=slot_length(row.format),
+            status=row.status, start=row.scheduled_time, station=row.station, end=row.completed_at,
+            participants=participants, depends=depends.get(row.id, ()),
+            stage=1 if row.playoff_match_id else 0
+        ))
+    return items
+
+
+def _save(planned: dict, items: list):
+    # The schedule is advisory, so the match version is not bumped: a client's If-Match
+    # on a result stays valid when another result moves the timetable
+    current = {item.id: (item.start, item.station) for item in items}
+    changes = [
+        {'match_id': match_id, 'start': start, 'station': station}
+        for match_id, (start, station) in planned.items() if current.get(match_id) != (start, station)
+    ]
+    if not changes:
+        return 0
+    table = Match.__table__
+    db.session.execute(
+        update(table)
+        .where(table.c.id == bindparam('match_id'))
+        .values(scheduled_time=bindparam('start'), station=bindparam('station')),
+        changes
+    )
+    for change in changes:
+        loaded = db.session.identity_map.get(identity_key(Match, change['match_id']))
+        if loaded is not None:
+            set_committed_value(loaded, 'scheduled_time', change['start'])
+            set_committed_value(loaded, 'station', change['station'])
+    return len(changes)
+
+
+@transactional
+def schedule_tournament(tournament_id: UUID, stations: int = None, rest_minutes: int = None) -> int:
+    """
+    Compute the match timetable of a tournament and store it in Match.scheduled_time and Match.station.
+
+    The settings are kept on the tournament, and the timetable is recomputed from the current
+    time whenever a match of the tournament starts or ends (see reschedule_tournament).
+
+    Args:
+        tournament_id: The UUID of the tournament.
+        stations: Number of stations (servers); the stored value by default.
+        rest_minutes: Rest of a participant between matches; the stored value or SCHEDULE_REST_MINUTES by default.
+
+    Returns:
+        int: The number of matches whose time or station changed.
+
+    Raises:
+        ValueError: If tournament is not found or the number of stations is not set or invalid.
+    """
+    tournament = db.session.get(Tournament, tournament_id)
+    if not tournament:
+        raise ValueError("Tournament not found")
+    if stations is not None:
+        if stations < 1:
+            raise ValueError("At least one station is required")
+        tournament.schedule_stations = stations
+    if rest_minutes is not None:
+        if rest_minutes < 0:
+            raise ValueError("Rest time cannot be negative")
+        tournament.schedule_rest_minutes = rest_minutes
+    if not tournament.schedule_stations:
+        raise ValueError("Number of stations is not set")
+    if tournament.schedule_rest_minutes is None:
+        tournament.schedule_rest_minutes = current_app.config['SCHEDULE_REST_MINUTES']
+
+    items = _load_items(tournament_id)
+    planned = plan_schedule(
+        items, tournament.schedule_stations, _naive_utc(tournament.start_time),
+        timedelta(minutes=tournament.schedule_rest_minutes), now=_utcnow()
+    )
+    return _save(planned, items)
+
+
+def reschedule_tournament(tournament_id: UUID):
+    """Recompute the timetable after a match started or ended; no-op for tournaments without one."""
+    stations = db.session.scalar(select(Tournament.schedule_stations).where(Tournament.id == tournament_id))
+    if stations:
+        schedule_tournament(tournament_id)
+
+
+def get_station_timeline(tournament_id: UUID) -> dict:
+    """
+    Return the timetable of a tournament grouped by station.
+
+    Args:
+        tournament_id: The UUID of the tournament.
+
+    Returns:
+        dict: 'stations' (count), 'rest_minutes' and 'timeline' — a list of stations, each with its
+            matches ordered by start time (id, number, format, status, participants, start and end).
+            Matches without a time are listed under 'unscheduled'.
+
+    Raises:
+        ValueError: If tournament is not found.
+    """
+    settings = db.session.execute(
+        select(Tournament.schedule_stations, Tournament.schedule_rest_minutes)
+        .where(Tournament.id == tournament_id)
+    ).first()
+    if settings is None:
+        raise ValueError("Tournament not found")
+    stations, unscheduled = defaultdict(list), []
+    rows = db.session.execute(
+        select(Match.id, Match.number, Match.format, Match.status, Match.scheduled_time, Match.station,
+               Match.completed_at, Match.participant1_id, Match.participant2_id)
+        .where(Match.tournament_id == tournament_id)
+    )
+    for row in rows:
+        # Finished matches show when they actually ended, the others their planned end
+        end = row.completed_at or (row.scheduled_time and row.scheduled_time + slot_length(row.format))
+        entry = {
+            'id': str(row.id),
+            'number': row.number,
+            'format': row.format,
+            'status': row.status,
+            'participant1_id': row.participant1_id and str(row.participant1_id),
+            'participant2_id': row.participant2_id and str(row.participant2_id),
+            'start': row.scheduled_time and row.scheduled_time.isoformat(),
+            'end': end and end.isoformat(),
+        }
+        if row.scheduled_time is None or row.station is None:
+            unscheduled.append(entry)
+        else:
+            stations[row.station].append(entry)
+    return {
+        'stations': settings.schedule_stations,
+        'rest_minutes': settings.schedule_rest_minutes,
+        'timeline': [
+            {'station': station, 'matches': sorted(matches, key=lambda entry: entry['start'])}
+            for station, matches in sorted(stations.items())
+        ],
+        'unscheduled': sorted(unscheduled, key=lambda entry: int(entry['number'] or 0)),
+    }
@@ -3,6 +3,7 @@ from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import joinedload
 from app.extensions import db
 from app.models import Team, User, UserRequest
+from app.services.notification_service import on_request_created, on_request_resolved, on_requests_discarded
 from flask_jwt_extended import get_jwt_identity
 from datetime import datetime, UTC
 
@@ -82,6 +83,10 @@ def delete_team(team_id: UUID) -> None:
     if team.leader_id != current_user.id:
         raise PermissionError("Only the team leader can delete the team")
 
+    # Invitations to the team go with it; pending ones are withdrawn from the invitees' counters
+    on_requests_discarded(team.requests)
+    for request in list(team.requests):
+        db.session.delete(request)
     db.session.delete(team)
 
 
@@ -142,6 +147,7 @@ def invite_user_to_team(to_user_id: UUID, team_id: UUID) -> UserRequest:
         created_at=datetime.now(UTC)
     )
     db.session.add(request)
+    on_request_created(request)
     return request
 
 
@@ -162,6 +168,7 @@ def accept_team_invite(request_id: UUID) -> Team:
     if current_user in team.players:
         raise ValueError("User is already a team member")
 
+    on_request_resolved(request, accepted=True)
     team.players.append(current_user)
     request.status = 'accepted'
     request.updated_at = datetime.now(UTC)
@@ -178,10 +185,25 @@ def decline_team_invite(request_id: UUID) -> None:
     if request.to_user_id != current_user.id:
         raise ValueError("Only the invited user can decline the invitation")
 
+    on_request_resolved(request, accepted=False)
     request.status = 'declined'
     request.updated_at = datetime.now(UTC)
 
 
+def withdraw_team_invite(request_id: UUID) -> None:
+    """Withdraw a pending team invitation (only its sender can)."""
+    request = UserRequest.query.get(request_id)
+    if not request or request.type != 'team' or request.status != 'pending':
+        raise ValueError("Invalid or non-pending team invitation")
+
+    current_user = get_current_user()
+    if request.from_user_id != current_user.id:
+        raise PermissionError("Only the sender can withdraw the invitation")
+
+    on_request_resolved(request, accepted=False)
+    db.session.delete(request)
+
+
 def leave_team(team_id: UUID) -> None:
     """Leave a team."""
     team = Team.query.get(team_id)
@@ -0,0 +1,193 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import UTC, datetime
+from typing import NamedTuple
+
+from sqlalchemy import event, inspect, select
+from app.extensions import db
+from app.models import Tournament
+from app.services.asset_service import asset_url
+
+
+# Statuses kept in the feed; completed and cancelled tournaments are never listed
+FEED_STATUSES = ('open', 'ongoing')
+DEFAULT_PAGE_SIZE = 4
+MAX_PAGE_SIZE = 50
+# Changes committed by other processes become visible after a full reload at this interval
+FEED_RELOAD_SECONDS = 300
+
+DEFAULT_BANNER = '/static/tournaments/default.png'
+FEED_COLUMNS = ('title', 'start_time', 'banner_url', 'prize_fund', 'game_id', 'status')
+
+
+class FeedEntry(NamedTuple):
+    """Immutable feed item: sort key, filter fields and the pre-serialized payload."""
+    key: tuple
+    game_id: object
+    status: str
+    data: dict
+
+
+# (game_id | None, status | None) -> sorted list of keys (start_time, id);
+# None is a wildcard, so every entry is indexed under four feeds
+_feeds = {}
+_entries = {}
+_loaded_at = None
+_lock = threading.Lock()
+
+
+def _naive_utc(value):
+    # The column is a naive UTC timestamp, but freshly assigned values may be aware or strings
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(UTC).replace(tzinfo=None)
+    return value
+
+
+def _make_entry(id, title, start_time, banner_url, prize_fund, game_id, status):
+    start_time = _naive_utc(start_time)
+    return FeedEntry(
+        key=(start_time, str(id)),
+        game_id=str(game_id),
+        status=status,
+        data={
+            'id': str(id),
+            'title': title,
+            'start_time': start_time.isoformat(),
+            'banner_url': banner_url or asset_url(DEFAULT_BANNER),
+            'prize_fund': prize_fund,
+            'game_id': str(game_id),
+            'status': status,
+        },
+    )
+
+
+def _feed_keys(entry):
+    return ((None, None), (entry.game_id, None), (None, entry.status), (entry.game_id, entry.status))
+
+
+def _insert(entry):
+    _entries[entry.data['id']] = entry
+    for feed_key in _feed_keys(entry):
+        insort(_feeds.setdefault(feed_key, []), entry.key)
+
+
+def _remove(tournament_id):
+    entry = _entries.pop(tournament_id, None)
+    if entry is None:
+        return
+    for feed_key in _feed_keys(entry):
+        keys = _feeds[feed_key]
+        del keys[bisect_left(keys, entry.key)]
+        if not keys:
+            del _feeds[feed_key]
+
+
+def _reload():
+    global _loaded_at
+    rows = db.session.execute(
+        select(Tournament.id, *(getattr(Tournament, column) for column in FEED_COLUMNS))
+        .where(Tournament.status.in_(FEED_STATUSES))
+    ).all()
+    entries = [_make_entry(*row) for row in rows]
+    with _lock:
+        _feeds.clear()
+        _entries.clear()
+        for entry in entries:
+            _insert(entry)
+        _loaded_at = time.monotonic()
+
+
+def _ensure_loaded():
+    if _loaded_at is None or time.monotonic() - _loaded_at > FEED_RELOAD_SECONDS:
+        _reload()
+
+
+def apply_changes(changes):
+    """
+    Apply committed tournament changes to the feed.
+
+    Args:
+        changes: Mapping of tournament id (str) to its new FeedEntry, or None if the
+            tournament was deleted or left FEED_STATUSES.
+    """
+    with _lock:
+        if _loaded_at is None:
+            return
+        for tournament_id, entry in changes.items():
+            _remove(tournament_id)
+            if entry is not None:
+                _insert(entry)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_changes(session, flush_context):
+    # Entries are built here because SQL can no longer be emitted in after_commit
+    changes = session.info.setdefault('tournament_feed_changes', {})
+    for instance in session.deleted:
+        if isinstance(instance, Tournament):
+            changes[str(instance.id)] = None
+    for instance in (*session.new, *session.dirty):
+        if not isinstance(instance, Tournament) or instance in session.deleted:
+            continue
+        # Registrations and match counters also make a tournament dirty; skip those
+        state = inspect(instance)
+        if instance not in session.new and not any(
+                state.attrs[column].history.has_changes() for column in FEED_COLUMNS):
+            continue
+        changes[str(instance.id)] = (
+            _make_entry(instance.id, *(getattr(instance, column) for column in FEED_COLUMNS))
+            if instance.status in FEED_STATUSES else None
+        )
+
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_after_commit(session):
+    changes = session.info.pop('tournament_feed_changes', None)
+    if changes:
+        apply_changes(changes)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('tournament_feed_changes', None)
+
+
+def get_feed(game_id=None, status=None, upcoming=False, limit=DEFAULT_PAGE_SIZE, offset=0):
+    """
+    Return a page of tournaments ordered by start time from the in-process feed.
+
+    The feed is loaded with a single column-only query on first use and then kept current by
+    commits in this process, so serving a page does not touch the database.
+
+    Args:
+        game_id: Only tournaments of this game (UUID).
+        status: Only tournaments with this status (one of FEED_STATUSES).
+        upcoming: Only tournaments that have not started yet.
+        limit: Page size, capped at MAX_PAGE_SIZE.
+        offset: Number of entries to skip.
+
+    Returns:
+        list: Serialized tournaments (id, title, start_time, banner_url, prize_fund, game_id, status).
+
+    Raises:
+        ValueError: If the status is not kept in the feed.
+    """
+    if status is not None and status not in FEED_STATUSES:
+        raise ValueError(f"Feed is only available for statuses: {', '.join(FEED_STATUSES)}")
+    limit = max(0, min(limit, MAX_PAGE_SIZE))
+    offset = max(0, offset)
+
+    _ensure_loaded()
+    with _lock:
+        keys = _feeds.get((game_id and str(game_id), status), ())
+        start = bisect_left(keys, (datetime.now(UTC).replace(tzinfo=None),)) if upcoming else 0
+        start += offset
+        return [_entries[tournament_id].data for _, tournament_id in keys[start:start + limit]]
+
+
+def get_nearest_tournaments(limit=DEFAULT_PAGE_SIZE):
+    """Return the nearest upcoming tournaments for the landing page."""
+    return get_feed(upcoming=True, limit=limit)
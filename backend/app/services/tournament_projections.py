@@ -0,0 +1,201 @@
+import threading
+from collections import OrderedDict
+from uuid import UUID
+
+from app.services.event_store import iter_events
+
+
+# Projections kept in memory; each is brought up to date with the events appended since
+PROJECTION_CACHE_SIZE = 256
+
+
+class TournamentProjection:
+    """
+    Read models of one tournament built by applying its events in order.
+
+    Holds the registrations, group standings, the playoff bracket and match statistics.
+    A 'reset' event clears everything except the registrations.
+    """
+
+    def __init__(self):
+        self.seq = 0
+        self.status = 'open'
+        self.participants = set()
+        self.places = {}
+        self._clear_results()
+
+    def _clear_results(self):
+        # letter -> participant id -> standings row
+        self.groups = {}
+        # match id -> bracket entry
+        self.bracket = {}
+        self.matches_completed = 0
+        self.matches_cancelled = 0
+        self.maps_completed = 0
+        self.draws = 0
+        # participant id -> {'matches', 'wins', 'maps_won'}
+        self.players = {}
+
+    def apply(self, seq: int, type: str, payload: dict):
+        """Apply one event; events already applied (seq not greater than self.seq) are ignored."""
+        if seq <= self.seq:
+            return
+        handler = getattr(self, f'_on_{type}', None)
+        if handler is not None:
+            handler(payload)
+        self.seq = seq
+
+    def _on_registered(self, payload):
+        self.participants.add(payload['participant_id'])
+
+    def _on_unregistered(self, payload):
+        self.participants.discard(payload['participant_id'])
+
+    def _on_started(self, payload):
+        self.status = 'ongoing'
+
+    def _on_seeded(self, payload):
+        for letter, participant_ids in (payload.get('groups') or {}).items():
+            self.groups[letter] = {
+                participant_id: {'wins': 0, 'draws': 0, 'loses': 0}
+                for participant_id in participant_ids
+            }
+        for entry in payload.get('bracket') or ():
+            self.bracket[entry['match_id']] = dict(entry)
+
+    def _player(self, participant_id):
+        player = self.players.get(participant_id)
+        if player is None:
+            player = self.players[participant_id] = {'matches': 0, 'wins': 0, 'maps_won': 0}
+        return player
+
+    def _on_map_completed(self, payload):
+        self.maps_completed += 1
+        if payload.get('winner_id'):
+            self._player(payload['winner_id'])['maps_won'] += 1
+
+    def _on_match_completed(self, payload):
+        winner_id = payload.get('winner_id')
+        sides = [pid for pid in (payload.get('participant1_id'), payload.get('participant2_id')) if pid]
+        if payload['status'] == 'cancelled':
+            self.matches_cancelled += 1
+        else:
+            self.matches_completed += 1
+            for participant_id in sides:
+                player = self._player(participant_id)
+                player['matches'] += 1
+                player['wins'] += participant_id == winner_id
+            if winner_id is None:
+                self.draws += 1
+
+        group = self.groups.get(payload.get('group'))
+        if group is not None and len(sides) == 2:
+            for participant_id in sides:
+                row = group.setdefault(participant_id, {'wins': 0, 'draws': 0, 'loses': 0})
+                if winner_id is None:
+                    row['draws'] += 1
+                elif participant_id == winner_id:
+                    row['wins'] += 1
+                else:
+                    row['loses'] += 1
+
+        entry = self.bracket.get(payload['match_id'])
+        if entry is not None:
+            entry.update(winner_id=winner_id, status=payload['status'])
+
+    def _on_advanced(self, payload):
+        entry = self.bracket.get(payload['match_id'])
+        if entry is None:
+            return
+        slot = 'participant1_id' if not entry.get('participant1_id') else 'participant2_id'
+        entry[slot] = payload['participant_id']
+
+    def _on_completed(self, payload):
+        self.status = 'completed'
+        self.places = dict(payload.get('places') or {})
+
+    def _on_reset(self, payload):
+        self.status = 'open'
+        self.places = {}
+        self._clear_results()
+
+    def standings(self) -> dict:
+        """Group standings: letter -> rows ordered by points (2 per win, 1 per draw), then wins."""
+        result = {}
+        for letter, rows in sorted(self.groups.items()):
+            ordered = sorted(
+                ({'participant_id': participant_id, 'points': row['wins'] * 2 + row['draws'], **row}
+                 for participant_id, row in rows.items()),
+                key=lambda row: (row['points'], row['wins']), reverse=True
+            )
+            for place, row in enumerate(ordered, 1):
+                row['place'] = place
+            result[letter] = ordered
+        return result
+
+    def to_dict(self) -> dict:
+        return {
+            'seq': self.seq,
+            'status': self.status,
+            'participants': sorted(self.participants),
+            'standings': self.standings(),
+            'bracket': sorted(self.bracket.values(), key=lambda entry: int(entry['round'])),
+            'places': self.places,
+            'stats': {
+                'matches_completed': self.matches_completed,
+                'matches_cancelled': self.matches_cancelled,
+                'maps_completed': self.maps_completed,
+                'draws': self.draws,
+                'players': self.players,
+            },
+        }
+
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def replay(events) -> TournamentProjection:
+    """Build a projection from scratch out of (seq, type, payload) events."""
+    projection = TournamentProjection()
+    for seq, type, payload in events:
+        projection.apply(seq, type, payload)
+    return projection
+
+
+def get_projection(tournament_id: UUID) -> dict:
+    """
+    Return the read models of a tournament.
+
+    A cached projection is brought up to date with a single query for the events appended
+    after it; otherwise the whole log is replayed.
+
+    Args:
+        tournament_id: The UUID of the tournament.
+
+    Returns:
+        dict: Status, participants, standings, bracket, places and stats (see TournamentProjection).
+    """
+    with _lock:
+        projection = _cache.get(tournament_id)
+        if projection is not None:
+            _cache.move_to_end(tournament_id)
+    if projection is None:
+        projection = TournamentProjection()
+
+    new_events = list(iter_events(tournament_id, projection.seq))
+    with _lock:
+        for seq, type, payload in new_events:
+            projection.apply(seq, type, payload)
+        _cache[tournament_id] = projection
+        _cache.move_to_end(tournament_id)
+        while len(_cache) > PROJECTION_CACHE_SIZE:
+            _cache.popitem(last=False)
+        return projection.to_dict()
+
+
+def rebuild_projection(tournament_id: UUID) -> dict:
+    """Drop the cached projection of a tournament and rebuild it by replaying the whole log."""
+    with _lock:
+        _cache.pop(tournament_id, None)
+    return get_projection(tournament_id)
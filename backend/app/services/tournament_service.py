@@ -1,8 +1,26 @@
 from uuid import UUID
+from sqlalchemy import bindparam, delete, func, insert, select, update
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
 from app.extensions import db
 from app.models import Tournament, User, Game, GroupStage, PlayoffStage, PrizeTable, Match, Map, Group, PlayoffStageMatch, Team, PrizeTableRow, GroupRow, ScheduledTournament
+from app.models import tournament_participants, tournament_teams, group_users, group_teams
+from app.services.match_service import check_match_version, set_match_status
+from app.services.unit_of_work import transactional, unit_of_work, defer
+from app.services.schedule_service import reschedule_tournament
+from app.services.achievement_service import on_match_completed, on_tournament_completed
+from app.services.map_veto import create_maps, game_map_pool, map_count, new_veto, veto_state
+from app.services.prize_service import DEFAULT_DISTRIBUTION, award_prizes, clear_prizes, create_prize_table
+from app.services.event_store import record_event, bracket_payload, groups_payload, match_payload
+from app.services.tournament_structure import (
+    build_template, delete_tournament_rows, get_template, purge_structure,
+    remember_template, stamp_template
+)
+from apscheduler.jobstores.base import JobLookupError
+from collections import defaultdict
 from datetime import datetime, UTC
 import math
 import random
@@ -238,6 +256,7 @@ def get_match(tournament_id: UUID, match_id: UUID):
     return match
 
 
+@transactional
 def create_tournament(
     title: str,
     game_id: UUID,
@@ -254,7 +273,10 @@ def create_tournament(
     max_participants_per_group: int = None,
     playoff_participants_count_per_group: int = 8,
     format_: str = 'bo1',
-    final_format_: str = 'bo3'
+    final_format_: str = 'bo3',
+    prize_distribution: str = DEFAULT_DISTRIBUTION,
+    prize_options: dict = None,
+    split_prize_ties: bool = True
 ) -> Tournament:
     """
     Create a new tournament with automatic generation of group stage, playoff stage, and prize table.
@@ -273,6 +295,9 @@ def create_tournament(
         num_groups: Number of groups (required if has_group_stage=True).
         max_participants_per_group: Max participants per group (required if has_group_stage=True).
         playoff_participants_count_per_group: Number of participants advancing to playoff (required if has_group_stage=True).
+        prize_distribution: Prize distribution name ('top3', 'winner_takes_all', 'top_n', 'curve', 'custom').
+        prize_options: Options of the prize distribution (e.g. {'places': 8}).
+        split_prize_ties: Whether participants tied at a place (semifinal losers) share its prizes.
 
     Returns:
         Tournament: The created tournament object.
@@ -333,52 +358,21 @@ def create_tournament(
     try:
         db.session.add(tournament)
         db.session.flush()  # Get tournament.id
-        # Create prize table (always)
-        tournament.prize_table = create_prizetable(tournament.id)
-        # Add default prize rows if prize_fund is set
-        if prize_fund and prize_fund > 0:
-            prize_distribution = [
-                {"place": 1, "prize": prize_fund * 0.5},
-                {"place": 2, "prize": prize_fund * 0.3},
-                {"place": 3, "prize": prize_fund * 0.2}
-            ]
-            for prize in prize_distribution:
-                create_prizetable_row(
-                    tournament_id=tournament.id,
-                    place=prize["place"],
-                    prize=prize["prize"]
-                )
-        # Create group stage if enabled
-        if has_group_stage:
-            group_participants = [None] * max_participants
-            group_stage = make_group_stage(
-                tournament_id=tournament.id,
-                num_groups=num_groups,
-                max_participants_per_group=max_participants_per_group,
-                participants=group_participants,
-                winners_bracket_qualified=playoff_participants_count_per_group
-            )
-            tournament.group_stage = group_stage
-            create_group_stage_matches(
-                tournament.id, participants=group_participants, format_=tournament.match_format)
-        # Create playoff stage if enabled
-        if has_playoff:
-            match_start_idx = 1
-            if has_group_stage:
-                playoff_participants_count_per_group = num_groups * \
-                    group_stage.winners_bracket_qualified
-                match_start_idx = int(num_groups * max_participants_per_group *
-                                      (max_participants_per_group - 1) / 2 + 1)
-            else:
-                playoff_participants_count_per_group = max_participants
-            winner_bracket_participants = [
-                None] * playoff_participants_count_per_group
-            playoff_stage = generate_single_elimination_bracket(
-                tournament_id=tournament.id,
-                participants=winner_bracket_participants,
-                match_start_idx=match_start_idx
-            )
-            tournament.playoff_stage = playoff_stage
+        # Create prize table (always); its rows are computed from the distribution in memory
+        create_prize_table(tournament, prize_distribution, prize_options, split_prize_ties)
+        # Stages and matches are stamped from the memoized template of this shape:
+        # one bulk insert per table instead of per-row creation with lookups
+        if (has_group_stage or has_playoff) and status != "open":
+            raise ValueError("Tournament must be in open status to create stages")
+        template = build_template(
+            max_participants, tournament.match_format, tournament.final_format,
+            num_groups=num_groups if has_group_stage else None,
+            max_participants_per_group=max_participants_per_group if has_group_stage else None,
+            winners_bracket_qualified=playoff_participants_count_per_group if has_group_stage else None,
+            has_playoff=has_playoff
+        )
+        stamp_template(tournament, template)
+        remember_template(tournament.id, template)
         # Schedule tournament start
         if status == "open":
             from app.apscheduler_tasks import schedule_tournament_start
@@ -390,16 +384,12 @@ def create_tournament(
                 start_time=start_time,
                 job_id=job_id
             )
-        db.session.add(scheduled)
-        db.session.commit()
+            db.session.add(scheduled)
+        db.session.flush()
         return tournament
 
     except IntegrityError as e:
-        db.session.rollback()
         raise ValueError(f"Failed to create tournament: {str(e)}")
-    except ValueError as e:
-        db.session.rollback()
-        raise e
 
 
 def create_match(tournament_id: UUID, participant1_id: UUID = None, participant2_id: UUID = None, group_id: UUID = None, playoff_match_id: UUID = None, type: str = None, format: str = "bo1", number: int = 1):
@@ -462,15 +452,16 @@ def create_match(tournament_id: UUID, participant1_id: UUID = None, participant2
         playoff_match_id=playoff_match_id,
         type=type,
         format=format,
-        status="scheduled",
         is_playoff=playoff_match_id is not None,
         number=number
     )
 
     db.session.add(match)
+    set_match_status(match, "scheduled")
     return match
 
 
+@transactional
 def update_match_results(tournament_id: UUID, match_id: UUID, winner_id: UUID = None, status: str = None):
     """
     Update the results of a match, validating status and winner.
@@ -497,10 +488,10 @@ def update_match_results(tournament_id: UUID, match_id: UUID, winner_id: UUID =
         if not match.participant1_id and not match.participant2_id:
             if status != "cancelled":
                 status = "cancelled"
-            match.status = status
+            set_match_status(match, status)
             match.winner_id = None
             db.session.add(match)
-            db.session.commit()
+            db.session.flush()
             return match
 
         # Handle winner
@@ -521,14 +512,13 @@ def update_match_results(tournament_id: UUID, match_id: UUID, winner_id: UUID =
                     f"Invalid match status. Must be one of {valid_statuses}")
             if status == "completed" and not winner_id:
                 raise ValueError("Winner ID is required for completed status")
-            match.status = status
+            set_match_status(match, status)
 
         db.session.add(match)
-        db.session.commit()
+        db.session.flush()
         return match
 
     except IntegrityError as e:
-        db.session.rollback()
         raise ValueError(f"Failed to update match results: {str(e)}")
 
 
@@ -572,6 +562,7 @@ def register_for_tournament(tournament_id: UUID, participant_id: UUID, is_team:
 
     # with db.session.begin():
     db.session.add(tournament)
+    record_event(tournament_id, 'registered', participant_id=participant_id, is_team=is_team)
     return tournament
 
 
@@ -612,6 +603,7 @@ def unregister_for_tournament(tournament_id: UUID, participant_id: UUID, is_team
 
     # with db.session.begin():
     db.session.add(tournament)
+    record_event(tournament_id, 'unregistered', participant_id=participant_id, is_team=is_team)
     return tournament
 
 
@@ -619,6 +611,7 @@ def start_tournament(tournament_id: UUID):
     """
     Start a tournament, setting it to 'ongoing' and assigning participants to groups or playoff stage.
     Validates that matches are correctly set up and handles cases with insufficient participants.
+    Runs in the caller's app context (scheduled starts get one from scheduler_job).
 
     Args:
         tournament_id: The UUID of the tournament.
@@ -629,37 +622,37 @@ def start_tournament(tournament_id: UUID):
     Raises:
         ValueError: If tournament, participants, or match setup is invalid.
     """
-    from main import app
-    with app.app_context():
-        tournament = get_tournament(tournament_id)
-        if tournament.status != "open":
-            raise ValueError("Tournament is not in open status")
-
-        total_participants = len(
-            tournament.participants) if tournament.type == 'solo' else len(tournament.teams)
-        if total_participants < 2:
-            tournament.status = 'cancelled'
-            db.session.add(tournament)
-            try:
-                scheduled = ScheduledTournament.query.filter_by(
-                    tournament_id=tournament_id).first()
-                if scheduled:
-                    db.session.delete(scheduled)
-            except:
-                pass
-            db.session.commit()
-            raise ValueError("Tournament requires at least 2 participants")
+    tournament = get_tournament(tournament_id)
+    if tournament.status != "open":
+        raise ValueError("Tournament is not in open status")
 
+    total_participants = len(
+        tournament.participants) if tournament.type == 'solo' else len(tournament.teams)
+    if total_participants < 2:
+        tournament.status = 'cancelled'
+        db.session.add(tournament)
         try:
             scheduled = ScheduledTournament.query.filter_by(
                 tournament_id=tournament_id).first()
             if scheduled:
                 db.session.delete(scheduled)
+        except:
+            pass
+        db.session.commit()
+        raise ValueError("Tournament requires at least 2 participants")
+
+    try:
+        with unit_of_work():
+            scheduled = ScheduledTournament.query.filter_by(
+                tournament_id=tournament_id).first()
+            if scheduled:
+                db.session.delete(scheduled)
 
             # Set tournament status and start time
             tournament.status = "ongoing"
             tournament.start_time = datetime.now(UTC)
             db.session.add(tournament)
+            record_event(tournament_id, 'started')
 
             # Assign participants
             if tournament.group_stage:
@@ -672,14 +665,17 @@ def start_tournament(tournament_id: UUID):
                 if tournament.playoff_stage:
                     validate_match_setup(tournament_id)
 
-            db.session.commit()
-            return tournament
+            db.session.flush()
+            record_event(tournament_id, 'seeded', groups=groups_payload(tournament),
+                         bracket=bracket_payload(tournament))
 
-        except Exception as e:
-            db.session.rollback()
-            raise ValueError(f"Failed to start tournament: {str(e)}")
+        return tournament
 
+    except Exception as e:
+        raise ValueError(f"Failed to start tournament: {str(e)}")
 
+
+@transactional
 def validate_match_setup(tournament_id: UUID):
     """
     Validate playoff matches for cases where 1 or 0 participants.
@@ -698,22 +694,23 @@ def validate_match_setup(tournament_id: UUID):
     ).all()
     for match in first_round_matches:
         if not match.match.participant1_id and not match.match.participant2_id:
-            match.match.status = "cancelled"
+            set_match_status(match.match, "cancelled")
             db.session.add(match.match)
         elif match.match.participant1_id and not match.match.participant2_id:
             match.match.winner_id = match.match.participant1_id
-            match.match.status = "cancelled"
+            set_match_status(match.match, "cancelled")
             db.session.add(match.match)
             update_next_match_participants(
                 tournament_id, match.match.id, match.match.winner_id)
         elif match.match.participant2_id and not match.match.participant1_id:
             match.match.winner_id = match.match.participant2_id
-            match.match.status = "cancelled"
+            set_match_status(match.match, "cancelled")
             db.session.add(match.match)
             update_next_match_participants(
                 tournament_id, match.match.id, match.match.winner_id)
 
 
+@transactional
 def complete_group_stage(tournament_id: UUID):
     """
     Complete the group stage and assign participants to playoff stage.
@@ -728,11 +725,8 @@ def complete_group_stage(tournament_id: UUID):
     if not tournament.group_stage:
         raise ValueError("Tournament does not have a group stage")
 
-    group_stage = tournament.group_stage
-    for group in group_stage.groups:
-        for match in group.matches:
-            if match.status != "completed" and match.status != 'cancelled':
-                raise ValueError("Not all group stage matches are completed")
+    if tournament.group_stage.open_matches > 0:
+        raise ValueError("Not all group stage matches are completed")
 
     # Assign participants to playoff stage
     assign_participants_to_playoff_stage(tournament_id)
@@ -740,9 +734,11 @@ def complete_group_stage(tournament_id: UUID):
     if tournament.playoff_stage:
         validate_match_setup(tournament_id)
 
-    db.session.commit()
+    db.session.flush()
+    record_event(tournament_id, 'seeded', bracket=bracket_payload(tournament))
 
 
+@transactional
 def complete_tournament(tournament_id: UUID):
     """
     Complete a tournament, marking it as 'completed' and assigning prizes based on playoff results.
@@ -761,68 +757,32 @@ def complete_tournament(tournament_id: UUID):
     if tournament.status != "ongoing":
         raise ValueError("Tournament is not ongoing")
 
-    if any(match.status not in ["completed", "cancelled"] for match in tournament.matches):
+    if tournament.open_matches > 0:
         raise ValueError("Not all matches are completed")
 
     if not tournament.playoff_stage:
         raise ValueError(
             "Tournament requires a playoff stage to determine winners")
 
-    if not tournament.prize_table:
-        raise ValueError("Prize table is not set")
-
-    # Find the final match (highest round number, bracket 'winner')
-    final_match = PlayoffStageMatch.query.filter_by(
-        playoff_id=tournament.playoff_stage.id,
-        bracket="winner"
-    ).order_by(PlayoffStageMatch.round_number.desc()).first()
-
-    if not final_match or not final_match.match or not final_match.match.winner_id:
-        raise ValueError("Final match is not completed or has no winner")
-
-    # Assign prizes
-    prize_fund = float(tournament.prize_fund) if tournament.prize_fund else 0
-    winner_id = final_match.match.winner_id
-    loser_id = final_match.match.participant1_id if final_match.match.participant2_id == winner_id else final_match.match.participant2_id
+    # Places from the bracket and prizes from the distribution, written in bulk
+    rows = award_prizes(tournament)
 
-    # with db.session.begin():
-    # 1st place
-    first_place_row = PrizeTableRow.query.filter_by(
-        prize_table_id=tournament.prize_table.id, place=1).first()
-    first_place_row.user_id = winner_id if User.query.get(winner_id) else None
-    first_place_row.team_id = winner_id if Team.query.get(winner_id) else None
-    db.session.add(first_place_row)
-
-    second_place_row = PrizeTableRow.query.filter_by(
-        prize_table_id=tournament.prize_table.id, place=2).first()
-    second_place_row.user_id = loser_id if User.query.get(loser_id) else None
-    second_place_row.team_id = loser_id if Team.query.get(loser_id) else None
-    db.session.add(second_place_row)
-
-    # 3rd place (optional, based on second-to-last round winner)
-    semifinal_matches = PlayoffStageMatch.query.filter_by(
-        playoff_id=tournament.playoff_stage.id,
-        bracket="winner",
-        round_number=str(int(final_match.round_number) - 1)
-    ).all()
-    semifinal_losers = []
-    for match in semifinal_matches:
-        if match.match and match.match.winner_id and match.match.participant1_id and match.match.participant2_id:
-            loser_id = match.match.participant1_id if match.match.participant2_id == match.match.winner_id else match.match.participant2_id
-            semifinal_losers.append(loser_id)
-    if semifinal_losers:
-        # Pick one semifinal loser for 3rd place (simplified)
-        third_place_id = semifinal_losers[0]
-        third_place_row = PrizeTableRow.query.filter_by(
-            prize_table_id=tournament.prize_table.id, place=3).first()
-        third_place_row.user_id = third_place_id if User.query.get(
-            third_place_id) else None,
-        third_place_row.team_id = third_place_id if Team.query.get(
-            third_place_id) else None,
-        db.session.add(third_place_row)
     tournament.status = "completed"
     db.session.add(tournament)
     # db.session.commit()
+    places = defaultdict(list)
+    for row in rows:
+        if row.participant_id:
+            places[row.place].append(row.participant_id)
+    record_event(tournament_id, 'completed', places={
+        place: ids[0] if len(ids) == 1 else ids for place, ids in places.items()})
+
+    # Tournament achievements of the participants, evaluated with the final bracket
+    defer(('achievements', tournament_id), lambda: on_tournament_completed(tournament))
+
+    # Results are final now: snapshot the tournament pages right before the commit
+    from app.services.archive_service import archive_tournament
+    defer(('archive', tournament_id), lambda: archive_tournament(tournament_id))
 
     return tournament
 
@@ -1032,11 +992,11 @@ def generate_single_elimination_bracket(tournament_id: UUID, participants: list[
             participant2_id=None,
             type="playoff",
             format='bo1' if tournament.match_format == 'bo2' else tournament.match_format,
-            status="scheduled",
             number=match_start_idx
         )
         match_start_idx += 1
         db.session.add(match)
+        set_match_status(match, "scheduled")
         db.session.flush()
         playoff_match = PlayoffStageMatch(
             playoff_id=playoff_stage.id,
@@ -1054,11 +1014,11 @@ def generate_single_elimination_bracket(tournament_id: UUID, participants: list[
                 tournament_id=tournament_id,
                 type="playoff",
                 format='bo1' if tournament.match_format == 'bo2' else tournament.match_format if round_num < rounds else tournament.final_format,
-                status="scheduled",
                 number=match_start_idx
             )
             match_start_idx += 1
             db.session.add(match)
+            set_match_status(match, "scheduled")
             db.session.flush()
             playoff_match = PlayoffStageMatch(
                 playoff_id=playoff_stage.id,
@@ -1084,7 +1044,8 @@ def generate_single_elimination_bracket(tournament_id: UUID, participants: list[
     return playoff_stage
 
 
-def complete_map(tournament_id: UUID, match_id: UUID, map_id: UUID, winner_id: UUID | None):
+@transactional
+def complete_map(tournament_id: UUID, match_id: UUID, map_id: UUID, winner_id: UUID | None, expected_version: int = None):
     """
     Complete a map by setting its winner, updating match scores, and completing the match if needed.
     Handles cases with one participant and draws (winner_id=None).
@@ -1094,14 +1055,17 @@ def complete_map(tournament_id: UUID, match_id: UUID, map_id: UUID, winner_id: U
         match_id: The UUID of the match.
         map_id: The UUID of the map.
         winner_id: The UUID of the winner (User or Team), or None for a draw.
+        expected_version: The match version the client read (optional, compare-and-swap).
 
     Returns:
         Map: The updated map object.
 
     Raises:
         ValueError: If tournament, match, map, or winner is invalid.
+        StaleDataError: If the match was modified concurrently.
     """
     match = get_match(tournament_id, match_id)
+    check_match_version(match, expected_version)
     if match.status not in ["ongoing", "scheduled"]:
         raise ValueError("Match must be in 'ongoing' or 'scheduled' status")
 
@@ -1112,6 +1076,9 @@ def complete_map(tournament_id: UUID, match_id: UUID, map_id: UUID, winner_id: U
     if map_.winner_id is not None:
         raise ValueError("Map already completed")
 
+    if match.veto and not veto_state(match.veto, match.format)['done']:
+        raise ValueError("Map veto is not finished")
+
     # Handle case with one participant
     if (match.participant1_id and not match.participant2_id) or (match.participant2_id and not match.participant1_id):
         winner_id = match.participant1_id or match.participant2_id
@@ -1125,6 +1092,7 @@ def complete_map(tournament_id: UUID, match_id: UUID, map_id: UUID, winner_id: U
     try:
         # Update map
         map_.winner_id = winner_id
+        record_event(tournament_id, 'map_completed', match_id=match_id, map_id=map_id, winner_id=winner_id)
 
         # Update match scores (do not increment scores for a draw)
         if winner_id == match.participant1_id:
@@ -1155,14 +1123,14 @@ def complete_map(tournament_id: UUID, match_id: UUID, map_id: UUID, winner_id: U
                     complete_match(tournament_id, match_id,
                                    match.participant2_id)
 
-        db.session.commit()
+        db.session.flush()
         return map_
 
     except IntegrityError as e:
-        db.session.rollback()
         raise ValueError("Failed to update map or match due to database error")
 
 
+@transactional
 def sort_group_standings(group_id: UUID):
     """
     Sort participants in a group by recalculating points (2 for win, 1 for draw, 0 for loss)
@@ -1200,14 +1168,14 @@ def sort_group_standings(group_id: UUID):
             row = standing["row"]
             row.place = index
             db.session.add(row)
-        db.session.commit()
+        db.session.flush()
 
     except Exception as e:
-        db.session.rollback()
         raise ValueError(f"Failed to sort group standings: {str(e)}")
 
 
-def complete_match(tournament_id: UUID, match_id: UUID, winner_id: UUID = None):
+@transactional
+def complete_match(tournament_id: UUID, match_id: UUID, winner_id: UUID = None, expected_version: int = None):
     """
     Complete a match by setting its winner and updating next matches.
     For group stage matches, update GroupRow statistics (wins, loses, draws) and sort standings.
@@ -1219,14 +1187,17 @@ def complete_match(tournament_id: UUID, match_id: UUID, winner_id: UUID = None):
         tournament_id: The UUID of the tournament.
         match_id: The UUID of the match.
         winner_id: The UUID of the winner (User or Team), or None for a draw in bo2.
+        expected_version: The match version the client read (optional, compare-and-swap).
 
     Returns:
         Match: The updated match object.
 
     Raises:
         ValueError: If tournament, match, winner, or participants are invalid.
+        StaleDataError: If the match was modified concurrently.
     """
     match = get_match(tournament_id, match_id)
+    check_match_version(match, expected_version)
 
     if match.status == "completed":
         raise ValueError("Match is already completed")
@@ -1235,9 +1206,10 @@ def complete_match(tournament_id: UUID, match_id: UUID, winner_id: UUID = None):
     if not match.participant1_id and not match.participant2_id:
         if match.group_id:
             raise ValueError("Group stage matches must have both participants")
-        match.status = "cancelled"
+        set_match_status(match, "cancelled")
         db.session.add(match)
-        db.session.commit()
+        record_event(tournament_id, 'match_completed', **match_payload(match))
+        db.session.flush()
         return match
 
     # Handle case with one participant (only for playoff matches)
@@ -1246,12 +1218,12 @@ def complete_match(tournament_id: UUID, match_id: UUID, winner_id: UUID = None):
             raise ValueError("Group stage matches must have both participants")
         winner_id = match.participant1_id or match.participant2_id
         match.winner_id = winner_id
-        match.status = "cancelled"
+        set_match_status(match, "cancelled")
     else:
         # Normal case with two participants
         if match.format == "bo2" and winner_id is None:
             # Handle draw for bo2 group stage matches
-            match.status = "completed"
+            set_match_status(match, "completed")
             match.winner_id = None
         else:
             if not winner_id:
@@ -1260,6 +1232,10 @@ def complete_match(tournament_id: UUID, match_id: UUID, winner_id: UUID = None):
             match = update_match_results(
                 tournament_id, match_id, winner_id, "completed")
 
+    record_event(tournament_id, 'match_completed', **match_payload(match))
+    # Match win achievements: the winners of the unit of work are evaluated together
+    on_match_completed(match)
+
     # Update GroupRow for group stage matches
     if match.group_id:
         try:
@@ -1268,17 +1244,11 @@ def complete_match(tournament_id: UUID, match_id: UUID, winner_id: UUID = None):
                 raise ValueError(
                     "Group stage matches must have both participants")
 
-            # Find GroupRow entries for both participants
-            group_row1 = GroupRow.query.filter_by(
-                group_id=match.group_id,
-                user_id=match.participant1_id if match.tournament.type == "solo" else None,
-                team_id=match.participant1_id if match.tournament.type == "team" else None
-            ).first()
-            group_row2 = GroupRow.query.filter_by(
-                group_id=match.group_id,
-                user_id=match.participant2_id if match.tournament.type == "solo" else None,
-                team_id=match.participant2_id if match.tournament.type == "team" else None
-            ).first()
+            # Find GroupRow entries for both participants (rows are loaded with the group)
+            key = 'team_id' if match.tournament.type == "team" else 'user_id'
+            rows = {getattr(row, key): row for row in match.group.rows}
+            group_row1 = rows.get(match.participant1_id)
+            group_row2 = rows.get(match.participant2_id)
 
             # Validate GroupRow existence
             if not group_row1:
@@ -1305,42 +1275,41 @@ def complete_match(tournament_id: UUID, match_id: UUID, winner_id: UUID = None):
                     group_row2.wins += 1
                 db.session.add(group_row1)
                 db.session.add(group_row2)
-            # Sort group standings
-            sort_group_standings(match.group_id)
+            # Sort group standings (once per group per unit of work)
+            group_id = match.group_id
+            defer(('standings', group_id),
+                  lambda: sort_group_standings(group_id))
 
         except Exception as e:
-            db.session.rollback()
             raise ValueError(
                 f"Failed to update GroupRow statistics or sort standings: {str(e)}")
-    matches = Match.query.filter_by(group_id=match.group_id)
 
-    if all(m.status == 'completed' or m.status == 'cancelled' for m in matches):
-        complete_group_stage(tournament_id)
+        # Last open match of the group stage: seed the playoff (once per unit of work)
+        if match.group.group_stage.open_matches <= 0:
+            defer(('group_stage', match.group.groupstage_id),
+                  lambda: complete_group_stage(tournament_id))
 
     # Update next match participants for playoff matches
     if match.playoff_match and winner_id:
         update_next_match_participants(tournament_id, match_id, winner_id)
 
-    # Check if this is the final match
-    if match.playoff_match:
-        final_match = PlayoffStageMatch.query.filter_by(
-            playoff_id=match.playoff_match.playoff_id,
-            bracket="winner"
-        ).order_by(PlayoffStageMatch.round_number.desc()).first()
-        if final_match and final_match.id == match.playoff_match.id:
-            tournament = get_tournament(tournament_id)
-            if all(m.status in ["completed", "cancelled"] for m in tournament.matches):
-                complete_tournament(tournament_id)
+    # No open matches left: the final is decided (completed once, before the unit of work commits)
+    if match.playoff_match and match.tournament.open_matches <= 0:
+        defer(('complete', tournament_id), lambda: complete_tournament(tournament_id))
+
+    # The match ended earlier or later than planned: move the matches that have not started
+    if match.tournament.schedule_stations:
+        defer(('schedule', tournament_id), lambda: reschedule_tournament(tournament_id))
 
     try:
-        db.session.commit()
+        db.session.flush()
     except IntegrityError as e:
-        db.session.rollback()
         raise ValueError("Failed to complete match due to database error")
 
     return match
 
 
+@transactional
 def update_next_match_participants(tournament_id: UUID, match_id: UUID, winner_id: UUID):
     """
     Update the participants of the next match based on the current match's winner.
@@ -1385,27 +1354,30 @@ def update_next_match_participants(tournament_id: UUID, match_id: UUID, winner_i
                     "Next winner match already has both participants")
 
             db.session.add(next_match)
+            record_event(tournament_id, 'advanced', from_match_id=match_id,
+                         match_id=next_match.id, participant_id=winner_id)
 
             # Check if next match can be auto-completed
             parallel_match = next_winner_match.depends_on_match_1 if next_winner_match.depends_on_match_2_id == playoff_match.id else next_winner_match.depends_on_match_2
             if parallel_match and parallel_match.match.status == "cancelled":
                 if next_match.participant1_id and not next_match.participant2_id:
                     next_match.winner_id = next_match.participant1_id
-                    next_match.status = "cancelled"
+                    set_match_status(next_match, "cancelled")
                     db.session.add(next_match)
+                    record_event(tournament_id, 'match_completed', **match_payload(next_match))
                     update_next_match_participants(
                         tournament_id, next_match.id, next_match.winner_id)
                 elif next_match.participant2_id and not next_match.participant1_id:
                     next_match.winner_id = next_match.participant2_id
-                    next_match.status = "cancelled"
+                    set_match_status(next_match, "cancelled")
                     db.session.add(next_match)
+                    record_event(tournament_id, 'match_completed', **match_payload(next_match))
                     update_next_match_participants(
                         tournament_id, next_match.id, next_match.winner_id)
 
-        db.session.commit()
+        db.session.flush()
 
     except IntegrityError as e:
-        db.session.rollback()
         raise ValueError(
             "Failed to update next match participants due to database constraints")
 
@@ -1493,13 +1465,48 @@ def create_prizetable_row(tournament_id: UUID, place: int, user_id: UUID = None,
     return row
 
 
+def allocate_groups(participant_ids: list, capacities: list[int]) -> list[list]:
+    """
+    Distribute participants over groups round-robin, skipping groups that are already full.
+
+    Args:
+        participant_ids: Participants in allocation order (shuffle them beforehand for a random draw).
+        capacities: Maximum number of participants of each group.
+
+    Returns:
+        list: One list of participant ids per group, sizes differing by at most one
+        unless a group's capacity is smaller.
+
+    Raises:
+        ValueError: If there are more participants than group slots.
+    """
+    if len(participant_ids) > sum(capacities):
+        raise ValueError("Too many participants for available group slots")
+
+    buckets = [[] for _ in capacities]
+    index = 0
+    for participant_id in participant_ids:
+        while len(buckets[index]) >= capacities[index]:
+            index = (index + 1) % len(capacities)
+        buckets[index].append(participant_id)
+        index = (index + 1) % len(capacities)
+    return buckets
+
+
+@transactional
 def assign_participants_to_groups(tournament_id: UUID):
     """
     Assign participants to groups in the group stage of a tournament, distributing them evenly.
 
+    The assignment is computed in memory (see allocate_groups); previous rows are removed and
+    the group memberships and GroupRows are written with one bulk statement each.
+
     Args:
         tournament_id: The UUID of the tournament.
 
+    Returns:
+        dict: Group id -> list of assigned participant ids.
+
     Raises:
         ValueError: If tournament, group stage, or groups are not found, or insufficient participants.
     """
@@ -1516,74 +1523,53 @@ def assign_participants_to_groups(tournament_id: UUID):
     if not groups:
         raise ValueError("No groups found in group stage")
 
-    # Collect participants (users or teams based on tournament type)
-    participants = tournament.teams if tournament.type == "team" else tournament.participants
-    if len(participants) < 2:
+    # Collect participant ids (users or teams based on tournament type)
+    is_team = tournament.type == "team"
+    registrations, membership, key = (
+        (tournament_teams, group_teams, 'team_id') if is_team
+        else (tournament_participants, group_users, 'user_id')
+    )
+    participant_ids = db.session.scalars(
+        select(registrations.c[key]).where(registrations.c.tournament_id == tournament_id)
+    ).all()
+    if len(participant_ids) < 2:
         raise ValueError("Tournament requires at least 2 participants")
 
-    # Calculate total max participants across all groups
-    total_max_participants = sum(group.max_participants for group in groups)
-    if len(participants) > total_max_participants:
-        raise ValueError("Too many participants for available group slots")
-
     # Shuffle participants for random assignment
-    participants = list(participants)
-    random.shuffle(participants)
+    random.shuffle(participant_ids)
+    allocation = allocate_groups(participant_ids, [group.max_participants for group in groups])
 
     try:
-        # Clear existing GroupRow entries for all groups
+        group_ids = [group.id for group in groups]
+        # Clear existing GroupRow entries and memberships of all groups
+        db.session.execute(delete(GroupRow).where(GroupRow.group_id.in_(group_ids)),
+                           execution_options={"synchronize_session": False})
+        db.session.execute(delete(membership).where(membership.c.group_id.in_(group_ids)))
+
+        memberships = []
+        rows = []
+        for group, assigned in zip(groups, allocation):
+            for participant_id in assigned:
+                memberships.append({'group_id': group.id, key: participant_id})
+                rows.append({
+                    'id': uuid.uuid4(), 'group_id': group.id, key: participant_id,
+                    'place': 0, 'wins': 0, 'draws': 0, 'loses': 0
+                })
+        if memberships:
+            db.session.execute(insert(membership), memberships)
+            db.session.execute(insert(GroupRow), rows)
+
+        # Loaded collections are stale after the bulk statements
         for group in groups:
-            GroupRow.query.filter_by(group_id=group.id).delete()
-            # Clear group participants/teams to avoid duplicates
-            if tournament.type == 'solo':
-                group.participants.clear()
-            else:
-                group.teams.clear()
-
-        # Calculate target number of participants per group
-        num_groups = len(groups)
-        base_participants_per_group = len(participants) // num_groups
-        extra_participants = len(participants) % num_groups
-
-        # Distribute participants evenly using round-robin
-        participant_index = 0
-        for i in range(len(participants)):
-            # Assign to group i % num_groups
-            group_index = i % num_groups
-            group = groups[group_index]
-
-            # Check if group can accept more participants
-            current_participants = len(
-                group.participants) if tournament.type == 'solo' else len(group.teams)
-            if current_participants >= group.max_participants:
-                continue
-
-            if participant_index >= len(participants):
-                break
-
-            participant = participants[participant_index]
-
-            # Add participant to group
-            if tournament.type == 'solo':
-                group.participants.append(participant)
-            else:
-                group.teams.append(participant)
-
-            # Create GroupRow entry
-            create_group_row(
-                group_id=group.id,
-                participant_id=participant.id,
-                is_team=tournament.type == "team"
-            )
-            participant_index += 1
-
-        db.session.commit()
+            db.session.expire(group, ['participants', 'teams', 'rows'])
 
     except Exception as e:
-        db.session.rollback()
         raise ValueError(f"Failed to assign participants to groups: {str(e)}")
 
+    return {group.id: assigned for group, assigned in zip(groups, allocation)}
 
+
+@transactional
 def assign_participants_to_playoff_stage(tournament_id: UUID):
     """
     Assign participants to the playoff stage, distributing each to a separate match in the first round.
@@ -1654,28 +1640,28 @@ def assign_participants_to_playoff_stage(tournament_id: UUID):
 
             # Handle matches with one or no participants
             if not match.match.participant1_id and not match.match.participant2_id:
-                match.match.status = "cancelled"
+                set_match_status(match.match, "cancelled")
                 db.session.add(match.match)
             elif match.match.participant1_id and not match.match.participant2_id:
                 match.match.winner_id = match.match.participant1_id
-                match.match.status = "cancelled"
+                set_match_status(match.match, "cancelled")
                 db.session.add(match.match)
                 update_next_match_participants(
                     tournament_id, match.match.id, match.match.winner_id)
             elif match.match.participant2_id and not match.match.participant1_id:
                 match.match.winner_id = match.match.participant2_id
-                match.match.status = "cancelled"
+                set_match_status(match.match, "cancelled")
                 db.session.add(match.match)
                 update_next_match_participants(
                     tournament_id, match.match.id, match.match.winner_id)
 
-        db.session.commit()
+        db.session.flush()
 
     except Exception as e:
-        db.session.rollback()
         raise ValueError(f"Failed to assign participants: {str(e)}")
 
 
+@transactional
 def assign_users_to_prizetable(tournament_id: UUID):
     """
     Assign participants to the prize table based on playoff results.
@@ -1690,76 +1676,22 @@ def assign_users_to_prizetable(tournament_id: UUID):
     if not tournament.playoff_stage:
         raise ValueError("Tournament requires a playoff stage")
 
-    if not tournament.prize_table:
-        raise ValueError("Prize table not set")
-
-    # Find the final match (highest round number, bracket 'winner')
-    final_match = PlayoffStageMatch.query.filter_by(
-        playoff_id=tournament.playoff_stage.id,
-        bracket="winner"
-    ).order_by(PlayoffStageMatch.round_number.desc()).first()
-
-    if not final_match or not final_match.match or not final_match.match.winner_id:
-        raise ValueError("Final match is not completed or has no winner")
-
-    prize_fund = float(tournament.prize_fund) if tournament.prize_fund else 0
-    winner_id = final_match.match.winner_id
-    loser_id = final_match.match.participant1_id if final_match.match.participant2_id == winner_id else final_match.match.participant2_id
-
-    # Clear existing prize table rows to avoid duplicates
-    PrizeTableRow.query.filter_by(
-        prize_table_id=tournament.prize_table.id).delete()
-
-    # 1st place
-    create_prizetable_row(
-        tournament_id=tournament.id,
-        place=1,
-        user_id=winner_id if User.query.get(winner_id) else None,
-        team_id=winner_id if Team.query.get(winner_id) else None,
-        prize=prize_fund * 0.5
-    )
-
-    # 2nd place
-    create_prizetable_row(
-        tournament_id=tournament.id,
-        place=2,
-        user_id=loser_id if User.query.get(loser_id) else None,
-        team_id=loser_id if Team.query.get(loser_id) else None,
-        prize=prize_fund * 0.3
-    )
-
-    # 3rd place (from semifinal losers)
-    semifinal_matches = PlayoffStageMatch.query.filter_by(
-        playoff_id=tournament.playoff_stage.id,
-        bracket="winner",
-        round_number=str(int(final_match.round_number) - 1)
-    ).all()
-    semifinal_losers = []
-    for match in semifinal_matches:
-        if match.match and match.match.winner_id and match.match.participant1_id and match.match.participant2_id:
-            loser_id = match.match.participant1_id if match.match.participant2_id == match.match.winner_id else match.match.participant2_id
-            semifinal_losers.append(loser_id)
-
-    if semifinal_losers:
-        third_place_id = semifinal_losers[0]  # Simplified: take first loser
-        create_prizetable_row(
-            tournament_id=tournament.id,
-            place=3,
-            user_id=third_place_id if User.query.get(third_place_id) else None,
-            team_id=third_place_id if Team.query.get(third_place_id) else None,
-            prize=prize_fund * 0.2
-        )
-
-    db.session.commit()
+    award_prizes(tournament)
 
 
-def reset_tournament(tournament_id: UUID):
+@transactional
+def reset_tournament(tournament_id: UUID, regenerate: bool = True):
     """
-    Reset a tournament by deleting all related stages, matches, and prize table,
-    and setting status back to 'open'. Participants and teams are preserved.
+    Reset a tournament by deleting all related stages and matches, clearing the places
+    of the prize table, and setting status back to 'open'. Participants and teams are preserved.
+
+    Stages and matches are removed with a fixed number of statements (children go via
+    ON DELETE CASCADE), and the empty structure is recreated from the tournament's cached
+    template (or the one stored with a pruned archive) with one bulk insert per table.
 
     Args:
         tournament_id: The UUID of the tournament.
+        regenerate: Whether to recreate the empty stages and matches.
 
     Returns:
         Tournament: The reset tournament object.
@@ -1773,33 +1705,31 @@ def reset_tournament(tournament_id: UUID):
         raise ValueError("Tournament is already in open status")
 
     try:
-        # Delete GroupStage (Groups and GroupRows are deleted via CASCADE)
-        GroupStage.query.filter_by(tournament_id=tournament_id).delete()
-
-        # Delete PlayoffStage (PlayoffStageMatches and Matches are deleted via CASCADE)
-        PlayoffStage.query.filter_by(tournament_id=tournament_id).delete()
-
-        # Delete Matches (Maps are deleted via CASCADE)
-        Match.query.filter_by(tournament_id=tournament_id).delete()
-
-        # Delete PrizeTable (PrizeTableRows are deleted via CASCADE)
-        PrizeTable.query.filter_by(tournament_id=tournament_id).delete()
+        # The template must be read before the structure it describes is deleted;
+        # a pruned tournament has no structure left, its template is stored with the archive
+        from app.services.archive_service import archived_template, delete_archive
+        template = None
+        if regenerate:
+            template = archived_template(tournament_id) or get_template(tournament)
+        purge_structure(tournament)
+        clear_prizes(tournament)
+
+        # The archived snapshot no longer matches the tournament
+        delete_archive(tournament_id)
 
-        # Reset tournament status and clear relationships
         tournament.status = "open"
-        tournament.start_time = "2025-06-01 15:00:00"
-        tournament.group_stage = None
-        tournament.playoff_stage = None
-        tournament.prize_table = None
-        tournament.matches = []
+        tournament.start_time = datetime(2025, 6, 1, 15, 0)
+        tournament.open_matches = 0
+        if template is not None:
+            stamp_template(tournament, template)
 
-        db.session.add(tournament)
-        db.session.commit()
+        db.session.flush()
+
+        record_event(tournament_id, 'reset')
 
         # Remove scheduled task
+        from app.apscheduler_tasks import scheduler
         try:
-            from apscheduler_tasks import scheduler
-            from apscheduler.jobstores.base import JobLookupError
             scheduler.remove_job(f"tournament_start_{tournament_id}")
         except JobLookupError:
             pass
@@ -1807,14 +1737,41 @@ def reset_tournament(tournament_id: UUID):
         return tournament
 
     except Exception as e:
-        db.session.rollback()
         raise ValueError(f"Failed to reset tournament: {str(e)}")
 
 
+@transactional
+def delete_tournament(tournament_id: UUID):
+    """
+    Delete a tournament together with everything that belongs to it.
+
+    Only the tournament row is deleted by the ORM; stages, matches, registrations, events,
+    the archive and the scheduled start are removed by ON DELETE CASCADE without being loaded.
+
+    Args:
+        tournament_id: The UUID of the tournament.
+
+    Raises:
+        ValueError: If tournament is not found.
+    """
+    tournament = get_tournament(tournament_id)
+    delete_tournament_rows(tournament)
+
+    from app.apscheduler_tasks import scheduler
+    try:
+        scheduler.remove_job(f"tournament_start_{tournament_id}")
+    except JobLookupError:
+        pass
+
+
+@transactional
 def start_match(tournament_id: UUID, match_id: UUID):
     """
     Start a match by setting its status to 'ongoing' and creating maps based on the match format.
 
+    If the game has a map pool, the match starts with a map veto (see map_veto.apply_veto)
+    and its maps are named when the veto is finished.
+
     Args:
         tournament_id: The UUID of the tournament.
         match_id: The UUID of the match.
@@ -1834,46 +1791,112 @@ def start_match(tournament_id: UUID, match_id: UUID):
     if not match.participant1_id or not match.participant2_id:
         raise ValueError("Match cannot start without both participants")
 
+    num_maps = map_count(match.format)
+
+    # Check if maps already exist (without loading them)
+    if db.session.execute(select(Map.id).where(Map.match_id == match_id).limit(1)).first():
+        raise ValueError("Maps already created for this match")
+
     # Set match status to ongoing
-    match.status = "ongoing"
+    set_match_status(match, "ongoing")
+
+    # Scheduled tournaments keep the actual start; the rest of the timetable is re-planned from it
+    if match.tournament.schedule_stations:
+        match.scheduled_time = datetime.now(UTC).replace(tzinfo=None)
+        defer(('schedule', tournament_id), lambda: reschedule_tournament(tournament_id))
 
     # Initialize scores if not set
     match.participant1_score = match.participant1_score or 0
     match.participant2_score = match.participant2_score or 0
-
-    # Create maps based on format
-    if not match.format.startswith("bo"):
-        raise ValueError("Invalid match format. Expected 'boX' (e.g., 'bo3')")
-
-    try:
-        num_maps = int(match.format[2:])  # e.g., 'bo3' -> 3
-    except ValueError:
-        raise ValueError(
-            "Invalid match format. Expected 'boX' where X is a number")
-
-    # Check if maps already exist
-    if match.maps:
-        raise ValueError("Maps already created for this match")
-
-    # Create maps
-    for i in range(num_maps):
-        map_ = Map(
-            match_id=match_id,
-            # Optional: external_id=str(uuid.uuid4()),  # If external_id is needed
-            # Optional: order=i+1  # If Map model has order
-        )
-        db.session.add(map_)
+    match.veto = new_veto(game_map_pool(tournament_id), num_maps)
 
     try:
         db.session.add(match)
-        db.session.commit()
+        db.session.flush()
+        # Create maps with one INSERT
+        create_maps([(match.id, match.format, match.veto)])
     except IntegrityError as e:
-        db.session.rollback()
         raise ValueError("Failed to start match due to database error")
 
     return match
 
 
+@transactional
+def start_round(tournament_id: UUID, round_number: int = 1):
+    """
+    Start every ready match of a playoff round at once.
+
+    Matches of the winners bracket round that are scheduled and have both participants are
+    started with one UPDATE and their maps are created with one INSERT, however large the
+    bracket is.
+
+    Args:
+        tournament_id: The UUID of the tournament.
+        round_number: The winners bracket round (1 by default).
+
+    Returns:
+        list: The UUIDs of the started matches, ordered by match number.
+
+    Raises:
+        ValueError: If the tournament is not ongoing or the round has no match ready to start.
+        StaleDataError: If one of the matches was modified concurrently.
+    """
+    tournament = get_tournament(tournament_id)
+    if tournament.status != "ongoing":
+        raise ValueError("Tournament must be ongoing to start a round")
+
+    rows = db.session.execute(
+        select(Match.id, Match.format, Match.version)
+        .join(PlayoffStageMatch, Match.playoff_match_id == PlayoffStageMatch.id)
+        .where(
+            Match.tournament_id == tournament_id,
+            Match.status == "scheduled",
+            Match.participant1_id.isnot(None),
+            Match.participant2_id.isnot(None),
+            PlayoffStageMatch.bracket == "winner",
+            PlayoffStageMatch.round_number == str(round_number),
+            ~select(Map.id).where(Map.match_id == Match.id).exists()
+        )
+        .order_by(Match.number)
+    ).all()
+    if not rows:
+        raise ValueError(f"No matches ready to start in round {round_number}")
+
+    pool = game_map_pool(tournament_id)
+    started = [(row.id, row.format, new_veto(pool, map_count(row.format))) for row in rows]
+    now = datetime.now(UTC).replace(tzinfo=None) if tournament.schedule_stations else None
+
+    # 'scheduled' -> 'ongoing' keeps the matches open, so the open match counters do not change.
+    # One executemany UPDATE, compare-and-swap on the version as the ORM would do
+    table = Match.__table__
+    values = dict(status="ongoing", veto=bindparam('new_veto'),
+                  participant1_score=func.coalesce(table.c.participant1_score, 0),
+                  participant2_score=func.coalesce(table.c.participant2_score, 0),
+                  version=table.c.version + 1)
+    if now:
+        values['scheduled_time'] = now
+    result = db.session.execute(
+        update(table)
+        .where(table.c.id == bindparam('match_id'), table.c.version == bindparam('match_version'))
+        .values(**values),
+        [{'match_id': row.id, 'match_version': row.version, 'new_veto': veto}
+         for row, (_, _, veto) in zip(rows, started)]
+    )
+    # Drivers that batch executemany cannot report the row count; the version is still checked
+    if db.session.get_bind().dialect.supports_sane_multi_rowcount and result.rowcount != len(rows):
+        raise StaleDataError(f"Matches of round {round_number} were modified concurrently")
+    for row in rows:
+        loaded = db.session.identity_map.get(identity_key(Match, row.id))
+        if loaded is not None:
+            db.session.expire(loaded)
+
+    create_maps(started)
+    if now:
+        defer(('schedule', tournament_id), lambda: reschedule_tournament(tournament_id))
+    return [row.id for row in rows]
+
+
+@transactional
 def create_group_stage_matches(tournament_id: UUID, participants, format_: str):
     """
     Create matches for the group stage of a tournament, generating round-robin matches for each group
@@ -1927,14 +1950,14 @@ def create_group_stage_matches(tournament_id: UUID, participants, format_: str):
                 match_number += 1
                 created_matches.append(match)
 
-        db.session.commit()
+        db.session.flush()
         return created_matches
 
     except Exception as e:
-        db.session.rollback()
         raise ValueError(f"Failed to create group stage matches: {str(e)}")
 
 
+@transactional
 def assign_participants_to_group_matches(tournament_id: UUID):
     """
     Assign participants to group stage matches in a round-robin format.
@@ -1958,19 +1981,30 @@ def assign_participants_to_group_matches(tournament_id: UUID):
     if not groups:
         raise ValueError("No groups found in group stage")
 
+    # Memberships and matches of all groups: one query each
+    membership, key = (group_teams, 'team_id') if tournament.type == "team" else (group_users, 'user_id')
+    group_ids = [group.id for group in groups]
+    members = {group_id: [] for group_id in group_ids}
+    for group_id, participant_id in db.session.execute(
+            select(membership.c.group_id, membership.c[key]).where(membership.c.group_id.in_(group_ids))):
+        members[group_id].append(participant_id)
+    group_matches = {group_id: [] for group_id in group_ids}
+    for match in Match.query.filter(Match.group_id.in_(group_ids)):
+        group_matches[match.group_id].append(match)
+
+    assignments = []
     try:
         for group in groups:
             # Получаем участников группы
-            participants = group.teams if tournament.type == "team" else group.participants
+            participants = members[group.id]
             if len(participants) < 2:
                 continue
 
             # Перемешиваем участников для случайного распределения
-            participants = list(participants)
             random.shuffle(participants)
 
-            # Получаем все матчи группы
-            matches = Match.query.filter_by(group_id=group.id).all()
+            # Получаем все матчи группы (в порядке номеров, его же учитывает расписание)
+            matches = sorted(group_matches[group.id], key=lambda match: int(match.number))
             if not matches:
                 raise ValueError(f"No matches found for group {group.letter}")
 
@@ -1980,8 +2014,11 @@ def assign_participants_to_group_matches(tournament_id: UUID):
             if len(matches) < expected_matches:
                 raise ValueError(
                     f"Insufficient matches for group {group.letter}")
+            # Matches were created for a full group; the ones beyond the round robin of the
+            # registered participants are cancelled through set_match_status, so the open
+            # match counters of the group, stage and tournament drop with them
             for m in matches[expected_matches:]:
-                m.status = 'cancelled' #TODO Fix
+                set_match_status(m, 'cancelled')
 
             # Назначаем участников матчам в формате round-robin
             match_index = 0
@@ -1989,17 +2026,24 @@ def assign_participants_to_group_matches(tournament_id: UUID):
                 for j in range(i + 1, len(participants)):
                     if match_index >= len(matches):
                         break
-                    match = matches[match_index]
-                    match.participant1_id = participants[i].id
-                    match.participant2_id = participants[j].id
-                    # print(match.participant1_id, match.participant2_id)
-                    if not match.participant2_id and not match.participant1_id:
-                        match.status = 'cancelled'
-                    db.session.add(match)
+                    assignments.append((matches[match_index], participants[i], participants[j]))
                     match_index += 1
 
-        db.session.commit()
+        db.session.flush()
+        # One executemany UPDATE for all matches; the version is bumped as the ORM would do
+        if assignments:
+            table = Match.__table__
+            db.session.execute(
+                update(table)
+                .where(table.c.id == bindparam('match_id'))
+                .values(participant1_id=bindparam('p1'), participant2_id=bindparam('p2'),
+                        version=table.c.version + 1),
+                [{'match_id': match.id, 'p1': p1, 'p2': p2} for match, p1, p2 in assignments]
+            )
+            for match, p1, p2 in assignments:
+                set_committed_value(match, 'participant1_id', p1)
+                set_committed_value(match, 'participant2_id', p2)
+                set_committed_value(match, 'version', match.version + 1)
     except Exception as e:
-        db.session.rollback()
         raise ValueError(
             f"Failed to assign participants to group matches: {str(e)}")
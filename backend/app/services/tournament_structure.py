@@ -0,0 +1,397 @@
+import math
+import threading
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
+from typing import NamedTuple
+from uuid import UUID
+
+from sqlalchemy import delete, insert, or_, select
+from sqlalchemy import inspect as sa_inspect
+from app.extensions import db
+from app.models import (
+    Group, GroupRow, GroupStage, Map, Match, PlayoffStage, PlayoffStageMatch, Tournament
+)
+
+
+# Templates kept in memory, keyed by tournament id
+TEMPLATE_CACHE_SIZE = 256
+# Distinct tournament shapes kept by build_template (most events reuse a few standard sizes)
+SHAPE_CACHE_SIZE = 128
+
+
+class GroupShape(NamedTuple):
+    letter: str
+    max_participants: int
+    # Placeholder rows of the empty group
+    slots: int
+
+
+class PlayoffMatchShape(NamedTuple):
+    round_number: str
+    bracket: str
+    # Indices of the feeding matches in StructureTemplate.playoff_matches (always earlier entries)
+    depends_on_1: int | None
+    depends_on_2: int | None
+
+
+class MatchShape(NamedTuple):
+    number: str
+    type: str
+    format: str
+    is_playoff: bool
+    # Index in StructureTemplate.groups or StructureTemplate.playoff_matches
+    group: int | None
+    playoff_match: int | None
+
+
+class StructureTemplate(NamedTuple):
+    """
+    Empty structure of a tournament: stages, groups, bracket links and matches,
+    without ids, participants or results.
+    """
+    # None when the tournament has no group stage
+    winners_bracket_qualified: int | None
+    groups: tuple
+    has_playoff: bool
+    playoff_matches: tuple
+    matches: tuple
+
+
+_templates = OrderedDict()
+_lock = threading.Lock()
+
+
+def _in_dependency_order(rows):
+    # Feeding matches first, so every depends_on index points to an earlier entry
+    ordered, pending = [], list(rows)
+    placed = set()
+    while pending:
+        ready = [row for row in pending
+                 if all(dep is None or dep in placed for dep in (row.depends_on_match_1_id, row.depends_on_match_2_id))]
+        if not ready:
+            raise ValueError("Playoff bracket has a dependency cycle")
+        ordered.extend(ready)
+        placed.update(row.id for row in ready)
+        pending = [row for row in pending if row.id not in placed]
+    return ordered
+
+
+def capture_template(tournament: Tournament) -> StructureTemplate:
+    """
+    Read the structure of a tournament into a template with a few column queries.
+
+    Group slots are derived from max_players the same way make_group_stage distributes them,
+    so the template describes the empty structure even after participants were assigned.
+
+    Args:
+        tournament: The tournament.
+
+    Returns:
+        StructureTemplate: The template (empty if the tournament has no stages).
+    """
+    stage = db.session.execute(
+        select(GroupStage.id, GroupStage.winners_bracket_qualified)
+        .where(GroupStage.tournament_id == tournament.id)
+    ).first()
+    groups, group_index = [], {}
+    if stage is not None:
+        rows = sorted(db.session.execute(
+            select(Group.id, Group.letter, Group.max_participants)
+            .where(Group.groupstage_id == stage.id)
+        ).all(), key=lambda row: row.letter)
+        base, extra = divmod(tournament.max_players, len(rows) or 1)
+        for index, row in enumerate(rows):
+            group_index[row.id] = index
+            groups.append(GroupShape(row.letter, row.max_participants, base + (index < extra)))
+
+    playoff_id = db.session.scalar(
+        select(PlayoffStage.id).where(PlayoffStage.tournament_id == tournament.id))
+    playoff_matches, playoff_index = [], {}
+    if playoff_id is not None:
+        rows = _in_dependency_order(db.session.execute(
+            select(PlayoffStageMatch.id, PlayoffStageMatch.round_number, PlayoffStageMatch.bracket,
+                   PlayoffStageMatch.depends_on_match_1_id, PlayoffStageMatch.depends_on_match_2_id)
+            .where(PlayoffStageMatch.playoff_id == playoff_id)
+        ).all())
+        for index, row in enumerate(rows):
+            playoff_index[row.id] = index
+            playoff_matches.append(PlayoffMatchShape(
+                row.round_number, row.bracket,
+                playoff_index.get(row.depends_on_match_1_id), playoff_index.get(row.depends_on_match_2_id)
+            ))
+
+    matches = tuple(
+        MatchShape(row.number, row.type, row.format, row.is_playoff,
+                   group_index.get(row.group_id), playoff_index.get(row.playoff_match_id))
+        for row in db.session.execute(
+            select(Match.number, Match.type, Match.format, Match.is_playoff,
+                   Match.group_id, Match.playoff_match_id)
+            .where(Match.tournament_id == tournament.id,
+                   or_(Match.group_id.isnot(None), Match.playoff_match_id.isnot(None)))
+        )
+    )
+    return StructureTemplate(
+        winners_bracket_qualified=stage.winners_bracket_qualified if stage is not None else None,
+        groups=tuple(groups),
+        has_playoff=playoff_id is not None,
+        playoff_matches=tuple(playoff_matches),
+        matches=matches
+    )
+
+
+def _playoff_format(match_format: str, final_format: str, round_number: int, rounds: int) -> str:
+    if match_format == 'bo2':
+        return 'bo1'
+    # The final is played in final_format; a one-round bracket keeps match_format
+    return final_format if round_number == rounds and rounds > 1 else match_format
+
+
+@lru_cache(maxsize=SHAPE_CACHE_SIZE)
+def build_template(max_participants: int, match_format: str, final_format: str,
+                   num_groups: int = None, max_participants_per_group: int = None,
+                   winners_bracket_qualified: int = None, has_playoff: bool = True) -> StructureTemplate:
+    """
+    Compute the empty structure of a new tournament; memoized per shape.
+
+    Groups get round-robin fixtures for max_participants_per_group players and share the
+    max_participants slots; the single-elimination bracket is sized to the next power of two
+    of its entrants and numbered after the group matches.
+
+    Args:
+        max_participants: Maximum participants of the tournament.
+        match_format: Format of regular matches (e.g. 'bo1').
+        final_format: Format of the playoff final.
+        num_groups: Number of groups (None for no group stage).
+        max_participants_per_group: Max participants per group.
+        winners_bracket_qualified: Participants advancing from each group to the playoff.
+        has_playoff: Whether to create a playoff stage.
+
+    Returns:
+        StructureTemplate: The template to stamp with stamp_template.
+
+    Raises:
+        ValueError: If the shape is invalid.
+    """
+    groups, matches = [], []
+    number = 1
+    if num_groups:
+        if max_participants < num_groups * 2:
+            raise ValueError("Not enough participants for the number of groups")
+        if num_groups < 1 or max_participants_per_group < 2:
+            raise ValueError("Invalid number of groups or participants per group")
+        base, extra = divmod(max_participants, num_groups)
+        if base > max_participants_per_group:
+            raise ValueError("Too many participants for the specified group size")
+        fixtures = max_participants_per_group * (max_participants_per_group - 1) // 2
+        for index in range(num_groups):
+            groups.append(GroupShape(chr(65 + index), max_participants_per_group, base + (index < extra)))
+            for _ in range(fixtures):
+                matches.append(MatchShape(str(number), 'group', match_format, False, index, None))
+                number += 1
+
+    playoff_matches = []
+    if has_playoff:
+        entrants = num_groups * winners_bracket_qualified if num_groups else max_participants
+        if entrants < 2:
+            raise ValueError("At least 2 participants are required for playoff stage")
+        rounds = math.ceil(math.log2(entrants))
+        previous_round = []
+        for round_number in range(1, rounds + 1):
+            current_round = []
+            for index in range(2 ** (rounds - round_number)):
+                feeding = previous_round[2 * index:2 * index + 2]
+                playoff_matches.append(PlayoffMatchShape(
+                    str(round_number), 'winner',
+                    feeding[0] if feeding else None, feeding[1] if len(feeding) > 1 else None
+                ))
+                current_round.append(len(playoff_matches) - 1)
+                matches.append(MatchShape(
+                    str(number), 'playoff',
+                    _playoff_format(match_format, final_format, round_number, rounds),
+                    True, None, len(playoff_matches) - 1
+                ))
+                number += 1
+            previous_round = current_round
+
+    return StructureTemplate(
+        winners_bracket_qualified=winners_bracket_qualified if num_groups else None,
+        groups=tuple(groups),
+        has_playoff=has_playoff,
+        playoff_matches=tuple(playoff_matches),
+        matches=tuple(matches)
+    )
+
+
+def remember_template(tournament_id: UUID, template: StructureTemplate):
+    """Cache the template a tournament was created from, so a reset does not have to capture it."""
+    with _lock:
+        _templates[tournament_id] = template
+        _templates.move_to_end(tournament_id)
+        while len(_templates) > TEMPLATE_CACHE_SIZE:
+            _templates.popitem(last=False)
+
+
+def get_template(tournament: Tournament) -> StructureTemplate:
+    """Return the cached structure template of a tournament, capturing it on first use."""
+    with _lock:
+        template = _templates.get(tournament.id)
+        if template is not None:
+            _templates.move_to_end(tournament.id)
+            return template
+    template = capture_template(tournament)
+    remember_template(tournament.id, template)
+    return template
+
+
+def forget_template(tournament_id: UUID):
+    """Drop the cached template of a tournament (e.g. when it is deleted)."""
+    with _lock:
+        _templates.pop(tournament_id, None)
+
+
+def template_to_json(template: StructureTemplate) -> dict:
+    """Plain JSON form of a template, e.g. to store it with an archived tournament."""
+    return {
+        'winners_bracket_qualified': template.winners_bracket_qualified,
+        'groups': [list(shape) for shape in template.groups],
+        'has_playoff': template.has_playoff,
+        'playoff_matches': [list(shape) for shape in template.playoff_matches],
+        'matches': [list(shape) for shape in template.matches],
+    }
+
+
+def template_from_json(data: dict) -> StructureTemplate:
+    """Rebuild a template stored with template_to_json."""
+    return StructureTemplate(
+        winners_bracket_qualified=data['winners_bracket_qualified'],
+        groups=tuple(GroupShape(*shape) for shape in data['groups']),
+        has_playoff=data['has_playoff'],
+        playoff_matches=tuple(PlayoffMatchShape(*shape) for shape in data['playoff_matches']),
+        matches=tuple(MatchShape(*shape) for shape in data['matches'])
+    )
+
+
+def stamp_template(tournament: Tournament, template: StructureTemplate):
+    """
+    Create the empty structure described by a template with fresh ids: one bulk INSERT per table.
+
+    Every match is created 'scheduled', so the open match counters of the tournament,
+    the group stage and the groups are set to the number of their matches.
+
+    Args:
+        tournament: The tournament (without stages and matches).
+        template: The structure to create.
+    """
+    tournament_id = tournament.id
+    group_ids = [uuid.uuid4() for _ in template.groups]
+    playoff_match_ids = [uuid.uuid4() for _ in template.playoff_matches]
+    open_per_group = [0] * len(template.groups)
+    for shape in template.matches:
+        if shape.group is not None:
+            open_per_group[shape.group] += 1
+
+    if template.winners_bracket_qualified is not None:
+        stage_id = uuid.uuid4()
+        db.session.execute(insert(GroupStage), [{
+            'id': stage_id, 'tournament_id': tournament_id,
+            'winners_bracket_qualified': template.winners_bracket_qualified,
+            'open_matches': sum(open_per_group)
+        }])
+        if template.groups:
+            db.session.execute(insert(Group), [
+                {'id': group_id, 'groupstage_id': stage_id, 'letter': shape.letter,
+                 'max_participants': shape.max_participants, 'open_matches': open_matches}
+                for group_id, shape, open_matches in zip(group_ids, template.groups, open_per_group)
+            ])
+            rows = [
+                {'id': uuid.uuid4(), 'group_id': group_id, 'place': 0, 'wins': 0, 'draws': 0, 'loses': 0}
+                for group_id, shape in zip(group_ids, template.groups) for _ in range(shape.slots)
+            ]
+            if rows:
+                db.session.execute(insert(GroupRow), rows)
+
+    if template.has_playoff:
+        playoff_id = uuid.uuid4()
+        db.session.execute(insert(PlayoffStage), [{'id': playoff_id, 'tournament_id': tournament_id}])
+        if template.playoff_matches:
+            db.session.execute(insert(PlayoffStageMatch), [
+                {'id': match_id, 'playoff_id': playoff_id, 'round_number': shape.round_number,
+                 'bracket': shape.bracket,
+                 'depends_on_match_1_id': None if shape.depends_on_1 is None else playoff_match_ids[shape.depends_on_1],
+                 'depends_on_match_2_id': None if shape.depends_on_2 is None else playoff_match_ids[shape.depends_on_2]}
+                for match_id, shape in zip(playoff_match_ids, template.playoff_matches)
+            ])
+
+    if template.matches:
+        db.session.execute(insert(Match), [
+            {'id': uuid.uuid4(), 'tournament_id': tournament_id, 'type': shape.type,
+             'format': shape.format, 'status': 'scheduled', 'number': shape.number,
+             'is_playoff': shape.is_playoff,
+             'group_id': None if shape.group is None else group_ids[shape.group],
+             'playoff_match_id': None if shape.playoff_match is None else playoff_match_ids[shape.playoff_match],
+             'participant1_id': None, 'participant2_id': None, 'winner_id': None,
+             'participant1_score': 0, 'participant2_score': 0, 'version': 1}
+            for shape in template.matches
+        ])
+    tournament.open_matches = len(template.matches)
+
+
+def _evict_structure(tournament_id: UUID):
+    # Rows removed by the database cascades are still in the identity map; drop them so that
+    # nothing stale is served from the session or flushed later
+    session = db.session
+    objects = list(session.identity_map.values())
+
+    def evict(model, column, parents):
+        evicted = set()
+        for obj in objects:
+            if isinstance(obj, model) and sa_inspect(obj).dict.get(column) in parents:
+                evicted.add(obj.id)
+                # Expunging a parent cascades to its loaded children
+                if obj in session:
+                    session.expunge(obj)
+        return evicted
+
+    stages = evict(GroupStage, 'tournament_id', {tournament_id}) | \
+        evict(PlayoffStage, 'tournament_id', {tournament_id})
+    groups = evict(Group, 'groupstage_id', stages)
+    evict(GroupRow, 'group_id', groups)
+    evict(PlayoffStageMatch, 'playoff_id', stages)
+    matches = evict(Match, 'tournament_id', {tournament_id})
+    evict(Map, 'match_id', matches)
+
+
+def purge_structure(tournament: Tournament):
+    """
+    Delete the stages and matches of a tournament with three statements.
+
+    Groups, group rows and memberships, bracket matches and maps are removed by
+    ON DELETE CASCADE; the ORM does not load them.
+
+    Args:
+        tournament: The tournament.
+    """
+    db.session.flush()
+    for model in (Match, GroupStage, PlayoffStage):
+        db.session.execute(
+            delete(model).where(model.tournament_id == tournament.id),
+            execution_options={"synchronize_session": False}
+        )
+    _evict_structure(tournament.id)
+    db.session.expire(tournament, ['group_stage', 'playoff_stage', 'matches'])
+
+
+def delete_tournament_rows(tournament: Tournament):
+    """
+    Delete a tournament with a single statement; stages, matches, registrations, events,
+    the archive and the scheduled start are removed by ON DELETE CASCADE.
+
+    Args:
+        tournament: The tournament.
+    """
+    tournament_id = tournament.id
+    db.session.delete(tournament)
+    db.session.flush()
+    _evict_structure(tournament_id)
+    forget_template(tournament_id)
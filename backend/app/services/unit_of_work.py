@@ -0,0 +1,144 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from app.extensions import db
+
+
+# Глубина вложенности текущей единицы работы (0 — транзакция не открыта)
+_depth = ContextVar('unit_of_work_depth', default=0)
+# Отложенные шаги (ключ -> функция), выполняются один раз перед коммитом
+_deferred = ContextVar('unit_of_work_deferred', default=None)
+
+
+@contextmanager
+def unit_of_work():
+    """
+    Open a unit of work on the current session, or join the one that is already open.
+
+    Service functions running inside the block only flush; the outermost block commits once
+    on success and rolls back everything on failure, so one result submission (or a batch of them)
+    is applied atomically.
+
+    Yields:
+        Session: The database session the unit of work runs on.
+    """
+    depth = _depth.get()
+    token = _depth.set(depth + 1)
+    deferred_token = _deferred.set({}) if depth == 0 else None
+    try:
+        yield db.session
+        if depth == 0:
+            run_deferred()
+            db.session.commit()
+    except BaseException:
+        if depth == 0:
+            db.session.rollback()
+        raise
+    finally:
+        if deferred_token is not None:
+            _deferred.reset(deferred_token)
+        _depth.reset(token)
+
+
+def transactional(func):
+    """Run the decorated service function inside a unit of work (joining an outer one if present)."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with unit_of_work():
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def in_unit_of_work() -> bool:
+    """Return True if the caller runs inside an open unit of work."""
+    return _depth.get() > 0
+
+
+def defer(key, func):
+    """
+    Schedule a step to run once before the current unit of work commits.
+
+    Steps registered several times under the same key (e.g. re-sorting the standings of one group
+    after every result in a batch) run only once, in the order they were first registered.
+    Outside a unit of work the step runs immediately.
+
+    Args:
+        key: Hashable identity of the step.
+        func: Callable without arguments.
+    """
+    steps = _deferred.get()
+    if steps is None:
+        func()
+        return
+    steps.setdefault(key, func)
+
+
+class _BatchStep:
+    # A deferred step collecting items (see defer_batch)
+
+    def __init__(self, func, items=()):
+        self.func = func
+        self.items = list(items)
+
+    def __call__(self):
+        self.func(self.items)
+
+    def copy(self):
+        return _BatchStep(self.func, self.items)
+
+
+def defer_batch(key, item, func):
+    """
+    Collect an item for a step that runs once before the current unit of work commits.
+
+    Like defer, but the step gets every item registered under its key (e.g. the winners of all
+    matches completed in a batch) and handles them with set-based queries. Items registered
+    after the step ran start a new step. Outside a unit of work the step runs immediately.
+
+    Args:
+        key: Hashable identity of the step.
+        item: The item to add.
+        func: Callable taking the list of items.
+    """
+    steps = _deferred.get()
+    if steps is None:
+        func([item])
+        return
+    step = steps.get(key)
+    if step is None:
+        step = steps[key] = _BatchStep(func)
+    step.items.append(item)
+
+
+@contextmanager
+def savepoint():
+    """
+    Run a block in a savepoint of the current unit of work.
+
+    If the block fails, its changes are rolled back and the steps it deferred are dropped
+    with them, so they do not run for work that was never applied.
+
+    Yields:
+        Session: The database session.
+    """
+    steps = _deferred.get()
+    saved = None if steps is None else {
+        key: step.copy() if isinstance(step, _BatchStep) else step for key, step in steps.items()
+    }
+    try:
+        with db.session.begin_nested():
+            yield db.session
+    except BaseException:
+        if steps is not None:
+            steps.clear()
+            steps.update(saved)
+        raise
+
+
+def run_deferred():
+    """Run the deferred steps of the current unit of work, including the ones they schedule."""
+    steps = _deferred.get()
+    while steps:
+        key = next(iter(steps))
+        steps.pop(key)()
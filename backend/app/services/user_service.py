@@ -1,13 +1,13 @@
 import os
-import uuid
 
 from flask import current_app
 from app.models.game_models import Game
 from app.models.user_models import User, Connection, GameAccount, UserRequest, TokenBlocklist, SupportToken
 from werkzeug.security import generate_password_hash
-from werkzeug.utils import secure_filename
 from datetime import datetime, timedelta, UTC
 from app.extensions import db
+from app.services.notification_service import on_requests_discarded
+from app.services.image_service import store_image, release_image, image_files, is_media_path, MAX_IMAGE_SIZE_MB
 from sqlalchemy.dialects.postgresql import UUID
 
 
@@ -52,10 +52,14 @@ def update_user(user_id, name=None, email=None, password=None, avatar=None, last
 
 
 def delete_user(user_id):
-    """Удаляет пользователя"""
+    """Удаляет пользователя вместе с его заявками"""
     user = User.query.get(user_id)
     if not user:
         return None
+    # Ожидающие заявки пользователя снимаются со счётчиков получателей
+    on_requests_discarded(user.sent_requests)
+    for user_request in list(user.sent_requests) + list(user.received_requests):
+        db.session.delete(user_request)
     db.session.delete(user)
     db.session.commit()
     return True
@@ -80,7 +84,7 @@ def get_user_profile(user_id):
 
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp'}
-MAX_FILE_SIZE_MB = 2
+MAX_FILE_SIZE_MB = MAX_IMAGE_SIZE_MB
 
 
 def allowed_file(filename):
@@ -88,16 +92,22 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+IMAGE_TYPES = {'avatar', 'team_logo', 'tournament', 'general', 'game_image', 'game_logo'}
+
+
 def save_image(file_storage, image_type, entity_id=None):
-    """Сохраняет изображение в указанную директорию с проверками.
+    """Сохраняет изображение в хранилище по содержимому с проверками.
+
+    Одинаковые файлы хранятся один раз: повторная загрузка увеличивает счётчик ссылок.
 
     Args:
         file_storage: Объект файла (например, request.files['file']).
         image_type: Тип изображения ('avatar', 'team_logo', 'tournament', 'general', 'game_image', 'game_logo').
-        entity_id: ID сущности (user_id, team_id, tournament_id), если требуется поддиректория.
+        entity_id: Не используется (файлы адресуются по содержимому), оставлен для совместимости.
 
     Returns:
-        Относительный путь к сохранённому файлу (например, '/static/avatars/<user_id>/<uuid>.jpg').
+        Относительный путь к сохранённому файлу (например, 'media/ab/<хэш>_full.jpg').
+        Миниатюры доступны через image_service.image_url.
     """
     if not file_storage:
         raise ValueError('Файл не предоставлен')
@@ -106,54 +116,34 @@ def save_image(file_storage, image_type, entity_id=None):
     if not allowed_file(file_storage.filename):
         raise ValueError('Недопустимый формат файла')
 
-    # Проверка размера
-    file_storage.seek(0, os.SEEK_END)
-    file_size_mb = file_storage.tell() / (1024 * 1024)
-    file_storage.seek(0)
-    if file_size_mb > MAX_FILE_SIZE_MB:
-        raise ValueError('Файл слишком большой. Максимальный размер — 2MB')
-
-    # Определение директории в зависимости от типа изображения
-    base_path = 'static'
-    sub_path = {
-        'avatar': f'avatars/{entity_id}' if entity_id else 'avatars',
-        'team_logo': f'team_logos/{entity_id}' if entity_id else 'team_logos',
-        'tournament': f'tournaments/{entity_id}' if entity_id else 'tournaments',
-        'general': 'general',
-        'game_image': 'games/images',
-        'game_logo': 'games/logos',
-    }.get(image_type)
-    if not sub_path:
+    if image_type not in IMAGE_TYPES:
         raise ValueError('Недопустимый тип изображения')
 
-    # Формирование имени файла
-    ext = os.path.splitext(secure_filename(file_storage.filename))[1]
-    filename = f"{uuid.uuid4().hex}{ext}"
-
-    # Создание директории
-    save_dir = os.path.join(current_app.root_path, base_path, sub_path)
-    os.makedirs(save_dir, exist_ok=True)
-
-    # Сохранение файла
-    save_path = os.path.join(save_dir, filename)
-    file_storage.save(save_path)
-
-    # Возвращаем относительный путь
-    return f"{base_path}/{sub_path}/{filename}"
+    # Размер и формат (по сигнатуре) проверяются при приёме файла, см. ImageUploadStream;
+    # перекодирование и миниатюры — в фоне
+    return store_image(file_storage, image_type)
 
 
 def delete_image(image_path):
-    """Удаляет изображение, если оно не дефолтное.
+    """Удаляет ссылку на изображение, если оно не дефолтное.
+
+    Изображения из хранилища по содержимому удаляются, когда на них не остаётся ссылок;
+    старые загрузки из static удаляются сразу вместе с миниатюрами.
 
     Args:
-        image_path: Путь к файлу (например, '/static/avatars/<user_id>/<uuid>.jpg').
+        image_path: Путь к файлу (например, 'media/ab/<хэш>_full.jpg').
     """
     if not image_path or any(default in image_path for default in ['default.png', 'games/images', 'games/logos']):
         return  # Нельзя удалять дефолтные изображения
 
-    full_path = os.path.join(current_app.root_path, image_path.lstrip("/"))
-    if os.path.exists(full_path):
-        os.remove(full_path)
+    if is_media_path(image_path):
+        release_image(image_path)
+        return
+
+    for path in image_files(image_path):
+        full_path = os.path.join(current_app.root_path, path.lstrip("/"))
+        if os.path.exists(full_path):
+            os.remove(full_path)
 
 
 # endregion
@@ -0,0 +1,45 @@
+from functools import wraps
+
+from flask import Request, request
+
+from app.services.image_service import ImageUploadStream, MAX_IMAGE_SIZE
+
+
+# Запас на текстовые поля формы и заголовки частей multipart
+FORM_OVERHEAD = 64 * 1024
+
+
+class UploadRequest(Request):
+    """Запрос, принимающий файлы сразу в хранилище изображений (см. ImageUploadStream).
+
+    Потоковый приём включается только на маршрутах с upload_limit; остальные запросы
+    разбирают multipart стандартным образом.
+    """
+
+    # Включается декоратором upload_limit
+    stream_uploads = False
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if not self.stream_uploads:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        return ImageUploadStream(MAX_IMAGE_SIZE)
+
+
+def upload_limit(max_bytes=MAX_IMAGE_SIZE + FORM_OVERHEAD):
+    """Ограничивает размер тела запроса для маршрута с загрузкой файлов.
+
+    Запрос с большим Content-Length отклоняется с 413 до чтения тела, запрос без него —
+    как только прочитано больше max_bytes. Файлы маршрута принимаются потоком в хранилище
+    изображений (см. UploadRequest). Декоратор должен стоять до первого обращения
+    к request.form / request.files.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            request.max_content_length = max_bytes
+            request.stream_uploads = True
+            return view(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
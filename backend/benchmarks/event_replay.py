@@ -0,0 +1,123 @@
+"""Перестроение проекций турнира из журнала событий: время полного воспроизведения.
+
+Создаёт во временной SQLite-базе турнир с синтетическим журналом: регистрации, посев групп
+и сетки, результаты карт и матчей, продвижение по сетке, завершение. Затем несколько раз
+перестраивает проекции (чтение журнала + применение событий) и печатает время.
+
+    python benchmarks/event_replay.py
+    python benchmarks/event_replay.py --matches 5000 --maps 3
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, UTC
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import config_by_name  # noqa: E402
+
+
+def synthetic_events(matches, maps_per_match, group_size=4):
+    """Журнал турнира: группы по group_size участников, затем сетка на выбывание."""
+    events = []
+    add = lambda type_, **payload: events.append((type_, payload))  # noqa: E731
+
+    group_matches = group_size * (group_size - 1) // 2
+    # Каждая группа даёт group_matches матчей и двух участников сетки (~2 матча сетки)
+    num_groups = max(1, matches // (group_matches + 2))
+    players = [str(uuid.uuid4()) for _ in range(num_groups * group_size)]
+    for player in players:
+        add('registered', participant_id=player, is_team=False)
+    add('started')
+    groups = {f'G{index}': players[index * group_size:(index + 1) * group_size]
+              for index in range(num_groups)}
+    add('seeded', groups=groups, bracket=[])
+
+    def play(match_id, first, second, group=None, round_=None):
+        for _ in range(maps_per_match):
+            add('map_completed', match_id=match_id, map_id=str(uuid.uuid4()), winner_id=first)
+        add('match_completed', match_id=match_id, status='completed', winner_id=first,
+            participant1_id=first, participant2_id=second, score=[maps_per_match, 0],
+            group=group, round=round_)
+
+    played = 0
+    for letter, members in groups.items():
+        for i, first in enumerate(members):
+            for second in members[i + 1:]:
+                play(str(uuid.uuid4()), first, second, group=letter)
+                played += 1
+
+    # Сетка на выбывание из двух лучших каждой группы (нечётный участник проходит дальше)
+    bracket_players = [members[i] for members in groups.values() for i in range(2)]
+    rounds = []
+    alive = bracket_players
+    while len(alive) > 1:
+        rounds.append([(str(uuid.uuid4()), alive[i], alive[i + 1]) for i in range(0, len(alive) - 1, 2)])
+        alive = alive[::2]
+    bracket = [{'match_id': match_id, 'round': str(number), 'participant1_id': None,
+                'participant2_id': None, 'winner_id': None, 'status': 'scheduled'}
+               for number, round_matches in enumerate(rounds, 1) for match_id, _, _ in round_matches]
+    add('seeded', bracket=bracket)
+    for number, round_matches in enumerate(rounds, 1):
+        for match_id, first, second in round_matches:
+            add('advanced', match_id=match_id, participant_id=first)
+            add('advanced', match_id=match_id, participant_id=second)
+            play(match_id, first, second, round_=str(number))
+            played += 1
+    add('completed', places={'1': alive[0]})
+    return events, played
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--matches', type=int, default=1000, help='Примерное число матчей')
+    parser.add_argument('--maps', type=int, default=2, help='Карт в матче')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'event_replay.db')
+    config_by_name['dev'].SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+    from app import create_app
+    from app.extensions import db
+    from app.models import Game, Tournament, TournamentEvent, User
+    from app.services.tournament_projections import rebuild_projection
+
+    app = create_app(lazy=True)
+    with app.app_context():
+        db.create_all()
+        creator = User(name='creator', email='creator@example.com', password_hash='x',
+                       last_online=datetime.now(UTC))
+        game = Game(title='Game', image_path='i', logo_path='l', service_name='s', type='solo')
+        db.session.add_all([creator, game])
+        db.session.flush()
+        tournament = Tournament(title='Replay', max_players=10 ** 6, type='solo',
+                                game_id=game.id, creator_id=creator.id)
+        db.session.add(tournament)
+        db.session.flush()
+
+        events, played = synthetic_events(args.matches, args.maps)
+        db.session.execute(db.insert(TournamentEvent), [
+            {'tournament_id': tournament.id, 'seq': seq, 'type': type_, 'payload': payload}
+            for seq, (type_, payload) in enumerate(events, 1)
+        ])
+        tournament.event_seq = len(events)
+        tournament_id = tournament.id
+        db.session.commit()
+        print(f"matches: {played}, events: {len(events)}")
+
+        timings = []
+        for _ in range(args.runs):
+            db.session.expunge_all()
+            started = time.perf_counter()
+            projection = rebuild_projection(tournament_id)
+            timings.append(time.perf_counter() - started)
+        print(f"rebuild: min {min(timings) * 1000:.0f} ms, max {max(timings) * 1000:.0f} ms; "
+              f"status {projection['status']}, matches {projection['stats']['matches_completed']}, "
+              f"groups {len(projection['standings'])}, bracket {len(projection['bracket'])}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""Нагрузка на пул соединений: с какого числа параллельных запросов начинается ожидание.
+
+Потоки-«запросы» берут соединение из пула веб-роли, выполняют запрос и держат соединение
+--hold-ms миллисекунд. Число потоков растёт по шагам; для каждого шага печатаются
+перцентили ожидания соединения, пик занятых соединений и overflow. Параллельно можно
+запустить «запуск турнира» (--scheduler): поток, держащий соединения пула планировщика
+(или общего пула с --shared, как было до разделения пулов).
+
+    python benchmarks/pool_load.py                          # SQLite-файл во временной папке
+    DATABASE_URL=postgresql://... python benchmarks/pool_load.py --scheduler
+    python benchmarks/pool_load.py --scheduler --shared
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config.base import BaseConfig  # noqa: E402
+from app.db_pools import PoolStats, engine_options  # noqa: E402
+
+
+CONFIG = {
+    'DB_POOL_ROLES': BaseConfig.DB_POOL_ROLES,
+    'DB_POOL_PRE_PING': BaseConfig.DB_POOL_PRE_PING,
+    'DB_POOL_RECYCLE': BaseConfig.DB_POOL_RECYCLE,
+}
+
+
+def make_engine(url, role):
+    options = engine_options(CONFIG, role)
+    if url.startswith('sqlite'):
+        options['connect_args'] = {'check_same_thread': False}
+    return create_engine(url, **options)
+
+
+def hold_connection(engine, hold, errors):
+    try:
+        with engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+            time.sleep(hold)
+    except Exception as e:  # таймаут выдачи соединения
+        errors.append(type(e).__name__)
+
+
+def run_step(engine, threads, requests_per_thread, hold):
+    pool = engine.pool
+    pool.stats = PoolStats()
+    errors = []
+    peak = {'in_use': 0, 'overflow': 0}
+    done = threading.Event()
+
+    def monitor():
+        while not done.is_set():
+            peak['in_use'] = max(peak['in_use'], pool.checkedout())
+            peak['overflow'] = max(peak['overflow'], pool.overflow())
+            time.sleep(0.002)
+
+    def worker():
+        for _ in range(requests_per_thread):
+            hold_connection(engine, hold, errors)
+
+    watcher = threading.Thread(target=monitor)
+    watcher.start()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    watcher.join()
+    return pool.stats.snapshot(), peak, errors, elapsed
+
+
+def start_scheduler_load(engine, connections, hold, stop):
+    """Имитация start_tournament: несколько соединений заняты, пока идёт шаг нагрузки."""
+    def job():
+        while not stop.is_set():
+            hold_connection(engine, hold, [])
+
+    jobs = [threading.Thread(target=job) for _ in range(connections)]
+    for thread in jobs:
+        thread.start()
+    return jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--steps', default='2,5,10,15,20,25,30,40',
+                        help='Число параллельных запросов на каждом шаге')
+    parser.add_argument('--requests', type=int, default=20, help='Запросов на поток')
+    parser.add_argument('--hold-ms', type=float, default=20, help='Время удержания соединения')
+    parser.add_argument('--scheduler', action='store_true', help='Параллельная нагрузка планировщика')
+    parser.add_argument('--scheduler-connections', type=int, default=5)
+    parser.add_argument('--shared', action='store_true',
+                        help='Планировщик берёт соединения из веб-пула')
+    args = parser.parse_args()
+
+    url = os.environ.get('DATABASE_URL')
+    if not url:
+        url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'pool_load.db')}"
+    web = make_engine(url, 'web')
+    scheduler = web if args.shared else make_engine(url, 'scheduler')
+    hold = args.hold_ms / 1000
+
+    web_pool = CONFIG['DB_POOL_ROLES']['web']
+    print(f"web pool: size={web_pool['pool_size']} overflow={web_pool['max_overflow']} "
+          f"timeout={web_pool['pool_timeout']}s; hold={args.hold_ms}ms; "
+          f"scheduler={'shared' if args.shared else 'own'} x{args.scheduler_connections if args.scheduler else 0}")
+    print(f"{'threads':>7} {'p95 ms':>8} {'max ms':>8} {'slow':>6} {'timeouts':>8} "
+          f"{'in_use':>6} {'overflow':>8} {'req/s':>8}")
+
+    for threads in (int(step) for step in args.steps.split(',')):
+        stop = threading.Event()
+        jobs = (start_scheduler_load(scheduler, args.scheduler_connections, hold * 5, stop)
+                if args.scheduler else [])
+        stats, peak, errors, elapsed = run_step(web, threads, args.requests, hold)
+        stop.set()
+        for thread in jobs:
+            thread.join()
+        print(f"{threads:>7} {stats['p95_wait_ms']:>8.1f} {stats['max_wait_ms']:>8.1f} "
+              f"{stats['slow_checkouts']:>6} {stats['timeouts']:>8} {peak['in_use']:>6} "
+              f"{peak['overflow']:>8} {threads * args.requests / elapsed:>8.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Профиль холодного старта: импорт по модулям до create_app, время create_app и первого запроса.
+
+Каждый замер запускается в отдельном интерпретаторе с `python -X importtime`, чтобы модули
+не были уже загружены. Сравниваются обычный и ленивый режимы create_app.
+
+    python benchmarks/startup_profile.py
+    python benchmarks/startup_profile.py --top 30 --mode lazy
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Выполняется в дочернем процессе; последняя строка stdout — JSON с замерами.
+# Импорты после MARKER (первый запрос) в разбивку по модулям не попадают
+MARKER = '-- create_app done --'
+STARTUP_SCRIPT = """
+import json, os, sys, time
+started = time.perf_counter()
+from app.config import config_by_name
+config_by_name['dev'].SQLALCHEMY_DATABASE_URI = os.environ.get('PROFILE_DATABASE_URL', 'sqlite://')
+from app import create_app
+imported = time.perf_counter()
+app = create_app(lazy={lazy})
+created = time.perf_counter()
+sys.stderr.write('{marker}\\n')
+from app.extensions import db
+with app.app_context():
+    db.create_all()
+request_started = time.perf_counter()
+app.test_client().get('/api/games/')
+first_request = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_request_ms': (first_request - request_started) * 1000,
+    'modules': len(sys.modules),
+}}))
+"""
+
+
+def parse_importtime(stderr):
+    """Разбирает вывод -X importtime до create_app: [(модуль, собственное мкс, суммарное мкс)]."""
+    rows = []
+    for line in stderr.splitlines():
+        if line == MARKER:
+            break
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def profile(lazy):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT.format(lazy=lazy, marker=MARKER)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    return timings, parse_importtime(result.stderr)
+
+
+def group_by_package(rows):
+    """Суммирует собственное время импорта по пакетам верхнего уровня (app — по подпакетам)."""
+    totals = {}
+    for name, self_us, _ in rows:
+        parts = name.split('.')
+        key = '.'.join(parts[:2]) if parts[0] == 'app' else parts[0]
+        totals[key] = totals.get(key, 0) + self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', choices=('eager', 'lazy', 'both'), default='both')
+    parser.add_argument('--top', type=int, default=15, help='Сколько пакетов показать')
+    args = parser.parse_args()
+
+    modes = ('eager', 'lazy') if args.mode == 'both' else (args.mode,)
+    for mode in modes:
+        timings, rows = profile(lazy=mode == 'lazy')
+        print(f"== {mode}: import {timings['import_ms']:.0f} ms, "
+              f"create_app {timings['create_app_ms']:.0f} ms, "
+              f"first request {timings['first_request_ms']:.0f} ms, "
+              f"modules {timings['modules']}")
+        for package, self_us in group_by_package(rows)[:args.top]:
+            print(f"  {self_us / 1000:8.1f} ms  {package}")
+
+
+if __name__ == '__main__':
+    main()
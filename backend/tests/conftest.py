@@ -0,0 +1,138 @@
+from datetime import datetime, timedelta, UTC
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from app import create_app
+from app.extensions import db
+from app.models import Game, Match, Team, User
+from app.services import tournament_service
+
+
+@pytest.fixture
+def app():
+    app = create_app(config_name='test')
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            # pysqlite opens transactions lazily and breaks SAVEPOINT semantics;
+            # let SQLAlchemy emit BEGIN itself, as on PostgreSQL
+            @event.listens_for(db.engine, 'connect')
+            def _connect(dbapi_connection, _):
+                dbapi_connection.isolation_level = None
+
+            @event.listens_for(db.engine, 'begin')
+            def _begin(connection):
+                connection.exec_driver_sql('BEGIN')
+
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app):
+    count = iter(range(10 ** 6))
+
+    def make(name=None, is_admin=False):
+        index = next(count)
+        user = User(name=name or f'user{index}', email=f'user{index}@example.com', password_hash='x',
+                    last_online=datetime.now(UTC), is_admin=is_admin)
+        db.session.add(user)
+        db.session.commit()
+        return user
+
+    return make
+
+
+@pytest.fixture
+def auth():
+    def headers(user, **extra):
+        return {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}', **extra}
+
+    return headers
+
+
+@pytest.fixture
+def make_team(make_user):
+    count = iter(range(10 ** 6))
+
+    def make(leader=None, members=0):
+        leader = leader or make_user()
+        team = Team(title=f'team{next(count)}', leader_id=leader.id,
+                    players=[leader] + [make_user() for _ in range(members)])
+        db.session.add(team)
+        db.session.commit()
+        return team
+
+    return make
+
+
+@pytest.fixture
+def game(app):
+    game = Game(title='Game', image_path='image.png', logo_path='logo.png', service_name='game', type='solo')
+    db.session.add(game)
+    db.session.commit()
+    return game
+
+
+@pytest.fixture
+def creator(make_user):
+    return make_user('creator')
+
+
+@pytest.fixture
+def make_tournament(game, creator, make_user, make_team):
+    """Create and start a tournament; returns (tournament id, participants: users or teams)."""
+    def make(participants=4, groups=False, teams=False, **options):
+        users = [make_team() if teams else make_user() for _ in range(participants)]
+        # The tournament type follows the game
+        game.type = 'team' if teams else 'solo'
+        if groups:
+            options.update(has_group_stage=True, num_groups=2,
+                           max_participants_per_group=participants // 2,
+                           playoff_participants_count_per_group=2)
+        tournament = tournament_service.create_tournament(
+            'Tournament', game.id, creator.id, datetime.now(UTC) + timedelta(days=1),
+            max_participants=participants, prize_fund=100, status='open',
+            format_='bo1', final_format_='bo1', **options)
+        for user in users:
+            tournament_service.register_for_tournament(tournament.id, user.id, is_team=teams)
+        db.session.commit()
+        tournament_service.start_tournament(tournament.id)
+        db.session.commit()
+        return tournament.id, users
+
+    return make
+
+
+@pytest.fixture
+def open_matches(app):
+    """Open matches of a tournament that have both participants, in match number order."""
+    def find(tournament_id, playoff=None):
+        query = Match.query.filter(
+            Match.tournament_id == tournament_id, Match.status.in_(('scheduled', 'ongoing')),
+            Match.participant1_id.isnot(None), Match.participant2_id.isnot(None))
+        if playoff is not None:
+            query = query.filter(Match.group_id.is_(None) if playoff else Match.group_id.isnot(None))
+        return sorted(query.all(), key=lambda match: int(match.number or 0))
+
+    return find
+
+
+@pytest.fixture
+def play_out(open_matches):
+    """Complete every match of a tournament (participant 1 wins) until it is over."""
+    def play(tournament_id):
+        while matches := open_matches(tournament_id):
+            for match in matches:
+                tournament_service.complete_match(tournament_id, match.id, match.participant1_id)
+            db.session.expire_all()
+
+    return play
@@ -0,0 +1,62 @@
+import zlib
+
+from app.extensions import db
+from app.models import Match, TournamentArchive
+from app.services import tournament_service
+
+
+def test_completed_tournament_is_read_from_its_archive(app, client, make_tournament, play_out):
+    app.config['ARCHIVE_PRUNE_LIVE_TABLES'] = True
+    tournament_id, _ = make_tournament(4)
+    live_matches = client.get(f'/api/tournaments/{tournament_id}/matches').json
+    play_out(tournament_id)
+
+    archive = db.session.get(TournamentArchive, tournament_id)
+    assert archive is not None and archive.pruned
+    assert Match.query.filter_by(tournament_id=tournament_id).count() == 0
+
+    tournament = client.get(f'/api/tournaments/{tournament_id}')
+    assert tournament.status_code == 200
+    assert tournament.json['status'] == 'completed'
+    matches = client.get(f'/api/tournaments/{tournament_id}/matches').json
+    assert sorted(match['id'] for match in matches) == sorted(match['id'] for match in live_matches)
+    assert all(match['status'] in ('completed', 'cancelled') and match['version'] for match in matches)
+    detail = client.get(f'/api/tournaments/{tournament_id}/matches/{matches[0]["id"]}')
+    assert detail.status_code == 200 and detail.json['id'] == matches[0]['id']
+    assert client.get(f'/api/tournaments/{tournament_id}/prize-table').json['rows']
+
+
+def test_reset_recreates_a_pruned_tournament(app, make_tournament, play_out):
+    app.config['ARCHIVE_PRUNE_LIVE_TABLES'] = True
+    tournament_id, _ = make_tournament(4)
+    matches_before = Match.query.filter_by(tournament_id=tournament_id).count()
+    play_out(tournament_id)
+
+    tournament_service.reset_tournament(tournament_id)
+    db.session.commit()
+
+    assert db.session.get(TournamentArchive, tournament_id) is None
+    assert Match.query.filter_by(tournament_id=tournament_id).count() == matches_before
+
+
+def test_snapshot_joins_current_profiles_and_highlight(app, client, make_tournament, play_out):
+    app.config['ARCHIVE_PRUNE_LIVE_TABLES'] = True
+    tournament_id, users = make_tournament(4, groups=True)
+    play_out(tournament_id)
+    archive = db.session.get(TournamentArchive, tournament_id)
+    assert users[0].name.encode() not in zlib.decompress(archive.data)
+
+    users[0].name = 'renamed'
+    users[0].avatar = '/static/avatars/other.png'
+    db.session.commit()
+    response = client.patch(f'/api/tournaments/{tournament_id}/highlight',
+                            json={'highlight_url': 'https://youtube.com/watch?v=abc'})
+    assert response.status_code == 200
+
+    tournament = client.get(f'/api/tournaments/{tournament_id}').json
+    assert tournament['highlight_url'] == 'https://youtube.com/watch?v=abc'
+    participant, = (user for user in tournament['participants'] if user['id'] == str(users[0].id))
+    assert participant['name'] == 'renamed' and participant['avatar'] == '/static/avatars/other.png'
+    groups = client.get(f'/api/tournaments/{tournament_id}/group-stage').json['groups']
+    rows = [row for group in groups for row in group['rows'] if row['user_id'] == str(users[0].id)]
+    assert rows[0]['user']['name'] == 'renamed'
@@ -0,0 +1,94 @@
+import uuid
+
+from app.extensions import db
+from app.models import Match, Tournament
+from app.services import achievement_service, tournament_service
+
+
+def bulk(client, tournament_id, results, headers):
+    return client.post(f'/api/tournaments/{tournament_id}/results/bulk', json={'results': results}, headers=headers)
+
+
+def test_bulk_results_apply_valid_and_reject_invalid(client, make_tournament, creator, auth, open_matches):
+    tournament_id, _ = make_tournament(8, groups=True)
+    matches = open_matches(tournament_id, playoff=False)[:3]
+    results = [{'match_id': str(match.id), 'winner_id': str(match.participant1_id)} for match in matches]
+    results += [
+        {'match_id': str(uuid.uuid4()), 'winner_id': str(matches[0].participant1_id)},
+        {'match_id': str(matches[0].id), 'winner_id': str(matches[0].participant2_id)},
+    ]
+
+    response = bulk(client, tournament_id, results, auth(creator))
+
+    assert response.status_code == 200
+    assert response.json['applied'] == 3
+    outcomes = response.json['results']
+    assert [outcome['status'] for outcome in outcomes] == ['applied'] * 3 + ['rejected'] * 2
+    assert outcomes[3]['msg'] == 'Match not found in this tournament'
+    assert outcomes[4]['msg'] == 'Duplicate result in the batch'
+    db.session.expire_all()
+    for match in matches:
+        match = db.session.get(Match, match.id)
+        assert (match.status, match.winner_id) == ('completed', match.participant1_id)
+
+
+def test_bulk_results_reject_stale_version(client, make_tournament, creator, auth, open_matches):
+    tournament_id, _ = make_tournament(4)
+    first, second = open_matches(tournament_id)
+
+    response = bulk(client, tournament_id, [
+        {'match_id': str(first.id), 'winner_id': str(first.participant1_id), 'version': first.version},
+        {'match_id': str(second.id), 'winner_id': str(second.participant1_id), 'version': second.version + 1},
+    ], auth(creator))
+
+    outcomes = response.json['results']
+    assert outcomes[0]['status'] == 'applied'
+    assert outcomes[1] == {**outcomes[1], 'status': 'rejected', 'msg': 'Match was modified concurrently'}
+    db.session.expire_all()
+    assert db.session.get(Match, second.id).status == 'scheduled'
+
+
+def test_bulk_results_drop_deferred_steps_of_rejected_results(
+        client, make_tournament, creator, auth, open_matches, monkeypatch):
+    tournament_id, _ = make_tournament(8, groups=True)
+    matches = open_matches(tournament_id, playoff=False)[:3]
+    rejected_id = matches[2].id
+
+    awarded = []
+    award_match_wins = achievement_service.award_match_wins
+    monkeypatch.setattr(achievement_service, 'award_match_wins',
+                        lambda winners: (awarded.extend(winners), award_match_wins(winners)))
+    complete_match = tournament_service.complete_match
+
+    def fail_after_completion(tournament_id, match_id, winner_id=None, expected_version=None):
+        # The match is completed (and its steps deferred) before the result is rejected
+        match = complete_match(tournament_id, match_id, winner_id, expected_version)
+        if match_id == rejected_id:
+            raise ValueError('Rejected after completion')
+        return match
+
+    monkeypatch.setattr(tournament_service, 'complete_match', fail_after_completion)
+
+    response = bulk(client, tournament_id, [
+        {'match_id': str(match.id), 'winner_id': str(match.participant1_id)} for match in matches
+    ], auth(creator))
+
+    assert [outcome['status'] for outcome in response.json['results']] == ['applied', 'applied', 'rejected']
+    assert sorted(winner for _, winner in awarded) == sorted(match.participant1_id for match in matches[:2])
+    db.session.expire_all()
+    assert db.session.get(Match, rejected_id).status == 'scheduled'
+
+
+def test_bulk_results_complete_the_tournament(client, make_tournament, creator, auth, open_matches):
+    tournament_id, _ = make_tournament(4)
+    headers = auth(creator)
+    while matches := open_matches(tournament_id):
+        response = bulk(client, tournament_id, [
+            {'match_id': str(match.id), 'winner_id': str(match.participant1_id)} for match in matches
+        ], headers)
+        assert response.json['rejected'] == 0
+        db.session.expire_all()
+
+    tournament = db.session.get(Tournament, tournament_id)
+    assert tournament.status == 'completed'
+    assert tournament.open_matches == 0
@@ -0,0 +1,12 @@
+from app.services import asset_service
+
+
+def test_default_banner_is_an_absolute_url(client, make_tournament, monkeypatch):
+    tournament_id, _ = make_tournament(4)
+
+    feed = client.get('/api/tournaments/feed?limit=50').json['data']
+    assert {item['id']: item['banner_url'] for item in feed}[str(tournament_id)] == '/static/tournaments/default.png'
+
+    manifest = {'tournaments/default.png': {'hashed': 'tournaments/default.0123abcd.png'}}
+    monkeypatch.setattr(asset_service, 'load_manifest', lambda: (manifest, {}))
+    assert asset_service.asset_url('static/tournaments/default.png') == '/assets/tournaments/default.0123abcd.png'
@@ -0,0 +1,79 @@
+from app.extensions import db
+from app.models import IdempotencyKey, Match
+from app.services import achievement_service
+
+
+def complete_url(tournament_id, match):
+    return f'/api/tournaments/{tournament_id}/matches/{match.id}/complete'
+
+
+def test_replay_returns_stored_response(client, make_tournament, creator, auth, open_matches):
+    tournament_id, _ = make_tournament(4)
+    match = open_matches(tournament_id)[0]
+    headers = auth(creator, **{'Idempotency-Key': 'complete-1'})
+    body = {'winner_id': str(match.participant1_id)}
+
+    first = client.post(complete_url(tournament_id, match), json=body, headers=headers)
+    replay = client.post(complete_url(tournament_id, match), json=body, headers=headers)
+
+    assert first.status_code == 200
+    assert replay.status_code == 200
+    assert replay.headers['Idempotent-Replayed'] == 'true'
+    assert replay.json == first.json
+    db.session.expire_all()
+    assert db.session.get(Match, match.id).version == first.json['match']['version']
+
+
+def test_key_reused_with_another_body_is_rejected(client, make_tournament, creator, auth, open_matches):
+    tournament_id, _ = make_tournament(4)
+    match = open_matches(tournament_id)[0]
+    headers = auth(creator, **{'Idempotency-Key': 'complete-1'})
+
+    client.post(complete_url(tournament_id, match), json={'winner_id': str(match.participant1_id)}, headers=headers)
+    response = client.post(complete_url(tournament_id, match), json={'winner_id': str(match.participant2_id)},
+                           headers=headers)
+
+    assert response.status_code == 422
+
+
+def test_failed_deferred_step_rolls_back_request_and_key(
+        client, make_tournament, creator, auth, open_matches, monkeypatch):
+    tournament_id, _ = make_tournament(4)
+    match = open_matches(tournament_id)[0]
+    headers = auth(creator, **{'Idempotency-Key': 'complete-1'})
+    body = {'winner_id': str(match.participant1_id)}
+
+    def fail(winners):
+        raise ValueError('Achievements are unavailable')
+
+    monkeypatch.setattr(achievement_service, 'award_match_wins', fail)
+    response = client.post(complete_url(tournament_id, match), json=body, headers=headers)
+
+    assert response.status_code == 422
+    db.session.expire_all()
+    assert db.session.get(Match, match.id).status == 'scheduled'
+    assert IdempotencyKey.query.count() == 0
+
+    monkeypatch.undo()
+    retry = client.post(complete_url(tournament_id, match), json=body, headers=headers)
+    assert retry.status_code == 200
+    assert 'Idempotent-Replayed' not in retry.headers
+
+
+def test_match_version_is_exposed_and_checked(client, make_tournament, creator, auth, open_matches):
+    tournament_id, _ = make_tournament(4)
+    match = open_matches(tournament_id)[0]
+    body = {'winner_id': str(match.participant1_id)}
+
+    detail = client.get(f'/api/tournaments/{tournament_id}/matches/{match.id}')
+    assert detail.headers['ETag'] == f'"{detail.json["version"]}"'
+    listed = client.get(f'/api/tournaments/{tournament_id}/matches').json
+    assert {item['id']: item['version'] for item in listed}[str(match.id)] == detail.json['version']
+
+    stale = client.post(complete_url(tournament_id, match), json=body,
+                        headers=auth(creator, **{'If-Match': f'"{detail.json["version"] + 1}"'}))
+    assert stale.status_code == 409
+
+    current = client.post(complete_url(tournament_id, match), json=body,
+                          headers=auth(creator, **{'If-Match': detail.headers['ETag']}))
+    assert current.status_code == 200
@@ -0,0 +1,72 @@
+import pytest
+
+from app.extensions import db
+from app.models import Match
+from app.services import game_service
+from app.services.map_veto import veto_plan
+
+MAP_POOL = ['Dust2', 'Mirage', 'Inferno', 'Nuke', 'Ancient', 'Anubis', 'Vertigo']
+
+
+@pytest.fixture
+def map_pool(game):
+    game_service.set_map_pool(game.id, MAP_POOL)
+    db.session.commit()
+    return MAP_POOL
+
+
+def veto(client, tournament_id, match, map_name, headers, **body):
+    return client.post(f'/api/tournaments/{tournament_id}/matches/{match.id}/veto',
+                       json={'map': map_name, **body}, headers=headers)
+
+
+def test_veto_plan():
+    assert veto_plan(7, 1) == 'bbbbbb'
+    assert veto_plan(7, 3) == 'bbppbb'
+    with pytest.raises(ValueError):
+        veto_plan(2, 3)
+
+
+def test_participants_take_turns(client, map_pool, make_tournament, creator, auth, open_matches):
+    tournament_id, users = make_tournament(4)
+    match = open_matches(tournament_id)[0]
+    assert client.post(f'/api/tournaments/{tournament_id}/matches/{match.id}/start',
+                       headers=auth(creator)).status_code == 200
+    by_id = {user.id: user for user in users}
+    first, second = by_id[match.participant1_id], by_id[match.participant2_id]
+
+    assert veto(client, tournament_id, match, 'Nuke', auth(second)).status_code == 422
+    assert veto(client, tournament_id, match, 'Nuke', auth(first)).status_code == 200
+    assert veto(client, tournament_id, match, 'Nuke', auth(second)).status_code == 422
+
+    turns = [second, first, second, first, second]
+    for user, map_name in zip(turns, ['Vertigo', 'Mirage', 'Inferno', 'Dust2', 'Ancient']):
+        response = veto(client, tournament_id, match, map_name, auth(user))
+        assert response.status_code == 200
+
+    state = response.json['veto']
+    assert state['done'] and state['maps'] == ['Anubis']
+    db.session.expire_all()
+    assert [map_.name for map_ in db.session.get(Match, match.id).maps] == ['Anubis']
+
+
+def test_outsiders_cannot_veto(client, map_pool, make_tournament, make_user, creator, auth, open_matches):
+    tournament_id, _ = make_tournament(4)
+    match = open_matches(tournament_id)[0]
+    client.post(f'/api/tournaments/{tournament_id}/matches/{match.id}/start', headers=auth(creator))
+
+    assert veto(client, tournament_id, match, 'Nuke', auth(make_user())).status_code == 403
+    assert veto(client, tournament_id, match, 'Nuke', auth(creator), side=1).status_code == 200
+
+
+def test_team_leaders_veto_for_their_teams(client, map_pool, make_tournament, make_user, creator, auth, open_matches):
+    tournament_id, teams = make_tournament(4, teams=True)
+    match = open_matches(tournament_id)[0]
+    client.post(f'/api/tournaments/{tournament_id}/matches/{match.id}/start', headers=auth(creator))
+    by_id = {team.id: team for team in teams}
+    first, second = by_id[match.participant1_id], by_id[match.participant2_id]
+
+    assert veto(client, tournament_id, match, 'Nuke', auth(second.leader)).status_code == 422
+    assert veto(client, tournament_id, match, 'Nuke', auth(first.leader)).status_code == 200
+    assert veto(client, tournament_id, match, 'Vertigo', auth(second.leader)).status_code == 200
+    assert veto(client, tournament_id, match, 'Mirage', auth(make_user())).status_code == 403
@@ -0,0 +1,58 @@
+from app.extensions import db
+from app.models import Team
+
+
+def summary(client, user, auth):
+    return client.get('/api/users/me/notifications/summary', headers=auth(user)).json
+
+
+def send_friend_request(client, sender, recipient, auth):
+    return client.post('/api/users/me/friends', json={'target_user_id': str(recipient.id)}, headers=auth(sender))
+
+
+def respond(client, user, other, action, auth):
+    return client.post(f'/api/users/me/friends/requests/{other.id}', json={'action': action}, headers=auth(user))
+
+
+def test_withdrawn_friend_request_is_uncounted(client, make_user, auth):
+    sender, recipient = make_user(), make_user()
+    send_friend_request(client, sender, recipient, auth)
+    assert summary(client, recipient, auth) == {'unread': 1, 'pending_friend_requests': 1, 'pending_team_invites': 0}
+
+    assert respond(client, recipient, sender, 'withdraw', auth).status_code == 403
+    assert respond(client, sender, recipient, 'withdraw', auth).status_code == 200
+
+    assert summary(client, recipient, auth) == {'unread': 0, 'pending_friend_requests': 0, 'pending_team_invites': 0}
+
+
+def test_withdrawn_team_invite_is_uncounted(client, make_user, make_team, auth):
+    team = make_team()
+    invitee = make_user()
+    invite = client.post(f'/api/teams/{team.id}/invite', json={'user_id': str(invitee.id)},
+                         headers=auth(team.leader)).json['request']
+    assert summary(client, invitee, auth)['pending_team_invites'] == 1
+
+    assert client.delete(f'/api/teams/invites/{invite["id"]}', headers=auth(invitee)).status_code == 403
+    assert client.delete(f'/api/teams/invites/{invite["id"]}', headers=auth(team.leader)).status_code == 200
+
+    assert summary(client, invitee, auth) == {'unread': 0, 'pending_friend_requests': 0, 'pending_team_invites': 0}
+
+
+def test_deleting_a_team_uncounts_its_invites(client, make_user, make_team, auth):
+    team = make_team()
+    invitee = make_user()
+    client.post(f'/api/teams/{team.id}/invite', json={'user_id': str(invitee.id)}, headers=auth(team.leader))
+
+    assert client.delete(f'/api/teams/{team.id}', headers=auth(team.leader)).status_code == 200
+
+    assert db.session.get(Team, team.id) is None
+    assert summary(client, invitee, auth)['pending_team_invites'] == 0
+
+
+def test_deleting_a_user_uncounts_their_requests(client, make_user, auth):
+    sender, recipient = make_user(), make_user()
+    send_friend_request(client, sender, recipient, auth)
+
+    assert client.delete('/api/users/me', headers=auth(sender)).status_code == 200
+
+    assert summary(client, recipient, auth) == {'unread': 0, 'pending_friend_requests': 0, 'pending_team_invites': 0}
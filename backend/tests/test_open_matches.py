@@ -0,0 +1,57 @@
+import uuid
+
+from sqlalchemy import update
+
+from app.extensions import db
+from app.models import GroupStage, Match, Tournament
+from app.services import tournament_service
+from app.services.match_service import recount_open_matches, set_match_status
+
+
+def test_counters_follow_status_changes(make_tournament, open_matches):
+    tournament_id, _ = make_tournament(8, groups=True)
+    tournament = db.session.get(Tournament, tournament_id)
+    before = tournament.open_matches
+    match = open_matches(tournament_id, playoff=False)[0]
+
+    tournament_service.complete_match(tournament_id, match.id, match.participant1_id)
+    db.session.commit()
+
+    assert tournament.open_matches == before - 1
+    assert recount_open_matches(tournament_id) == 0
+
+
+def test_drifted_counter_is_recounted(make_tournament, open_matches):
+    tournament_id, _ = make_tournament(8, groups=True)
+    group_stage = GroupStage.query.filter_by(tournament_id=tournament_id).one()
+    db.session.execute(update(GroupStage).where(GroupStage.id == group_stage.id).values(open_matches=0))
+    db.session.commit()
+    match = open_matches(tournament_id, playoff=False)[0]
+
+    tournament_service.complete_match(tournament_id, match.id, match.participant1_id)
+    db.session.commit()
+
+    open_count = Match.query.filter(Match.group_id.isnot(None), Match.status.in_(('scheduled', 'ongoing'))).count()
+    assert db.session.get(GroupStage, group_stage.id).open_matches == open_count
+
+
+def test_missing_counter_row_is_skipped(make_tournament, open_matches):
+    tournament_id, _ = make_tournament(4)
+    match = open_matches(tournament_id)[0]
+    db.session.expunge(match)
+    # The counter UPDATE matches no row (e.g. the tournament was deleted concurrently)
+    match.tournament_id = uuid.uuid4()
+
+    set_match_status(match, 'completed')
+
+    assert match.completed_at is not None
+
+
+def test_surplus_matches_of_a_short_group_are_cancelled(make_tournament):
+    tournament_id, _ = make_tournament(5, has_group_stage=True, num_groups=2, max_participants_per_group=3,
+                                       playoff_participants_count_per_group=2)
+
+    statuses = {group.letter: sorted(match.status for match in group.matches)
+                for group in GroupStage.query.filter_by(tournament_id=tournament_id).one().groups}
+    assert statuses == {'A': ['scheduled'] * 3, 'B': ['cancelled', 'cancelled', 'scheduled']}
+    assert recount_open_matches(tournament_id) == 0
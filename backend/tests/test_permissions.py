@@ -0,0 +1,7 @@
+def test_admin_only_routes_share_the_admin_check(client, make_user, game, auth):
+    user, admin = make_user(), make_user(is_admin=True)
+
+    assert client.get('/api/metrics/db-pool', headers=auth(user)).status_code == 403
+    assert client.get('/api/metrics/db-pool', headers=auth(admin)).status_code == 200
+    assert client.delete(f'/api/games/{game.id}', headers=auth(user)).status_code == 403
+    assert client.delete(f'/api/games/{game.id}', headers=auth(admin)).status_code == 200
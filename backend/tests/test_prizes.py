@@ -0,0 +1,63 @@
+import pytest
+
+from app.services.prize_service import MAX_PRIZE_PLACES, PrizeRow, compute_rows, prize_shares
+
+
+def test_default_distribution():
+    assert prize_shares() == [50, 30, 20]
+
+
+def test_shares_are_normalized_to_100():
+    shares = prize_shares('curve', {'places': 4, 'exponent': 1})
+    assert sum(shares) == pytest.approx(100)
+    assert shares == sorted(shares, reverse=True)
+    assert prize_shares('top_n', {'places': 4}) == [40, 30, 20, 10]
+
+
+@pytest.mark.parametrize('name, options', [
+    ('unknown', {}),
+    ('top_n', {'places': 0}),
+    ('top_n', {'places': MAX_PRIZE_PLACES + 1}),
+    ('top_n', {'places': True}),
+    ('curve', {'places': 8, 'exponent': 1e6}),
+    ('custom', {'shares': [0, 0]}),
+    ('custom', {'shares': [-10, 110]}),
+    ('top3', {'places': 3, 'unexpected': 1}),
+])
+def test_invalid_options_are_rejected(name, options):
+    with pytest.raises(ValueError):
+        prize_shares(name, options)
+
+
+def test_places_are_bounded_by_the_tournament_size():
+    assert len(prize_shares('top_n', {'places': 8}, max_places=8)) == 8
+    with pytest.raises(ValueError):
+        prize_shares('top_n', {'places': 9}, max_places=8)
+
+
+def test_tied_participants_split_the_prizes_of_their_places():
+    placements = [(1, ['a']), (2, ['b']), (3, ['c', 'd'])]
+    shares = [50, 30, 15, 5]
+
+    assert compute_rows(100, shares, placements) == [
+        PrizeRow(1, 50, 'a'), PrizeRow(2, 30, 'b'), PrizeRow(3, 10, 'c'), PrizeRow(3, 10, 'd')]
+    assert compute_rows(100, shares, placements, split_ties=False) == [
+        PrizeRow(1, 50, 'a'), PrizeRow(2, 30, 'b'), PrizeRow(3, 15, 'c'), PrizeRow(4, 5, 'd')]
+
+
+def test_prizes_are_awarded_when_the_final_is_decided(client, make_tournament, creator, auth, open_matches):
+    tournament_id, _ = make_tournament(4)
+    headers = auth(creator)
+    finalists = []
+    while matches := open_matches(tournament_id):
+        for match in matches:
+            response = client.post(f'/api/tournaments/{tournament_id}/matches/{match.id}/complete',
+                                   json={'winner_id': str(match.participant1_id)}, headers=headers)
+            assert response.status_code == 200
+        finalists = [(match.participant1_id, match.participant2_id) for match in matches]
+
+    rows = client.get(f'/api/tournaments/{tournament_id}/prize-table').json['rows']
+    winner, runner_up = finalists[0]
+    by_place = sorted((row['place'], float(row['prize']), row['user_id']) for row in rows)
+    assert by_place[:2] == [(1, 50.0, str(winner)), (2, 30.0, str(runner_up))]
+    assert [prize for place, prize, _ in by_place[2:]] == [10.0, 10.0]